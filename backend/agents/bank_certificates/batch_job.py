@@ -0,0 +1,312 @@
+# BATCH JOB TO GENERATE THE CERTIFICATES FOR ALL THE USERS (E.G. YEAR-END CERTIFICATES)
+# Usage (from the "backend" folder):
+#   python -m agents.bank_certificates.batch_job --table-name <agents-data-table> --bucket-name <bucket>
+#   python -m agents.bank_certificates.batch_job --local-output-dir ./temp/batch --synthetic-users 1000
+
+# Built-in imports
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from datetime import datetime
+from typing import Optional
+
+# Own imports
+from common.logger import custom_logger
+from agents.bank_certificates.generate_certificates import (
+    LOCATION,
+    get_certificate_hash,
+    render_certificate_pdf,
+)
+
+
+logger = custom_logger()
+
+
+def load_user_products(table_name: str, scan_segments: int) -> dict:
+    """
+    Function to load all the "USER#*/PRODUCT#*" items with a parallel scan.
+
+    :param table_name (str): Name of the agents-data DynamoDB table.
+    :param scan_segments (int): Amount of parallel scan segments.
+    :returns: dict of user ID to its list of products.
+    """
+    from common.helpers.dynamodb_helper import DynamoDBHelper
+
+    dynamodb_helper = DynamoDBHelper(table_name=table_name)
+    with ThreadPoolExecutor(max_workers=scan_segments) as executor:
+        segments = executor.map(
+            lambda segment: dynamodb_helper.scan_by_pk_and_sk_begins_with(
+                "USER#", "PRODUCT#", segment=segment, total_segments=scan_segments
+            ),
+            range(scan_segments),
+        )
+        items = [item for segment_items in segments for item in segment_items]
+
+    user_products = defaultdict(list)
+    for item in items:
+        user_products[item["PK"].split("#", 1)[-1]].append(item)
+    for products in user_products.values():
+        products.sort(key=lambda product: product["SK"])
+    return dict(user_products)
+
+
+def generate_synthetic_user_products(users: int, products_per_user: int) -> dict:
+    """
+    Function to generate fake users and products (only for local benchmarks).
+    """
+    return {
+        f"57300{index:07d}": [
+            {
+                "PK": f"USER#57300{index:07d}",
+                "SK": f"PRODUCT#{product:02d}",
+                "details": "Visa Card",
+                "last_digits": f"{(index + product) % 10000:04d}",
+                "product_name": "Debit Card",
+                "status": "ACTIVE",
+            }
+            for product in range(1, products_per_user + 1)
+        ]
+        for index in range(users)
+    }
+
+
+def render_user_certificate(user_and_products: tuple) -> tuple:
+    """
+    Function executed in the worker processes to render the certificate of a user.
+
+    :param user_and_products (tuple): User ID and its list of products.
+    :returns: tuple of user ID, certificate hash and PDF bytes.
+    """
+    user_id, products = user_and_products
+    certificate_hash = get_certificate_hash(products, LOCATION)
+    pdf_content = render_certificate_pdf(
+        products, LOCATION, certificate_hash=certificate_hash
+    )
+    return user_id, certificate_hash, pdf_content
+
+
+class CertificateBatchJob:
+    """
+    Batch job that renders the certificates in a process pool (sized to the
+    cores) and uploads them concurrently while the rendering continues. Only a
+    bounded window of renders and uploads is in flight (memory doesn't grow
+    with the amount of users). The completed users are saved in a checkpoint
+    file, so the job can be resumed.
+    """
+
+    def __init__(
+        self,
+        bucket_name: Optional[str] = None,
+        local_output_dir: Optional[str] = None,
+        prefix: str = "certificates/batch",
+        checkpoint_file: Optional[str] = None,
+        processes: Optional[int] = None,
+        upload_threads: int = 16,
+    ) -> None:
+        """
+        :param bucket_name (Optional(str)): S3 bucket for the certificates.
+        :param local_output_dir (Optional(str)): Folder to save the certificates
+            instead of S3 (local mode).
+        :param prefix (str): Prefix (S3 key or sub-folder) for the certificates.
+        :param checkpoint_file (Optional(str)): File to save the completed users.
+        :param processes (Optional(int)): Rendering processes (defaults to the cores).
+        :param upload_threads (int): Concurrent uploads.
+        """
+        if not bucket_name and not local_output_dir:
+            raise ValueError("A bucket name or a local output dir is required.")
+        self.bucket_name = bucket_name
+        self.local_output_dir = local_output_dir
+        self.prefix = prefix.strip("/")
+        self.checkpoint_file = checkpoint_file
+        self.processes = processes or os.cpu_count() or 1
+        self.upload_threads = upload_threads
+        self.s3_client = None
+        if not local_output_dir:
+            import boto3
+
+            self.s3_client = boto3.client("s3")
+
+    def load_checkpoint(self) -> set:
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return set()
+        with open(self.checkpoint_file) as checkpoint:
+            return {json.loads(line)["user_id"] for line in checkpoint if line.strip()}
+
+    def save(self, user_id: str, certificate_hash: str, pdf_content: bytes) -> str:
+        object_name = f"{self.prefix}/{user_id}/rufus_certificate.pdf"
+        if self.local_output_dir:
+            output_file = os.path.join(self.local_output_dir, object_name)
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            with open(output_file, "wb") as pdf_file:
+                pdf_file.write(pdf_content)
+            return output_file
+
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=object_name,
+            Body=pdf_content,
+            ContentType="application/pdf",
+            Metadata={"certificate-hash": certificate_hash},
+        )
+        return f"s3://{self.bucket_name}/{object_name}"
+
+    def run(self, user_products: dict) -> dict:
+        """
+        Method to generate the certificates of all the given users.
+
+        :param user_products (dict): User ID to its list of products.
+        :returns: dict with the job statistics.
+        """
+        completed = self.load_checkpoint()
+        pending = [
+            (user_id, products)
+            for user_id, products in sorted(user_products.items())
+            if user_id not in completed
+        ]
+        logger.info(
+            f"Generating {len(pending)} certificates ({len(completed)} already "
+            f"completed) with {self.processes} processes"
+        )
+
+        started_at = time.monotonic()
+        stats = {"users": len(pending), "skipped": len(completed), "failed": 0}
+        checkpoint = open(self.checkpoint_file, "a") if self.checkpoint_file else None
+        checkpoint_lock = threading.Lock()
+
+        # Rendered PDFs waiting for (or being) uploaded are bounded as well
+        upload_slots = threading.BoundedSemaphore(self.upload_threads * 2)
+
+        def save_and_checkpoint(user_id, certificate_hash, pdf_content) -> None:
+            try:
+                location = self.save(user_id, certificate_hash, pdf_content)
+            except Exception:
+                logger.exception(f"Certificate upload failed for {user_id}")
+                with checkpoint_lock:
+                    stats["failed"] += 1
+                return
+            if checkpoint:
+                # Progress is saved as soon as each upload finishes (to resume)
+                record = {
+                    "user_id": user_id,
+                    "certificate_hash": certificate_hash,
+                    "location": location,
+                }
+                with checkpoint_lock:
+                    checkpoint.write(json.dumps(record) + "\n")
+                    checkpoint.flush()
+
+        def upload_rendered(render_future, user_id, upload_pool) -> None:
+            try:
+                rendered = render_future.result()
+            except Exception:
+                # A single broken user must not stop the whole job
+                logger.exception(f"Certificate rendering failed for {user_id}")
+                with checkpoint_lock:
+                    stats["failed"] += 1
+                return
+            upload_slots.acquire()
+            upload_future = upload_pool.submit(save_and_checkpoint, *rendered)
+            upload_future.add_done_callback(lambda _: upload_slots.release())
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.processes
+            ) as process_pool, ThreadPoolExecutor(
+                max_workers=self.upload_threads
+            ) as upload_pool:
+                max_in_flight_renders = self.processes * 4
+                in_flight_renders = {}
+                # Uploads start while the next certificates are still rendering
+                for user_id, products in pending:
+                    if len(in_flight_renders) >= max_in_flight_renders:
+                        done, _ = wait(in_flight_renders, return_when=FIRST_COMPLETED)
+                        for render_future in done:
+                            upload_rendered(
+                                render_future,
+                                in_flight_renders.pop(render_future),
+                                upload_pool,
+                            )
+                    render_future = process_pool.submit(
+                        render_user_certificate, (user_id, products)
+                    )
+                    in_flight_renders[render_future] = user_id
+
+                for render_future in as_completed(in_flight_renders):
+                    upload_rendered(
+                        render_future, in_flight_renders[render_future], upload_pool
+                    )
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
+        stats["elapsed_seconds"] = round(time.monotonic() - started_at, 3)
+        stats["certificates_per_second"] = round(
+            (stats["users"] - stats["failed"]) / max(stats["elapsed_seconds"], 1e-9), 2
+        )
+        return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch job for user certificates")
+    parser.add_argument("--table-name", default=os.environ.get("TABLE_NAME"))
+    parser.add_argument("--bucket-name", default=os.environ.get("BUCKET_NAME"))
+    parser.add_argument("--local-output-dir", help="Save to disk instead of S3")
+    parser.add_argument(
+        "--prefix", default=f"certificates/batch/{datetime.now().strftime('%Y')}"
+    )
+    parser.add_argument(
+        "--checkpoint-file",
+        help="Completed users (defaults to one file per output and prefix, and to "
+        "none for synthetic users)",
+    )
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--upload-threads", type=int, default=16)
+    parser.add_argument("--scan-segments", type=int, default=8)
+    parser.add_argument(
+        "--synthetic-users",
+        type=int,
+        default=0,
+        help="Use fake users instead of DynamoDB (for local benchmarks)",
+    )
+    parser.add_argument("--synthetic-products-per-user", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.synthetic_users:
+        user_products = generate_synthetic_user_products(
+            args.synthetic_users, args.synthetic_products_per_user
+        )
+    else:
+        user_products = load_user_products(args.table_name, args.scan_segments)
+
+        # Keyed to the output and prefix (e.g. year), so other runs are not skipped
+        if not args.checkpoint_file:
+            output = args.local_output_dir or args.bucket_name
+            args.checkpoint_file = "certificates_checkpoint_{}.jsonl".format(
+                re.sub(r"[^A-Za-z0-9.-]+", "_", f"{output}/{args.prefix}").strip("_")
+            )
+            logger.info(f"Using checkpoint file {args.checkpoint_file}")
+
+    job = CertificateBatchJob(
+        bucket_name=args.bucket_name,
+        local_output_dir=args.local_output_dir,
+        prefix=args.prefix,
+        checkpoint_file=args.checkpoint_file,
+        processes=args.processes,
+        upload_threads=args.upload_threads,
+    )
+    print(json.dumps(job.run(user_products), indent=2))
+
+
+if __name__ == "__main__":
+    main()
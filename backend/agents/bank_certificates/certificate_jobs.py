@@ -0,0 +1,205 @@
+# Built-in imports
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Optional
+
+# External imports
+import boto3
+
+# Own imports
+from common.logger import custom_logger
+from agents.dispatcher import get_dynamodb_helper
+from state_machine.integrations.meta.api_requests import MetaAPI
+from agents.bank_certificates.generate_certificates import (
+    PARALLEL_RENDER_MIN_PRODUCTS,
+    get_certificate_hash,
+    render_certificate_pdf,
+    render_certificate_pdf_parallel,
+)
+from agents.bank_certificates.s3_helper import get_or_upload_pdf_to_s3
+
+
+TABLE_NAME = os.environ["TABLE_NAME"]  # Mandatory to pass table name as env var
+BUCKET_NAME = os.environ["BUCKET_NAME"]  # Mandatory to pass table name as env var
+
+# When not configured, the certificates are delivered synchronously
+CERTIFICATE_JOBS_QUEUE_URL = os.environ.get("CERTIFICATE_JOBS_QUEUE_URL")
+
+# Duplicated requests for the same products are collapsed during this window
+CERTIFICATE_JOB_TTL_SECONDS = int(os.environ.get("CERTIFICATE_JOB_TTL_SECONDS", "900"))
+
+# Receives before SQS moves a job to the DLQ (the "max_receive_count" of the queue)
+CERTIFICATE_JOB_MAX_RECEIVE_COUNT = int(
+    os.environ.get("CERTIFICATE_JOB_MAX_RECEIVE_COUNT", "3")
+)
+
+CERTIFICATE_LOCATION = "Medellin, Colombia"
+
+
+logger = custom_logger()
+dynamodb_helper = get_dynamodb_helper(TABLE_NAME)
+sqs_client = boto3.client("sqs")
+
+
+def get_user_products(user_id: str) -> list:
+    """
+    Function to obtain all the products of a user.
+
+    :param user_id (str): User ID (the phone number for now).
+    """
+    return dynamodb_helper.query_by_pk_and_sk_begins_with(
+        partition_key=f"USER#{user_id}",
+        sort_key_portion="PRODUCT#",
+    )
+
+
+def enqueue_certificate_job(user_id: str, to_phone_number: str) -> bool:
+    """
+    Function to enqueue a certificate job for the worker. The job is idempotent
+    per user and product set: duplicated requests (while the previous job is
+    still pending) are not enqueued again. Once delivered (or failed), a new
+    request sends the certificate again (cheap, the media ID is cached).
+
+    :param user_id (str): User ID to generate the certificate for.
+    :param to_phone_number (str): Phone number to send the certificate to.
+    :returns: True if a new job was enqueued, False if it was a duplicate.
+    """
+    certificate_hash = get_certificate_hash(
+        get_user_products(user_id), CERTIFICATE_LOCATION
+    )
+    now = int(time.time())
+    job_created = dynamodb_helper.put_item_if_not_exists(
+        {
+            "PK": f"USER#{user_id}",
+            "SK": f"CERTJOB#{certificate_hash}",
+            "status": "PENDING",
+            "to_phone_number": to_phone_number,
+            "created_at": now,
+            "ttl": now + CERTIFICATE_JOB_TTL_SECONDS,
+        },
+        # Only a pending (and not expired) job absorbs the repeated requests
+        condition_expression="attribute_not_exists(PK) OR #status <> :pending OR #ttl < :now",
+        expression_attribute_names={"#status": "status", "#ttl": "ttl"},
+        expression_attribute_values={":pending": "PENDING", ":now": now},
+    )
+    if not job_created:
+        logger.info(f"Certificate job {certificate_hash} already in progress")
+        return False
+
+    sqs_client.send_message(
+        QueueUrl=CERTIFICATE_JOBS_QUEUE_URL,
+        MessageBody=json.dumps(
+            {
+                "user_id": user_id,
+                "to_phone_number": to_phone_number,
+                "certificate_hash": certificate_hash,
+            }
+        ),
+    )
+    logger.info(f"Certificate job {certificate_hash} enqueued")
+    return True
+
+
+def mark_certificate_job(
+    user_id: str, certificate_hash: str, status: str, attributes: Optional[dict] = None
+) -> None:
+    """
+    Function to update the status of a certificate job. While the job is still
+    being retried ("PENDING"), its TTL is extended so it keeps absorbing the
+    repeated requests.
+
+    :param user_id (str): User ID of the job.
+    :param certificate_hash (str): Hash of the certificate contents of the job.
+    :param status (str): New status ("PENDING", "DELIVERED" or "FAILED").
+    :param attributes (Optional(dict)): Additional attributes to set.
+    """
+    now = int(time.time())
+    job_attributes = {"status": status, "updated_at": now, **(attributes or {})}
+    if status == "PENDING":
+        job_attributes["ttl"] = now + CERTIFICATE_JOB_TTL_SECONDS
+    dynamodb_helper.update_item_attributes(
+        partition_key=f"USER#{user_id}",
+        sort_key=f"CERTJOB#{certificate_hash}",
+        attributes=job_attributes,
+    )
+
+
+def deliver_certificate(
+    user_id: str, to_phone_number: str, expected_certificate_hash: Optional[str] = None
+) -> str:
+    """
+    Function to render, upload and send the certificate of a user via WhatsApp.
+
+    :param user_id (str): User ID to generate the certificate for.
+    :param to_phone_number (str): Phone number to send the certificate to.
+    :param expected_certificate_hash (Optional(str)): Hash computed when the job
+        was enqueued (only used to log when the products changed since then).
+    :returns: Hash of the delivered certificate contents.
+    """
+    all_user_products = get_user_products(user_id)
+    logger.debug(f"all_user_products: {all_user_products}")
+
+    # Same products produce the same certificate (reused instead of rendered again)
+    certificate_hash = get_certificate_hash(all_user_products, CERTIFICATE_LOCATION)
+    logger.debug(f"certificate_hash: {certificate_hash}")
+    if expected_certificate_hash and certificate_hash != expected_certificate_hash:
+        # The latest products are delivered, as the old ones are not stored
+        logger.warning(
+            f"Products changed since the job {expected_certificate_hash} was "
+            f"enqueued, delivering certificate {certificate_hash} instead"
+        )
+
+    @lru_cache(maxsize=1)
+    def render_pdf() -> bytes:
+        # Render the PDF file in memory (only when it's not already available)
+        render_function = (
+            render_certificate_pdf_parallel
+            if len(all_user_products) >= PARALLEL_RENDER_MIN_PRODUCTS
+            else render_certificate_pdf
+        )
+        return render_function(
+            product_list=all_user_products,
+            location=CERTIFICATE_LOCATION,
+            certificate_hash=certificate_hash,
+        )
+
+    # Send the Certificate via Meta API (uploaded once, then reused by content hash)
+    meta_api = MetaAPI(logger)
+    certificate_url = None
+    try:
+        media_id = meta_api.get_cached_media_id(certificate_hash)
+        if not media_id:
+            media_id = meta_api.get_or_upload_media(
+                content=render_pdf(),
+                mime_type="application/pdf",
+                filename="Rufus_Bank_Certificate.pdf",
+                content_hash=certificate_hash,
+            )
+    except Exception as error:
+        logger.warning(f"Meta media upload failed, using S3 link instead: {error}")
+        media_id = None
+
+        # Content-addressed S3 object with a public URL for 10 mins
+        certificate_url = get_or_upload_pdf_to_s3(
+            bucket_name=BUCKET_NAME,
+            object_name=f"certificates/{certificate_hash}/rufus_certificate.pdf",
+            render_pdf=render_pdf,
+        )
+
+    response = meta_api.post_document_message(
+        document_url=certificate_url,
+        to_phone_number=to_phone_number,
+        media_id=media_id,
+    )
+
+    logger.debug(
+        response,
+        message_details="POST WhatsApp Message Meta API Response",
+    )
+    if "error" in response:
+        raise Exception("Error in POST WhatsApp Document Meta API Response")
+
+    logger.info(f"Certificate sent with: {media_id or certificate_url}")
+    return certificate_hash
@@ -1,7 +1,13 @@
 # Built-in imports
+import hashlib
+import io
+import json
+import math
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 
 # External imports
 from fpdf import FPDF
@@ -15,57 +21,116 @@ logger = custom_logger()
 QR_WEBSITE = os.environ.get("QR_WEBSITE", "https://san99tiago.com")
 LOCATION = os.environ.get("LOCATION", "Medellín, Colombia")
 
+# Certificates with at least this amount of products are rendered in parallel
+PARALLEL_RENDER_MIN_PRODUCTS = int(os.environ.get("PARALLEL_RENDER_MIN_PRODUCTS", "50"))
+PARALLEL_RENDER_CHUNK_SIZE = int(os.environ.get("PARALLEL_RENDER_CHUNK_SIZE", "25"))
 
-def generate_certificate_pdf(product_list, location=LOCATION, output_path="/tmp"):
+
+class PDF(FPDF):
+    # Pages before this PDF (when it is a chunk of a bigger certificate)
+    page_offset = 0
+
+    def header(self):
+        self.set_font("Arial", "B", 14)
+        self.cell(0, 10, "RUFUS BANK CERTIFICATE", border=False, ln=True, align="C")
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Arial", "I", 8)
+        self.cell(0, 10, f"Page {self.page_no() + self.page_offset}", align="C")
+
+
+@lru_cache(maxsize=8)
+def get_qr_png(qr_data: str = QR_WEBSITE) -> bytes:
     """
-    Function to generate a PDF certificate for a list of products.
+    Function to generate the PNG of a QR code (only once per process and data).
+
+    Args:
+        qr_data (str): Data to encode in the QR code.
+
+    Returns:
+        bytes: PNG image of the QR code.
+    """
+    logger.info("Generating QR code image")
+    buffer = io.BytesIO()
+    qrcode.make(qr_data).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def clean_product_data(product):
+    """
+    Function to clean the product data for the certificate table.
+    """
+    cleaned = {}
+    for key, value in product.items():
+        if key == "PK":
+            cleaned["User"] = value.split("#")[-1]  # Extract text after #
+        elif key == "SK":
+            continue  # Skip SK
+        else:
+            cleaned[key] = value
+    return cleaned
+
+
+def get_certificate_hash(product_list, location=LOCATION):
+    """
+    Function to obtain a stable hash of the certificate contents (it doesn't
+    depend on the order of the products nor on the order of their attributes).
 
     Args:
         product_list (list): List of products to generate the certificate for.
         location (str): Location to be included in the certificate.
-        output_path (str): Path to save the generated PDF certificate.
 
     Returns:
-        str: Path to the generated PDF certificate.
+        str: sha256 (hex) of the normalized products and location.
+    """
+    normalized_products = sorted(
+        json.dumps(clean_product_data(product), sort_keys=True, default=str)
+        for product in product_list
+    )
+    normalized = json.dumps({"location": location, "products": normalized_products})
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def render_certificate_pdf(
+    product_list,
+    location=LOCATION,
+    certificate_hash=None,
+    page_offset=0,
+    generated_at=None,
+):
+    """
+    Function to render a PDF certificate for a list of products in memory.
+
+    Args:
+        product_list (list): List of products to generate the certificate for.
+        location (str): Location to be included in the certificate.
+        certificate_hash (str): Optional hash of the contents (see <get_certificate_hash>)
+            to derive stable UUIDs for the same products.
+        page_offset (int): Pages before these products (when rendering a chunk).
+        generated_at (str): Generation time to show (defaults to now).
+
+    Returns:
+        bytes: Content of the generated PDF certificate.
     """
 
     logger.info(f"Generating PDF certificate for {len(product_list)} products")
     logger.debug(f"Products list: {product_list}")
 
-    class PDF(FPDF):
-        def header(self):
-            self.set_font("Arial", "B", 14)
-            self.cell(0, 10, "RUFUS BANK CERTIFICATE", border=False, ln=True, align="C")
-            self.ln(10)
-
-        def footer(self):
-            self.set_y(-15)
-            self.set_font("Arial", "I", 8)
-            self.cell(0, 10, f"Page {self.page_no()}", align="C")
-
-    # Helper function to clean product data
-    logger.info("Cleaning product data")
-
-    def clean_product_data(product):
-        cleaned = {}
-        for key, value in product.items():
-            if key == "PK":
-                cleaned["User"] = value.split("#")[-1]  # Extract text after #
-            elif key == "SK":
-                continue  # Skip SK
-            else:
-                cleaned[key] = value
-        return cleaned
-
     # Create a PDF instance
     pdf = PDF()
+    pdf.page_offset = page_offset
     pdf.set_auto_page_break(auto=True, margin=15)
 
     # Add subtitle (generated time and location)
-    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    generated_at = generated_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     subtitle = f"Generated at: {generated_at}, Location: {location}"
 
-    for product in product_list:
+    # Same QR image for all the pages (embedded only once in the PDF)
+    qr_png = get_qr_png(QR_WEBSITE)
+
+    for index, product in enumerate(product_list, start=page_offset):
         # Clean product data
         product_cleaned = clean_product_data(product)
 
@@ -86,27 +151,106 @@ def generate_certificate_pdf(product_list, location=LOCATION, output_path="/tmp"
             pdf.cell(col_width, row_height, str(value), border=1, ln=True)
         pdf.ln(10)
 
-        # Generate QR Code
-        qr_data = QR_WEBSITE
-        qr_img = qrcode.make(qr_data)
-        qr_filename = f"/tmp/{uuid.uuid4()}.png"
-        qr_img.save(qr_filename)
-
         # Add QR Code to PDF
-        pdf.image(qr_filename, x=10, y=pdf.get_y(), w=50)
+        pdf.image(io.BytesIO(qr_png), x=10, y=pdf.get_y(), w=50)
         pdf.ln(55)  # Adjust line height after QR code
 
         # Add UUID
-        unique_id = str(uuid.uuid4())
+        unique_id = str(
+            uuid.uuid5(uuid.NAMESPACE_URL, f"{certificate_hash}/{index}")
+            if certificate_hash
+            else uuid.uuid4()
+        )
         pdf.cell(0, 10, f"UUID: {unique_id}", ln=True)
 
-        # Remove temporary QR image
-        os.remove(qr_filename)
+    return bytes(pdf.output())
+
+
+def _render_chunk(chunk_arguments: tuple) -> bytes:
+    # Executed in the worker processes (must be a module-level function)
+    return render_certificate_pdf(*chunk_arguments)
+
+
+def render_certificate_pdf_parallel(
+    product_list,
+    location=LOCATION,
+    certificate_hash=None,
+    chunk_size=PARALLEL_RENDER_CHUNK_SIZE,
+    max_workers=None,
+):
+    """
+    Function to render a PDF certificate by building chunks of pages in parallel
+    worker processes and merging them into one PDF. Small certificates (or
+    environments without process pools, such as AWS Lambda) are rendered serially.
+
+    Args:
+        product_list (list): List of products to generate the certificate for.
+        location (str): Location to be included in the certificate.
+        certificate_hash (str): Optional hash of the contents (see <get_certificate_hash>).
+        chunk_size (int): Minimum amount of products (pages) rendered by each worker.
+        max_workers (int): Amount of worker processes (defaults to the cores).
+
+    Returns:
+        bytes: Content of the generated PDF certificate.
+    """
+    # One chunk per worker at most (every extra chunk adds merge overhead)
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = max(chunk_size, math.ceil(len(product_list) / max_workers))
+    if len(product_list) <= chunk_size:
+        return render_certificate_pdf(product_list, location, certificate_hash)
+
+    # Same generation time in all the chunks
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    chunks = [
+        (
+            product_list[start : start + chunk_size],
+            location,
+            certificate_hash,
+            start,
+            generated_at,
+        )
+        for start in range(0, len(product_list), chunk_size)
+    ]
+    logger.info(f"Rendering PDF certificate in {len(chunks)} parallel chunks")
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rendered_chunks = list(executor.map(_render_chunk, chunks))
+    except (OSError, NotImplementedError) as error:
+        # E.g. AWS Lambda doesn't support the semaphores that process pools need
+        logger.warning(f"Process pool not available, rendering serially: {error}")
+        return render_certificate_pdf(product_list, location, certificate_hash)
+
+    # Only required for the parallel rendering
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for rendered_chunk in rendered_chunks:
+        writer.append(PdfReader(io.BytesIO(rendered_chunk)))
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def generate_certificate_pdf(product_list, location=LOCATION, output_path="/tmp"):
+    """
+    Function to generate a PDF certificate for a list of products and save it.
+
+    Args:
+        product_list (list): List of products to generate the certificate for.
+        location (str): Location to be included in the certificate.
+        output_path (str): Path to save the generated PDF certificate.
+
+    Returns:
+        str: Path to the generated PDF certificate.
+    """
+    pdf_content = render_certificate_pdf(product_list, location)
 
     # Save the PDF
     os.makedirs(output_path, exist_ok=True)
     output_file = os.path.join(output_path, "rufus_certificate.pdf")
-    pdf.output(output_file)
+    with open(output_file, "wb") as pdf_file:
+        pdf_file.write(pdf_content)
     logger.info(f"Successfully saved PDF file to {output_file}")
 
     return output_file
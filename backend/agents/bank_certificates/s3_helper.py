@@ -1,5 +1,8 @@
 import os
+import threading
+import time
 import boto3
+from botocore.exceptions import ClientError
 
 # Own imports
 from common.logger import custom_logger
@@ -8,6 +11,12 @@ from common.logger import custom_logger
 logger = custom_logger()
 s3_client = boto3.client("s3")
 
+# Pre-signed URLs are reused until this many seconds before they expire
+PRESIGNED_URL_MIN_REMAINING_SECONDS = 120
+
+_presigned_urls = {}
+_presigned_urls_lock = threading.Lock()
+
 
 def upload_pdf_to_s3(bucket_name, file_path, object_name=None, expiration=600) -> str:
     """
@@ -43,6 +52,82 @@ def upload_pdf_to_s3(bucket_name, file_path, object_name=None, expiration=600) -
         return f"An unexpected error occurred: {e}"
 
 
+def object_exists(bucket_name, object_name) -> bool:
+    """
+    Checks if an object exists in an S3 bucket.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_name: The S3 object name.
+    """
+    try:
+        s3_client.head_object(Bucket=bucket_name, Key=object_name)
+        return True
+    except ClientError as error:
+        if error.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise error
+
+
+def get_presigned_url(bucket_name, object_name, expiration=600) -> str:
+    """
+    Generates a temporary public URL for an S3 object, reusing the previous one
+    for the same object while it is not close to its expiration.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_name: The S3 object name.
+    :param expiration: Time in seconds for the pre-signed URL to remain valid.
+    """
+    now = time.time()
+    with _presigned_urls_lock:
+        presigned_url, expires_at = _presigned_urls.get(
+            (bucket_name, object_name), (None, 0)
+        )
+    if presigned_url and expires_at - now > PRESIGNED_URL_MIN_REMAINING_SECONDS:
+        return presigned_url
+
+    presigned_url = s3_client.generate_presigned_url(
+        "get_object",
+        Params={"Bucket": bucket_name, "Key": object_name},
+        ExpiresIn=expiration,
+    )
+    with _presigned_urls_lock:
+        _presigned_urls[(bucket_name, object_name)] = (presigned_url, now + expiration)
+    return presigned_url
+
+
+def get_or_upload_pdf_to_s3(
+    bucket_name, object_name, render_pdf, expiration=600
+) -> str:
+    """
+    Uploads a PDF to a content-addressed S3 key only when it doesn't exist yet
+    (the PDF is only rendered in that case) and generates a temporary public URL.
+
+    :param bucket_name: The name of the S3 bucket.
+    :param object_name: The S3 object name (must be derived from the content).
+    :param render_pdf: Function without parameters that returns the PDF bytes.
+    :param expiration: Time in seconds for the pre-signed URL to remain valid.
+    :return: The pre-signed URL or an error message.
+    """
+    try:
+        with _presigned_urls_lock:
+            already_signed = (bucket_name, object_name) in _presigned_urls
+        if already_signed or object_exists(bucket_name, object_name):
+            logger.info(f"Reusing existing object {bucket_name}/{object_name}")
+        else:
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=object_name,
+                Body=render_pdf(),
+                ContentType="application/pdf",
+            )
+            logger.info(f"File uploaded successfully to {bucket_name}/{object_name}")
+
+        return get_presigned_url(bucket_name, object_name, expiration)
+
+    except Exception as e:
+        return f"An unexpected error occurred: {e}"
+
+
 # Local tests/validations
 if __name__ == "__main__":
 
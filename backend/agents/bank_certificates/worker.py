@@ -0,0 +1,58 @@
+# Built-in imports
+import json
+
+# Own imports
+from common.logger import custom_logger
+from agents.bank_certificates.certificate_jobs import (
+    CERTIFICATE_JOB_MAX_RECEIVE_COUNT,
+    deliver_certificate,
+    mark_certificate_job,
+)
+
+
+logger = custom_logger()
+
+
+def lambda_handler(event, context):
+    """
+    Worker for the certificate jobs (SQS). Failed messages are reported back as
+    "batchItemFailures", so only those are retried by SQS. The jobs stay
+    "PENDING" while SQS retries them, and are only marked as "FAILED" on their
+    last receive (afterwards SQS moves them to the DLQ).
+    """
+    batch_item_failures = []
+    for record in event.get("Records", []):
+        job = json.loads(record["body"])
+        logger.append_keys(certificate_hash=job.get("certificate_hash"))
+        logger.info(job, message_details="Processing certificate job")
+
+        attributes = {}
+        try:
+            delivered_certificate_hash = deliver_certificate(
+                user_id=job["user_id"],
+                to_phone_number=job["to_phone_number"],
+                expected_certificate_hash=job["certificate_hash"],
+            )
+            status = "DELIVERED"
+            attributes["delivered_certificate_hash"] = delivered_certificate_hash
+        except Exception:
+            logger.exception("Certificate job failed")
+            batch_item_failures.append({"itemIdentifier": record["messageId"]})
+            receive_count = int(
+                record.get("attributes", {}).get("ApproximateReceiveCount", 1)
+            )
+            status = (
+                "FAILED"
+                if receive_count >= CERTIFICATE_JOB_MAX_RECEIVE_COUNT
+                else "PENDING"
+            )
+
+        try:
+            # The job item is keyed by the hash computed when it was enqueued
+            mark_certificate_job(
+                job["user_id"], job["certificate_hash"], status, attributes
+            )
+        except Exception:
+            logger.exception("Could not update the certificate job status")
+
+    return {"batchItemFailures": batch_item_failures}
@@ -0,0 +1,134 @@
+# Built-in imports
+from functools import lru_cache
+from typing import Callable, Optional
+
+# Own imports
+from common.logger import custom_logger
+from common.helpers.dynamodb_helper import DynamoDBHelper
+from agents.response_formatter import format_response
+
+
+logger = custom_logger()
+
+# Registry of (action group, function) to their handlers and response options
+_ACTION_GROUP_HANDLERS = {}
+
+
+def normalize_name(name: Optional[str]) -> Optional[str]:
+    """
+    Function to normalize the action group/function names (the agents sometimes
+    send them wrapped as "<Name>").
+    """
+    return name.strip().strip("<>").strip() if name else name
+
+
+def action_group(
+    name: str,
+    function: Optional[str] = None,
+    response_fields: Optional[list] = None,
+    response_style: str = "json",
+) -> Callable:
+    """
+    Decorator to register a handler for an action group (and optionally for a
+    single function of it). The handler receives the list of parameters of the
+    event and returns the results for the agent.
+
+    :param name (str): Action group name.
+    :param function (Optional(str)): Function name (None for all of them).
+    :param response_fields (Optional(list)): Fields of the results for the agent.
+    :param response_style (str): "json" or "table" (see <format_response>).
+    """
+
+    def decorator(handler: Callable) -> Callable:
+        key = (normalize_name(name), normalize_name(function))
+        if key in _ACTION_GROUP_HANDLERS:
+            raise ValueError(f"Action Group <{name}> ({function}) already registered.")
+        _ACTION_GROUP_HANDLERS[key] = (
+            handler,
+            {"fields": response_fields, "style": response_style},
+        )
+        return handler
+
+    return decorator
+
+
+def get_handler(action_group_name: str, function: Optional[str]) -> tuple:
+    """
+    Function to obtain the handler (and its response options) for an action
+    group and function.
+    """
+    action_group_name = normalize_name(action_group_name)
+    registered = _ACTION_GROUP_HANDLERS.get(
+        (action_group_name, normalize_name(function))
+    ) or _ACTION_GROUP_HANDLERS.get((action_group_name, None))
+    if registered is None:
+        raise ValueError(f"Action Group <{action_group_name}> not supported.")
+    return registered
+
+
+def get_parameter(parameters: list, name: str, default=None):
+    """
+    Function to obtain the value of a parameter sent by the agent.
+    """
+    for param in parameters or []:
+        if param["name"] == name:
+            return param["value"]
+    return default
+
+
+@lru_cache(maxsize=None)
+def get_dynamodb_helper(table_name: str) -> DynamoDBHelper:
+    """
+    Function to obtain a DynamoDB helper shared by all the action groups.
+    """
+    return DynamoDBHelper(table_name=table_name)
+
+
+def build_response(
+    event: dict, results, response_options: Optional[dict] = None
+) -> dict:
+    """
+    Function to build the response for the Bedrock agent.
+
+    :param event (dict): Event received from the Bedrock agent.
+    :param results: Results of the action group handler.
+    :param response_options (Optional(dict)): Options for <format_response>.
+    """
+    # Compact serialization of the results (fewer tokens for the agent)
+    page = str(get_parameter(event.get("parameters", []), "page", 1))
+    page = int(page) if page.isdigit() else 1
+    response_body = {
+        "TEXT": {
+            "body": format_response(results, page=page, **(response_options or {}))
+        }
+    }
+
+    action_response = {
+        "actionGroup": event["actionGroup"],
+        "function": event["function"],
+        "functionResponse": {"responseBody": response_body},
+    }
+
+    return {
+        "response": action_response,
+        "messageVersion": event["messageVersion"],
+    }
+
+
+def dispatch(event: dict) -> dict:
+    """
+    Function to run the registered handler for an action group event.
+
+    :param event (dict): Event received from the Bedrock agent.
+    """
+    action_group_name = event["actionGroup"]
+    parameters = event.get("parameters", [])
+
+    logger.info(f"PARAMETERS ARE: {parameters}")
+    logger.info(f"ACTION GROUP IS: {action_group_name}")
+
+    handler, response_options = get_handler(action_group_name, event.get("function"))
+    function_response = build_response(event, handler(parameters), response_options)
+    logger.info("Response: {}".format(function_response))
+
+    return function_response
@@ -0,0 +1,14 @@
+# Single Lambda Function for all the action groups (shares warm capacity and caches)
+
+# Own imports
+from agents.dispatcher import dispatch
+
+# Imported to register their action groups in the dispatcher
+import agents.bank_certificates.lambda_function  # noqa: F401
+import agents.bank_rewards.lambda_function  # noqa: F401
+import agents.crud_user_products.lambda_function  # noqa: F401
+import agents.market_insights.lambda_function  # noqa: F401
+
+
+def lambda_handler(event, context):
+    return dispatch(event)
@@ -4,15 +4,19 @@ import os
 
 # Own imports
 from common.logger import custom_logger
-from common.helpers.dynamodb_helper import DynamoDBHelper
+from agents.dispatcher import action_group, dispatch, get_dynamodb_helper
 
 
 TABLE_NAME = os.environ["TABLE_NAME"]  # Mandatory to pass table name as env var
 
 logger = custom_logger()
-dynamodb_helper = DynamoDBHelper(table_name=TABLE_NAME)
+dynamodb_helper = get_dynamodb_helper(TABLE_NAME)
 
 
+@action_group(
+    "FetchMarketInsights",
+    response_fields=["advice", "products_list"],
+)
 def action_group_fetch_market_insights(parameters):
     # Extract risk_level from parameters
     risk_level = "MODERATE"  # Default risk level
@@ -32,32 +36,4 @@ def action_group_fetch_market_insights(parameters):
 
 
 def lambda_handler(event, context):
-    action_group = event["actionGroup"]
-    _function = event["function"]
-    parameters = event.get("parameters", [])
-
-    logger.info(f"PARAMETERS ARE: {parameters}")
-    logger.info(f"ACTION GROUP IS: {action_group}")
-
-    # TODO: enhance this If-Statement approach to a dynamic one...
-    if action_group == "FetchMarketInsights":
-        results = action_group_fetch_market_insights(parameters)
-    else:
-        raise ValueError(f"Action Group <{action_group}> not supported.")
-
-    # Convert the list of events to a string to be able to return it in the response as a string
-    response_body = {"TEXT": {"body": str(results)}}
-
-    action_response = {
-        "actionGroup": action_group,
-        "function": _function,
-        "functionResponse": {"responseBody": response_body},
-    }
-
-    function_response = {
-        "response": action_response,
-        "messageVersion": event["messageVersion"],
-    }
-    logger.info("Response: {}".format(function_response))
-
-    return function_response
+    return dispatch(event)
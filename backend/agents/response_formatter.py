@@ -0,0 +1,135 @@
+# Built-in imports
+import json
+import os
+from decimal import Decimal
+from typing import Optional
+
+
+# Maximum characters for each action group response (read by the agent on every call)
+AGENT_RESPONSE_MAX_CHARS = int(os.environ.get("AGENT_RESPONSE_MAX_CHARS", "1500"))
+
+# Values longer than this are truncated (e.g. long descriptions)
+AGENT_RESPONSE_MAX_VALUE_CHARS = int(
+    os.environ.get("AGENT_RESPONSE_MAX_VALUE_CHARS", "200")
+)
+
+# Smallest limit for the values when shrinking an item that exceeds the budget
+_MIN_VALUE_CHARS = 8
+
+# Single-table-design keys are never useful for the agent
+_INTERNAL_FIELDS = {"PK", "SK", "ttl"}
+
+
+def to_plain(value, max_value_chars: int = AGENT_RESPONSE_MAX_VALUE_CHARS):
+    """
+    Function to convert DynamoDB values (e.g. Decimal or sets) to plain JSON values.
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {key: to_plain(item, max_value_chars) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_plain(item, max_value_chars) for item in value]
+    if isinstance(value, str) and len(value) > max_value_chars:
+        return value[: max_value_chars - 3] + "..."
+    return value
+
+
+def project(items: list, fields: Optional[list] = None) -> list:
+    """
+    Function to keep only the given fields of the items (in that order). Without
+    fields, all the attributes except the internal keys (PK/SK/ttl) are kept.
+    """
+    projected = []
+    for item in items:
+        if fields:
+            projected.append({field: to_plain(item.get(field)) for field in fields})
+        else:
+            projected.append(
+                {
+                    key: to_plain(value)
+                    for key, value in sorted(item.items())
+                    if key not in _INTERNAL_FIELDS
+                }
+            )
+    return projected
+
+
+def _render(items: list, style: str) -> str:
+    if style == "table":
+        columns = list(dict.fromkeys(key for item in items for key in item))
+        rows = ["|".join(columns)] + [
+            "|".join("" if item.get(c) is None else str(item.get(c)) for c in columns)
+            for item in items
+        ]
+        return "\n".join(rows)
+    return json.dumps(items, separators=(",", ":"), ensure_ascii=False)
+
+
+def _fit_item(item: dict, style: str, budget: int) -> dict:
+    """
+    Function to shrink the values of an item (never its serialized form, that
+    must stay valid) until it fits the budget on its own.
+    """
+    max_value_chars = AGENT_RESPONSE_MAX_VALUE_CHARS
+    while len(_render([item], style)) > budget and max_value_chars > _MIN_VALUE_CHARS:
+        max_value_chars = max(_MIN_VALUE_CHARS, max_value_chars // 2)
+        item = to_plain(item, max_value_chars)
+    if len(_render([item], style)) > budget:
+        return {"result": "Result too large, request fewer fields."}
+    return item
+
+
+def format_response(
+    results,
+    fields: Optional[list] = None,
+    style: str = "json",
+    max_chars: int = AGENT_RESPONSE_MAX_CHARS,
+    page: int = 1,
+) -> str:
+    """
+    Function to serialize the results of an action group in a compact way for
+    the agent: only the given fields, plain values and compact JSON or a table.
+    When the budget is exceeded, only the items that fit are returned (as a
+    page) together with a summary that tells the agent how to get the next one.
+
+    :param results: Results of the action group (list of items, a dict or a str).
+    :param fields (Optional(list)): Fields to keep for each item.
+    :param style (str): "json" (compact JSON) or "table" (pipe separated rows).
+    :param max_chars (int): Maximum characters of the response.
+    :param page (int): Page to return (starting at 1) when paginating.
+    """
+    if isinstance(results, str):
+        return results[:max_chars]
+    if isinstance(results, dict):
+        results = [results]
+
+    items = project(list(results or []), fields)
+    if not items:
+        return "No results found."
+
+    rendered = _render(items, style)
+    if len(rendered) <= max_chars and page <= 1:
+        return rendered
+
+    # Paginate: as many items as possible within the budget (keeping room for the summary)
+    budget = max_chars - 120
+    pages = [[]]
+    for item in items:
+        item = _fit_item(item, style, budget)
+        candidate = pages[-1] + [item]
+        if pages[-1] and len(_render(candidate, style)) > budget:
+            pages.append([item])
+        else:
+            pages[-1] = candidate
+
+    page = min(max(page, 1), len(pages))
+    page_items = pages[page - 1]
+    first_index = sum(len(previous) for previous in pages[: page - 1])
+    summary = (
+        f"Showing {first_index + 1}-{first_index + len(page_items)} of {len(items)} "
+        f"results (page {page}/{len(pages)})."
+    )
+    if page < len(pages):
+        summary += f" Call again with page={page + 1} for more."
+    return f"{_render(page_items, style)}\n{summary}"
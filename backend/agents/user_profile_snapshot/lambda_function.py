@@ -0,0 +1,45 @@
+################################################################################
+# Lambda Function that receives the DynamoDB Agents-Data Stream...
+# ... and keeps the per-user profile snapshot ("USER#<n>/PROFILE") up to date
+################################################################################
+
+# Built-in imports
+import os
+
+# External imports
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from aws_lambda_powertools.utilities.data_classes import event_source
+from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import (
+    DynamoDBStreamEvent,
+)
+
+# Own imports
+from common.logger import custom_logger
+from common.helpers.user_profile_snapshot import UserProfileSnapshot
+from agents.dispatcher import get_dynamodb_helper
+
+
+TABLE_NAME = os.environ["TABLE_NAME"]  # Mandatory to pass table name as env var
+
+logger = custom_logger()
+user_profile_snapshot = UserProfileSnapshot(get_dynamodb_helper(TABLE_NAME))
+
+
+@logger.inject_lambda_context(log_event=False)
+@event_source(data_class=DynamoDBStreamEvent)
+def lambda_handler(event: DynamoDBStreamEvent, context: LambdaContext):
+    logger.info("Starting user profile snapshot updates from DynamoDB Stream")
+    for record in event.records:
+        keys = record.dynamodb.keys
+        logger.debug(f"{record.event_name.name} event for {keys['PK']} / {keys['SK']}")
+        # The stream is ordered per item, so each change is applied in order
+        user_profile_snapshot.apply_change(
+            partition_key=keys["PK"],
+            sort_key=keys["SK"],
+            new_item=(
+                None
+                if record.event_name.name == "REMOVE"
+                else record.dynamodb.new_image
+            ),
+        )
+    logger.info("Finished user profile snapshot updates")
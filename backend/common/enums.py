@@ -21,6 +21,8 @@ class DDBPrefixes(Enum):
     SK_NUMBER_DATA = "NUMBER#"
     SK_CHAT_INPUT = "CHAT#INPUT#"
     SK_CHAT_OUTPUT = "CHAT#OUTPUT#"
+    SK_CHAT_HISTORY = "CHAT#HISTORY"
+    SK_OUTBOUND = "OUTBOUND#"
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+# Built-in imports
+import json
+import os
+import uuid
+from typing import Optional
+
+# External imports
+import boto3
+
+# Own imports
+from common.logger import custom_logger
+
+
+logger = custom_logger()
+
+# Bucket for the large payload fields (when not set, a local folder is used)
+CLAIM_CHECK_BUCKET_NAME = os.environ.get("CLAIM_CHECK_BUCKET_NAME")
+CLAIM_CHECK_LOCAL_DIR = os.environ.get("CLAIM_CHECK_LOCAL_DIR", "/tmp/claim-check")
+CLAIM_CHECK_THRESHOLD_BYTES = int(os.environ.get("CLAIM_CHECK_THRESHOLD_BYTES", "8192"))
+
+# Attribute value used as reference: {"claim_check": {"uri": ..., "size": ...}}
+CLAIM_CHECK_REFERENCE_KEY = "claim_check"
+
+# Attributes needed to route/log the executions are never offloaded
+CLAIM_CHECK_PROTECTED_ATTRIBUTES = (
+    "PK",
+    "SK",
+    "type",
+    "from_number",
+    "whatsapp_id",
+    "whatsapp_timestamp",
+    "created_at",
+    "correlation_id",
+    "media_id",
+)
+
+
+def is_claim_check_reference(attribute_value: dict) -> bool:
+    """
+    Function to check if a DynamoDB attribute value is a claim-check reference.
+
+    :param attribute_value (dict): Attribute value (e.g. {"S": "..."}).
+    """
+    return (
+        isinstance(attribute_value, dict)
+        and CLAIM_CHECK_REFERENCE_KEY in attribute_value
+    )
+
+
+class ClaimCheckStore:
+    """
+    Claim-check storage for the large fields of the State Machine payloads. The
+    fields above a size threshold are saved in S3 (or a local folder stand-in
+    for local runs) and replaced by a small reference, so the executions only
+    carry (and log) the references. The steps that need a field resolve it
+    lazily (see <resolve_attribute>).
+    """
+
+    def __init__(
+        self,
+        bucket_name: Optional[str] = CLAIM_CHECK_BUCKET_NAME,
+        local_dir: str = CLAIM_CHECK_LOCAL_DIR,
+        threshold_bytes: int = CLAIM_CHECK_THRESHOLD_BYTES,
+    ) -> None:
+        """
+        :param bucket_name (Optional(str)): S3 bucket (None to use <local_dir>).
+        :param local_dir (str): Local folder used when there is no bucket.
+        :param threshold_bytes (int): Fields above this size are offloaded.
+        """
+        self.bucket_name = bucket_name
+        self.local_dir = local_dir
+        self.threshold_bytes = threshold_bytes
+        self._s3_client = None
+
+    @property
+    def s3_client(self):
+        # Only created when needed (most of the payloads are never offloaded)
+        if self._s3_client is None:
+            self._s3_client = boto3.client("s3")
+        return self._s3_client
+
+    def put(self, key: str, content: bytes) -> str:
+        """
+        Method to save the content and return its URI ("s3://..." or "file://...").
+
+        :param key (str): Relative key of the object.
+        :param content (bytes): Content to save.
+        """
+        if self.bucket_name:
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=content)
+            return f"s3://{self.bucket_name}/{key}"
+
+        path = os.path.join(self.local_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(content)
+        return f"file://{path}"
+
+    def get(self, uri: str) -> bytes:
+        """
+        Method to load the content of a URI returned by <put>.
+
+        :param uri (str): URI of the object ("s3://..." or "file://...").
+        """
+        if uri.startswith("s3://"):
+            bucket_name, key = uri[len("s3://") :].split("/", 1)
+            response = self.s3_client.get_object(Bucket=bucket_name, Key=key)
+            return response["Body"].read()
+        if uri.startswith("file://"):
+            with open(uri[len("file://") :], "rb") as file:
+                return file.read()
+        raise ValueError(f"Claim-check URI <{uri}> not supported")
+
+    def offload_attribute(
+        self, attribute_value: dict, key_prefix: str, attribute_name: str
+    ) -> dict:
+        """
+        Method to offload a DynamoDB attribute value if it's above the threshold.
+
+        :param attribute_value (dict): Attribute value (e.g. {"S": "..."}).
+        :param key_prefix (str): Prefix for the object key (e.g. correlation ID).
+        :param attribute_name (str): Name of the attribute (for the object key).
+        :returns: The reference, or the same attribute value if it's small.
+        """
+        if is_claim_check_reference(attribute_value):
+            return attribute_value
+
+        content = json.dumps(attribute_value).encode("utf-8")
+        if len(content) <= self.threshold_bytes:
+            return attribute_value
+
+        key = f"{key_prefix}/{uuid.uuid4().hex}/{attribute_name}.json"
+        uri = self.put(key, content)
+        logger.debug(f"Attribute <{attribute_name}> offloaded to {uri}")
+        return {CLAIM_CHECK_REFERENCE_KEY: {"uri": uri, "size": len(content)}}
+
+    def offload_attributes(self, new_image: dict, key_prefix: str) -> list[str]:
+        """
+        Method to offload (in place) the large attributes of a DynamoDB image.
+
+        :param new_image (dict): DynamoDB image ("NewImage" of the stream record).
+        :param key_prefix (str): Prefix for the object keys (e.g. correlation ID).
+        :returns: The names of the offloaded attributes.
+        """
+        offloaded_attributes = []
+        for attribute_name, attribute_value in new_image.items():
+            if attribute_name in CLAIM_CHECK_PROTECTED_ATTRIBUTES:
+                continue
+            reference = self.offload_attribute(
+                attribute_value, key_prefix, attribute_name
+            )
+            if reference is not attribute_value:
+                new_image[attribute_name] = reference
+                offloaded_attributes.append(attribute_name)
+        return offloaded_attributes
+
+    def resolve_attribute(self, attribute_value: dict) -> dict:
+        """
+        Method to obtain the original DynamoDB attribute value of a reference.
+
+        :param attribute_value (dict): Attribute value or claim-check reference.
+        """
+        if not is_claim_check_reference(attribute_value):
+            return attribute_value
+        uri = attribute_value[CLAIM_CHECK_REFERENCE_KEY]["uri"]
+        return json.loads(self.get(uri))
+
+
+claim_check_store = ClaimCheckStore()
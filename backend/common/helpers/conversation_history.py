@@ -0,0 +1,155 @@
+# Built-in imports
+import os
+import time
+from typing import Optional
+
+# Own imports
+from common.enums import DDBPrefixes
+from common.logger import custom_logger
+from common.helpers.dynamodb_helper import DynamoDBHelper
+
+
+logger = custom_logger()
+
+# Amount of turns (inbound and outbound messages) kept for each user
+CONVERSATION_HISTORY_MAX_TURNS = int(
+    os.environ.get("CONVERSATION_HISTORY_MAX_TURNS", "20")
+)
+
+# Long texts are truncated in the history (it's only used as a compact context)
+CONVERSATION_HISTORY_MAX_TEXT_CHARS = int(
+    os.environ.get("CONVERSATION_HISTORY_MAX_TEXT_CHARS", "1000")
+)
+
+_COMPACTION_ATTEMPTS = 3
+
+
+class ConversationHistory:
+    """
+    Bounded per-user conversation history ("NUMBER#<n>/CHAT#HISTORY"), with
+    the last turns of both the inbound and outbound messages in a single list
+    attribute. Each turn is appended with a single conditional update. The list
+    is allowed to grow up to twice the max turns, and then it is compacted
+    back to the max turns (so the compaction only happens every N turns).
+    """
+
+    def __init__(
+        self,
+        dynamodb_helper: DynamoDBHelper,
+        max_turns: int = CONVERSATION_HISTORY_MAX_TURNS,
+    ) -> None:
+        """
+        :param dynamodb_helper (DynamoDBHelper): Helper for the messages table.
+        :param max_turns (int): Amount of turns to keep for each user.
+        """
+        if max_turns < 1:
+            raise ValueError(f"max_turns must be at least 1, got <{max_turns}>")
+        self.dynamodb_helper = dynamodb_helper
+        self.max_turns = max_turns
+
+    @staticmethod
+    def get_keys(phone_number: str) -> tuple:
+        return (
+            f"{DDBPrefixes.PK_NUMBER.value}{phone_number}",
+            DDBPrefixes.SK_CHAT_HISTORY.value,
+        )
+
+    def get(self, phone_number: str) -> list:
+        """
+        Method to obtain the last turns of a user (oldest first).
+
+        :param phone_number (str): Phone number of the user.
+        """
+        partition_key, sort_key = self.get_keys(phone_number)
+        item = self.dynamodb_helper.get_plain_item_by_pk_and_sk(partition_key, sort_key)
+        return item.get("turns", [])[-self.max_turns :]
+
+    def append(
+        self,
+        phone_number: str,
+        role: str,
+        text: str,
+        message_id: Optional[str] = None,
+        correlation_id: Optional[str] = None,
+    ) -> None:
+        """
+        Method to add a turn to the history of a user.
+
+        :param phone_number (str): Phone number of the user.
+        :param role (str): "user" (inbound) or "assistant" (outbound).
+        :param text (str): Text of the message.
+        :param message_id (Optional(str)): WhatsApp message ID.
+        :param correlation_id (Optional(str)): Correlation ID of the message.
+        """
+        turn = {
+            "role": role,
+            "text": (text or "")[:CONVERSATION_HISTORY_MAX_TEXT_CHARS],
+            "created_at": int(time.time()),
+        }
+        if message_id:
+            turn["message_id"] = message_id
+        if correlation_id:
+            turn["correlation_id"] = correlation_id
+
+        partition_key, sort_key = self.get_keys(phone_number)
+        appended = self.dynamodb_helper.update_item(
+            partition_key=partition_key,
+            sort_key=sort_key,
+            update_expression=(
+                "SET #turns = list_append(if_not_exists(#turns, :empty), :turn), "
+                "#version = if_not_exists(#version, :zero) + :one, "
+                "#updated_at = :updated_at"
+            ),
+            expression_attribute_names={
+                "#turns": "turns",
+                "#version": "version",
+                "#updated_at": "updated_at",
+            },
+            expression_attribute_values={
+                ":empty": [],
+                ":turn": [turn],
+                ":zero": 0,
+                ":one": 1,
+                ":updated_at": turn["created_at"],
+                ":max_buffered": 2 * self.max_turns,
+            },
+            condition_expression=(
+                "attribute_not_exists(#turns) OR size(#turns) < :max_buffered"
+            ),
+        )
+        if not appended:
+            self.compact(phone_number, turn)
+
+    def compact(self, phone_number: str, turn: dict) -> None:
+        """
+        Method to keep only the last turns (including the new one). The item is
+        replaced only if no other turn was added meanwhile (optimistic locking
+        with the "version" attribute), otherwise it's retried.
+
+        :param phone_number (str): Phone number of the user.
+        :param turn (dict): New turn to add.
+        """
+        partition_key, sort_key = self.get_keys(phone_number)
+        for _ in range(_COMPACTION_ATTEMPTS):
+            item = self.dynamodb_helper.get_plain_item_by_pk_and_sk(
+                partition_key, sort_key, consistent_read=True
+            )
+            version = item.get("version", 0)
+            # Explicit start index (a "-0" slice would keep the whole list)
+            turns = item.get("turns", [])
+            turns = turns[max(0, len(turns) - (self.max_turns - 1)) :] + [turn]
+            replaced = self.dynamodb_helper.put_item_if_not_exists(
+                {
+                    "PK": partition_key,
+                    "SK": sort_key,
+                    "turns": turns,
+                    "version": version + 1,
+                    "updated_at": turn["created_at"],
+                },
+                condition_expression="attribute_not_exists(PK) OR #version = :version",
+                expression_attribute_names={"#version": "version"},
+                expression_attribute_values={":version": version},
+            )
+            if replaced:
+                return
+        logger.warning(f"Could not compact the conversation history of {partition_key}")
@@ -0,0 +1,147 @@
+# Built-in imports
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+
+# External imports
+from aws_lambda_powertools.metrics import MetricUnit
+
+# Own imports
+from common.logger import custom_logger
+from common.metrics import emit_metric
+from common.helpers.dynamodb_helper import DynamoDBHelper
+
+
+logger = custom_logger()
+
+# Aggregates of the current minute are saved at most once per this interval (the
+# closed minutes are saved at the end of the invocation, see <flush_closed_minutes>)
+DELIVERY_METRICS_FLUSH_SECONDS = int(
+    os.environ.get("DELIVERY_METRICS_FLUSH_SECONDS", "60")
+)
+
+# Status timestamps kept in memory to match "sent" -> "delivered" -> "read"
+DELIVERY_METRICS_MAX_TRACKED_MESSAGES = int(
+    os.environ.get("DELIVERY_METRICS_MAX_TRACKED_MESSAGES", "10000")
+)
+
+# Latencies between consecutive statuses of the same message
+_LATENCIES = {
+    "delivered": ("sent", "sent_to_delivered"),
+    "read": ("delivered", "delivered_to_read"),
+}
+
+
+class DeliveryStatusAggregator:
+    """
+    Aggregator for the WhatsApp delivery statuses (sent, delivered, read and
+    failed) posted by Meta to the webhook. The latencies between statuses are
+    aggregated per minute in memory, and saved as atomic counters (ADD) in the
+    "METRICS#DELIVERY/MINUTE#<minute>" items at the end of the invocations that
+    have closed minutes pending (or once per flush interval), so there is no
+    DynamoDB write for each callback and the counters are not lost when the
+    Lambda container is frozen or recycled. Each latency is also emitted as a
+    CloudWatch metric (EMF via logs).
+    """
+
+    def __init__(
+        self,
+        dynamodb_helper: DynamoDBHelper,
+        flush_seconds: int = DELIVERY_METRICS_FLUSH_SECONDS,
+        max_tracked_messages: int = DELIVERY_METRICS_MAX_TRACKED_MESSAGES,
+    ) -> None:
+        """
+        :param dynamodb_helper (DynamoDBHelper): Helper for the messages table.
+        :param flush_seconds (int): Minimum seconds between saves of the aggregates.
+        :param max_tracked_messages (int): Messages kept in memory (LRU).
+        """
+        self.dynamodb_helper = dynamodb_helper
+        self.flush_seconds = flush_seconds
+        self.max_tracked_messages = max_tracked_messages
+        self._messages = OrderedDict()
+        self._buckets = defaultdict(lambda: defaultdict(int))
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add_status(self, message_id: str, status: str, timestamp: int) -> None:
+        """
+        Method to process a single status callback.
+
+        :param message_id (str): WhatsApp message ID ("wamid...").
+        :param status (str): "sent", "delivered", "read" or "failed".
+        :param timestamp (int): Unix timestamp of the status (from Meta).
+        """
+        minute = datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime(
+            "%Y-%m-%dT%H:%M"
+        )
+        latencies = {}
+        with self._lock:
+            statuses = self._messages.pop(message_id, {})
+            statuses[status] = timestamp
+            self._messages[message_id] = statuses
+            while len(self._messages) > self.max_tracked_messages:
+                self._messages.popitem(last=False)
+
+            bucket = self._buckets[minute]
+            bucket[f"status_{status}"] += 1
+            previous_status, latency_name = _LATENCIES.get(status, (None, None))
+            if previous_status in statuses:
+                latency_ms = max(timestamp - statuses[previous_status], 0) * 1000
+                bucket[f"{latency_name}_count"] += 1
+                bucket[f"{latency_name}_sum_ms"] += latency_ms
+                latencies[latency_name] = latency_ms
+
+        for latency_name, latency_ms in latencies.items():
+            emit_metric(
+                name=f"WhatsAppLatency_{latency_name}",
+                value=latency_ms,
+                unit=MetricUnit.Milliseconds,
+            )
+
+    def flush_closed_minutes(self) -> None:
+        """
+        Method to save the aggregates if there are closed minutes (before the
+        current UTC minute) pending, or the flush interval has elapsed. It must
+        be called at the end of each invocation, as the container may be frozen
+        (and never used again) right after it.
+        """
+        current_minute = datetime.now(tz=timezone.utc).strftime("%Y-%m-%dT%H:%M")
+        with self._lock:
+            if not self._buckets:
+                return
+            has_closed_minutes = min(self._buckets) < current_minute
+        if (
+            has_closed_minutes
+            or time.monotonic() - self._last_flush >= self.flush_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Method to save the aggregated counters (one atomic update per minute).
+        """
+        with self._lock:
+            buckets, self._buckets = self._buckets, defaultdict(
+                lambda: defaultdict(int)
+            )
+            self._last_flush = time.monotonic()
+
+        for minute, counters in buckets.items():
+            names = list(counters)
+            try:
+                self.dynamodb_helper.update_item(
+                    partition_key="METRICS#DELIVERY",
+                    sort_key=f"MINUTE#{minute}",
+                    update_expression="ADD "
+                    + ", ".join(f"#a{i} :v{i}" for i in range(len(names))),
+                    expression_attribute_names={
+                        f"#a{i}": name for i, name in enumerate(names)
+                    },
+                    expression_attribute_values={
+                        f":v{i}": counters[name] for i, name in enumerate(names)
+                    },
+                )
+            except Exception as error:
+                logger.warning(f"Could not save the delivery metrics: {error}")
@@ -1,6 +1,6 @@
 # Built-in imports
 import boto3
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 
 # Own imports
@@ -110,6 +110,91 @@ class DynamoDBHelper:
             )
             raise error
 
+    def query_by_pk(self, partition_key: str, consistent_read: bool = False) -> list:
+        """
+        Method to run a query against DynamoDB to obtain all the items of a
+        partition key.
+        :param partition_key (str): partition key value.
+        :param consistent_read (bool): True for a strongly consistent query.
+        """
+        logger.info(f"Starting query_by_pk with pk: ({partition_key})")
+
+        all_items = []
+        try:
+            query_kwargs = {
+                "KeyConditionExpression": Key("PK").eq(partition_key),
+                "ConsistentRead": consistent_read,
+            }
+            response = self.table.query(**query_kwargs)
+            all_items.extend(response.get("Items", []))
+
+            # Pagination loop for possible following queries
+            while "LastEvaluatedKey" in response:
+                response = self.table.query(
+                    ExclusiveStartKey=response["LastEvaluatedKey"], **query_kwargs
+                )
+                all_items.extend(response.get("Items", []))
+
+            return all_items
+        except ClientError as error:
+            logger.error(
+                f"query operation failed for: "
+                f"table_name: {self.table_name}."
+                f"pk: {partition_key}."
+                f"error: {error}."
+            )
+            raise error
+
+    def scan_by_pk_and_sk_begins_with(
+        self,
+        partition_key_portion: str,
+        sort_key_portion: str,
+        segment: int = 0,
+        total_segments: int = 1,
+    ) -> list[dict]:
+        """
+        Method to run a (parallel-friendly) scan against DynamoDB with <begins-with>
+        functionality on both the partition key and the sort key.
+        :param partition_key_portion (str): partition key portion to use in scan.
+        :param sort_key_portion (str): sort key portion to use in scan.
+        :param segment (int): segment of the table to scan (for parallel scans).
+        :param total_segments (int): total amount of segments (for parallel scans).
+        """
+        logger.info(
+            f"Starting scan_by_pk_and_sk_begins_with with"
+            f"pk: ({partition_key_portion}) and sk: ({sort_key_portion}), "
+            f"segment {segment + 1}/{total_segments}"
+        )
+
+        all_items = []
+        try:
+            scan_kwargs = {
+                "FilterExpression": Attr("PK").begins_with(partition_key_portion)
+                & Attr("SK").begins_with(sort_key_portion),
+                "Segment": segment,
+                "TotalSegments": total_segments,
+            }
+            response = self.table.scan(**scan_kwargs)
+            all_items.extend(response.get("Items", []))
+
+            # Pagination loop for possible following scans
+            while "LastEvaluatedKey" in response:
+                response = self.table.scan(
+                    ExclusiveStartKey=response["LastEvaluatedKey"], **scan_kwargs
+                )
+                all_items.extend(response.get("Items", []))
+
+            return all_items
+        except ClientError as error:
+            logger.error(
+                f"scan operation failed for: "
+                f"table_name: {self.table_name}."
+                f"partition_key_portion: {partition_key_portion}."
+                f"sort_key_portion: {sort_key_portion}."
+                f"error: {error}."
+            )
+            raise error
+
     def put_item(self, data: dict) -> dict:
         """
         Method to add a single DynamoDB item.
@@ -133,3 +218,221 @@ class DynamoDBHelper:
                 f"error: {error}."
             )
             raise error
+
+    def put_item_if_not_exists(
+        self,
+        data: dict,
+        condition_expression: str = "attribute_not_exists(PK)",
+        expression_attribute_names: dict = None,
+        expression_attribute_values: dict = None,
+    ) -> bool:
+        """
+        Method to add a single DynamoDB item only if it doesn't exist yet (or if
+        the given condition is met). Returns False when the condition failed.
+        :param data (dict): Item to be added in a JSON format (without the "S", "N", "B" approach).
+        :param condition_expression (str): Condition for the put operation.
+        :param expression_attribute_names (dict): Names used in the condition.
+        :param expression_attribute_values (dict): Values used in the condition.
+        """
+        logger.info("Starting put_item_if_not_exists operation.")
+        logger.debug(data, message_details=f"Data to be added to {self.table_name}")
+
+        kwargs = {"Item": data, "ConditionExpression": condition_expression}
+        if expression_attribute_names:
+            kwargs["ExpressionAttributeNames"] = expression_attribute_names
+        if expression_attribute_values:
+            kwargs["ExpressionAttributeValues"] = expression_attribute_values
+        try:
+            self.table.put_item(**kwargs)
+            return True
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.info("put_item condition failed, item already exists.")
+                return False
+            logger.error(
+                f"put_item operation failed for: "
+                f"table_name: {self.table_name}."
+                f"data: {data}."
+                f"error: {error}."
+            )
+            raise error
+
+    def update_item_attributes(
+        self, partition_key: str, sort_key: str, attributes: dict
+    ) -> dict:
+        """
+        Method to set (overwrite) some attributes of a single DynamoDB item.
+        :param partition_key (str): partition key value.
+        :param sort_key (str): sort key value.
+        :param attributes (dict): Attributes to set (without the "S", "N", "B" approach).
+        """
+        logger.info(
+            f"Starting update_item_attributes with"
+            f"pk: ({partition_key}) and sk: ({sort_key})"
+        )
+        try:
+            return self.table.update_item(
+                Key={"PK": partition_key, "SK": sort_key},
+                UpdateExpression="SET "
+                + ", ".join(f"#a{i} = :v{i}" for i in range(len(attributes))),
+                ExpressionAttributeNames={
+                    f"#a{i}": name for i, name in enumerate(attributes)
+                },
+                ExpressionAttributeValues={
+                    f":v{i}": value for i, value in enumerate(attributes.values())
+                },
+            )
+        except ClientError as error:
+            logger.error(
+                f"update_item operation failed for: "
+                f"table_name: {self.table_name}."
+                f"pk: {partition_key}."
+                f"sk: {sort_key}."
+                f"error: {error}."
+            )
+            raise error
+
+    def get_plain_item_by_pk_and_sk(
+        self, partition_key: str, sort_key: str, consistent_read: bool = False
+    ) -> dict:
+        """
+        Method to get a single DynamoDB item from the primary key (pk+sk) in a
+        JSON format (without the "S", "N", "B" approach).
+        :param partition_key (str): partition key value.
+        :param sort_key (str): sort key value.
+        :param consistent_read (bool): True for a strongly consistent read.
+        """
+        logger.info(
+            f"Starting get_plain_item_by_pk_and_sk with"
+            f"pk: ({partition_key}) and sk: ({sort_key})"
+        )
+        try:
+            response = self.table.get_item(
+                Key={"PK": partition_key, "SK": sort_key},
+                ConsistentRead=consistent_read,
+            )
+            return response.get("Item", {})
+        except ClientError as error:
+            logger.error(
+                f"get_item operation failed for: "
+                f"table_name: {self.table_name}."
+                f"pk: {partition_key}."
+                f"sk: {sort_key}."
+                f"error: {error}."
+            )
+            raise error
+
+    def update_item(
+        self,
+        partition_key: str,
+        sort_key: str,
+        update_expression: str,
+        expression_attribute_names: dict = None,
+        expression_attribute_values: dict = None,
+        condition_expression: str = None,
+    ) -> bool:
+        """
+        Method to run an update expression on a single DynamoDB item. Returns
+        False when the given condition failed.
+        :param partition_key (str): partition key value.
+        :param sort_key (str): sort key value.
+        :param update_expression (str): Update expression (SET/REMOVE/ADD).
+        :param expression_attribute_names (dict): Names used in the expressions.
+        :param expression_attribute_values (dict): Values used in the expressions.
+        :param condition_expression (str): Optional condition for the update.
+        """
+        logger.info(
+            f"Starting update_item with" f"pk: ({partition_key}) and sk: ({sort_key})"
+        )
+
+        kwargs = {
+            "Key": {"PK": partition_key, "SK": sort_key},
+            "UpdateExpression": update_expression,
+        }
+        if expression_attribute_names:
+            kwargs["ExpressionAttributeNames"] = expression_attribute_names
+        if expression_attribute_values:
+            kwargs["ExpressionAttributeValues"] = expression_attribute_values
+        if condition_expression:
+            kwargs["ConditionExpression"] = condition_expression
+        try:
+            self.table.update_item(**kwargs)
+            return True
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.info("update_item condition failed.")
+                return False
+            logger.error(
+                f"update_item operation failed for: "
+                f"table_name: {self.table_name}."
+                f"pk: {partition_key}."
+                f"sk: {sort_key}."
+                f"error: {error}."
+            )
+            raise error
+
+    def delete_item(
+        self,
+        partition_key: str,
+        sort_key: str,
+        condition_expression: str = None,
+        expression_attribute_names: dict = None,
+        expression_attribute_values: dict = None,
+    ) -> bool:
+        """
+        Method to delete a single DynamoDB item. Returns False when the given
+        condition failed.
+        :param partition_key (str): partition key value.
+        :param sort_key (str): sort key value.
+        :param condition_expression (str): Optional condition for the delete.
+        :param expression_attribute_names (dict): Names used in the condition.
+        :param expression_attribute_values (dict): Values used in the condition.
+        """
+        logger.info(
+            f"Starting delete_item with" f"pk: ({partition_key}) and sk: ({sort_key})"
+        )
+
+        kwargs = {"Key": {"PK": partition_key, "SK": sort_key}}
+        if condition_expression:
+            kwargs["ConditionExpression"] = condition_expression
+        if expression_attribute_names:
+            kwargs["ExpressionAttributeNames"] = expression_attribute_names
+        if expression_attribute_values:
+            kwargs["ExpressionAttributeValues"] = expression_attribute_values
+        try:
+            self.table.delete_item(**kwargs)
+            return True
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.info("delete_item condition failed.")
+                return False
+            logger.error(
+                f"delete_item operation failed for: "
+                f"table_name: {self.table_name}."
+                f"pk: {partition_key}."
+                f"sk: {sort_key}."
+                f"error: {error}."
+            )
+            raise error
+
+    def batch_put_items(self, items: list) -> int:
+        """
+        Method to add several DynamoDB items with batched writes (in chunks of
+        25 items, retrying the unprocessed ones).
+        :param items (list): Items to be added in a JSON format (without the "S", "N", "B" approach).
+        """
+        logger.info(f"Starting batch_put_items operation with {len(items)} items.")
+
+        try:
+            with self.table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+            return len(items)
+        except ClientError as error:
+            logger.error(
+                f"batch_write operation failed for: "
+                f"table_name: {self.table_name}."
+                f"items: {len(items)}."
+                f"error: {error}."
+            )
+            raise error
@@ -0,0 +1,95 @@
+# Built-in imports
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+# Own imports
+from common.enums import DDBPrefixes
+from common.logger import custom_logger
+from common.helpers.dynamodb_helper import DynamoDBHelper
+
+
+logger = custom_logger()
+
+# Messages table, where the outbound messages are recorded
+DYNAMODB_TABLE = os.environ.get("DYNAMODB_TABLE")
+
+
+class OutboundMessageBuffer:
+    """
+    Write-behind buffer for the outbound messages (what the bot sent and how
+    long it took). The records are only kept in memory while the message is
+    being answered, and are saved with batched writes at the end of the
+    invocation (see <flush>), so they don't add latency to the replies.
+    """
+
+    def __init__(self, table_name: Optional[str] = DYNAMODB_TABLE) -> None:
+        """
+        :param table_name (Optional(str)): Messages table (None disables the buffer).
+        """
+        self.table_name = table_name
+        self.dynamodb_helper = DynamoDBHelper(table_name) if table_name else None
+        self._records = []
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        phone_number: str,
+        text: str,
+        message_id: Optional[str],
+        latency_ms: float,
+        correlation_id: Optional[str] = None,
+        status: str = "SENT",
+    ) -> None:
+        """
+        Method to add an outbound message to the buffer.
+
+        :param phone_number (str): Phone number the message was sent to.
+        :param text (str): Text of the message (only its hash and length are saved).
+        :param message_id (Optional(str)): WhatsApp message ID ("wamid...").
+        :param latency_ms (float): Time to send the message (including retries).
+        :param correlation_id (Optional(str)): Correlation ID of the conversation.
+        :param status (str): "SENT" or "FAILED".
+        """
+        if not self.dynamodb_helper:
+            return
+
+        created_at = datetime.now(timezone.utc).isoformat()
+        text = text or ""
+        record = {
+            "PK": f"{DDBPrefixes.PK_NUMBER.value}{phone_number}",
+            "SK": f"{DDBPrefixes.SK_OUTBOUND.value}{created_at}#{message_id or status}",
+            "created_at": created_at,
+            "text_sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "text_length": len(text),
+            "message_id": message_id,
+            "latency_ms": Decimal(str(round(latency_ms, 2))),
+            "correlation_id": correlation_id,
+            "status": status,
+        }
+        with self._lock:
+            self._records.append(
+                {key: value for key, value in record.items() if value is not None}
+            )
+
+    def flush(self) -> int:
+        """
+        Method to save all the buffered records (batched writes).
+
+        :returns: Amount of saved records.
+        """
+        with self._lock:
+            records, self._records = self._records, []
+        if not records:
+            return 0
+
+        saved = self.dynamodb_helper.batch_put_items(records)
+        logger.info(f"Saved {saved} outbound message records")
+        return saved
+
+
+# Shared buffer for the whole invocation
+outbound_messages = OutboundMessageBuffer()
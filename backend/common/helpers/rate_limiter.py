@@ -0,0 +1,201 @@
+# Built-in imports
+import random
+import threading
+import time
+from typing import Optional
+
+# External imports
+import boto3
+from botocore.exceptions import ClientError
+
+# Own imports
+from common.logger import custom_logger
+
+logger = custom_logger()
+
+
+class LocalTokenBucket:
+    """
+    In-process token bucket used as the fast path before the distributed one.
+    A single Lambda container can never exceed the global budget, so when the
+    local bucket is empty we can reject without any network call.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float) -> None:
+        """
+        :param rate_per_second (float): Tokens added to the bucket per second.
+        :param capacity (float): Maximum amount of tokens in the bucket (burst).
+        """
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_consume(self, amount: float = 1) -> bool:
+        """
+        Method to consume tokens from the bucket (if available).
+        :param amount (float): Amount of tokens to consume.
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self.updated_at
+            self.tokens = min(
+                self.capacity, self.tokens + elapsed * self.rate_per_second
+            )
+            self.updated_at = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return True
+            return False
+
+
+class DistributedTokenBucket:
+    """
+    Token bucket shared by all the Lambda containers, backed by DynamoDB atomic
+    counters. Each second (TPS) and each minute (TPM) has its own counter item,
+    that is conditionally incremented only while it is below the budget.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        bucket_name: str,
+        max_tps: int,
+        max_tpm: int,
+        endpoint_url: str = None,
+    ) -> None:
+        """
+        :param table_name (str): Name of the DynamoDB table for the counters.
+        :param bucket_name (str): Unique identifier of the bucket (e.g. "bedrock-agent").
+        :param max_tps (int): Maximum amount of requests per second (0 to disable).
+        :param max_tpm (int): Maximum amount of tokens per minute (0 to disable).
+        :param endpoint_url (Optional(str)): Endpoint for DynamoDB (only for local tests).
+        """
+        self.table_name = table_name
+        self.bucket_name = bucket_name
+        self.max_tps = max_tps
+        self.max_tpm = max_tpm
+        self.dynamodb_client = boto3.client("dynamodb", endpoint_url=endpoint_url)
+        self.local_bucket = (
+            LocalTokenBucket(rate_per_second=max_tps, capacity=max_tps)
+            if max_tps
+            else None
+        )
+
+        # Windows already known as exhausted (avoid hitting DynamoDB again)
+        self._exhausted_until = 0.0
+
+    def _increment_window(
+        self, window_key: str, amount: int, limit: int, ttl: int
+    ) -> bool:
+        """
+        Method to atomically increment a window counter if it stays within the limit.
+        :param window_key (str): Sort key of the window counter (e.g. "TPS#1700000000").
+        :param amount (int): Amount to add to the window counter.
+        :param limit (int): Maximum value allowed for the window counter.
+        :param ttl (int): Epoch seconds for the counter item to expire.
+        """
+        try:
+            self.dynamodb_client.update_item(
+                TableName=self.table_name,
+                Key={
+                    "PK": {"S": f"RATE#{self.bucket_name}"},
+                    "SK": {"S": window_key},
+                },
+                UpdateExpression="ADD tokens :amount SET #ttl = :ttl",
+                ConditionExpression="attribute_not_exists(tokens) OR tokens <= :max_before",
+                ExpressionAttributeNames={"#ttl": "ttl"},
+                ExpressionAttributeValues={
+                    ":amount": {"N": str(amount)},
+                    ":max_before": {"N": str(limit - amount)},
+                    ":ttl": {"N": str(ttl)},
+                },
+            )
+            return True
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise error
+
+    def _refund_window(self, window_key: str, amount: int) -> None:
+        """
+        Method to give back tokens to a window counter (best-effort). Errors are
+        only logged, so a rejected request is never admitted by the fail-open path.
+        :param window_key (str): Sort key of the window counter (e.g. "TPM#28333333").
+        :param amount (int): Amount to subtract from the window counter.
+        """
+        try:
+            self.dynamodb_client.update_item(
+                TableName=self.table_name,
+                Key={
+                    "PK": {"S": f"RATE#{self.bucket_name}"},
+                    "SK": {"S": window_key},
+                },
+                UpdateExpression="ADD tokens :amount",
+                ExpressionAttributeValues={":amount": {"N": str(-amount)}},
+            )
+        except ClientError as error:
+            logger.warning(f"Could not refund {amount} tokens to {window_key}: {error}")
+
+    def try_acquire(self, cost: int = 1) -> bool:
+        """
+        Method to acquire a single request (and its token cost) from the bucket.
+        :param cost (int): Estimated amount of tokens for the request (TPM budget).
+        """
+        now = time.time()
+        if now < self._exhausted_until:
+            return False
+        if self.local_bucket and not self.local_bucket.try_consume():
+            return False
+
+        epoch_second = int(now)
+        epoch_minute = epoch_second // 60
+        try:
+            if self.max_tpm and not self._increment_window(
+                f"TPM#{epoch_minute}", cost, self.max_tpm, epoch_second + 120
+            ):
+                self._exhausted_until = (epoch_minute + 1) * 60
+                return False
+
+            if self.max_tps and not self._increment_window(
+                f"TPS#{epoch_second}", 1, self.max_tps, epoch_second + 60
+            ):
+                self._exhausted_until = epoch_second + 1
+                if self.max_tpm:
+                    # Give back the minute tokens, as the request is not going through
+                    self._refund_window(f"TPM#{epoch_minute}", cost)
+                return False
+        except ClientError as error:
+            # Fail open: the rate limiter must never be the reason of an outage
+            logger.warning(f"Rate limiter unavailable, allowing request: {error}")
+        return True
+
+    def acquire(self, cost: int = 1, max_wait_seconds: float = 0) -> bool:
+        """
+        Method to acquire from the bucket, queueing up to <max_wait_seconds>.
+        Returns False when the request should be shed.
+        :param cost (int): Estimated amount of tokens for the request (TPM budget).
+        :param max_wait_seconds (float): Maximum time to wait for the budget.
+        """
+        deadline = time.time() + max_wait_seconds
+        while True:
+            if self.try_acquire(cost):
+                return True
+            now = time.time()
+            if now >= deadline:
+                logger.warning(f"Rate limit exceeded for bucket {self.bucket_name}")
+                return False
+
+            # Wait for the next window, with jitter to avoid thundering herds
+            next_window = max(self._exhausted_until, int(now) + 1)
+            sleep_seconds = min(next_window - now, deadline - now)
+            time.sleep(max(0.0, sleep_seconds) + random.uniform(0, 0.1))
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Function to estimate the amount of LLM tokens of a text (~4 characters per token).
+    :param text (str): Text to estimate the tokens for.
+    """
+    return max(1, len(text or "") // 4)
@@ -0,0 +1,211 @@
+# Built-in imports
+import re
+import time
+from decimal import Decimal
+from typing import Optional
+
+# Own imports
+from common.logger import custom_logger
+from common.helpers.dynamodb_helper import DynamoDBHelper
+
+
+logger = custom_logger()
+
+# Snapshot item for each user (note: different from the "PROFILE#" source item)
+SNAPSHOT_SORT_KEY = "PROFILE"
+
+# Source items aggregated in the snapshot (each one is kept as an attribute named as its SK)
+SNAPSHOT_SOURCE_PREFIXES = ("PROFILE#", "PRODUCT#", "REWARDS#")
+
+RISK_PROFILES = ("CONSERVATIVE", "MODERATE", "RISKY")
+DEFAULT_RISK_PROFILE = "MODERATE"
+
+_POINTS_PATTERN = re.compile(r"(\d[\d,.]*)\s+\w*\s*points", re.IGNORECASE)
+
+
+def is_snapshot_source(sort_key: str) -> bool:
+    """
+    Function to check if an item (by its SK) is aggregated in the snapshot.
+    """
+    return sort_key.startswith(SNAPSHOT_SOURCE_PREFIXES)
+
+
+def get_reward_points(reward: dict) -> int:
+    """
+    Function to obtain the points of a reward item (from the "points" attribute,
+    or from its details, e.g. "You have 1500 Rufus Points...").
+    """
+    if reward.get("points") is not None:
+        return int(reward["points"])
+    match = _POINTS_PATTERN.search(str(reward.get("details", "")))
+    return int(re.sub(r"[,.]", "", match.group(1))) if match else 0
+
+
+def get_risk_profile(profile: dict, products: list) -> str:
+    """
+    Function to obtain the risk profile of a user. The "risk_profile" attribute
+    of the profile is used when available, otherwise it is inferred from the
+    risk of the investment products of the user.
+    """
+    risk_profile = str(profile.get("risk_profile", "")).upper()
+    if risk_profile in RISK_PROFILES:
+        return risk_profile
+
+    descriptions = " ".join(
+        f"{product.get('product_name', '')} {product.get('details', '')}"
+        for product in products
+    ).lower()
+    if "high risk" in descriptions or "high-risk" in descriptions:
+        return "RISKY"
+    if "low risk" in descriptions or "low-risk" in descriptions:
+        return "CONSERVATIVE"
+    return DEFAULT_RISK_PROFILE
+
+
+def build_snapshot(partition_key: str, item: dict) -> dict:
+    """
+    Function to convert the snapshot item to the aggregated user profile. The
+    products and rewards keep their "PK" and "SK", so they are equivalent to
+    the items returned by the queries.
+
+    :param partition_key (str): Partition key of the user ("USER#<n>").
+    :param item (dict): Snapshot item from DynamoDB.
+    """
+    sources = {
+        sort_key: {"PK": partition_key, "SK": sort_key, **value}
+        for sort_key, value in item.items()
+        if is_snapshot_source(sort_key) and isinstance(value, dict)
+    }
+    profile = sources.get("PROFILE#", {})
+    products = [sources[key] for key in sorted(sources) if key.startswith("PRODUCT#")]
+    rewards = [sources[key] for key in sorted(sources) if key.startswith("REWARDS#")]
+    return {
+        "user_id": partition_key.split("#", 1)[-1],
+        "profile": profile,
+        "products": products,
+        "rewards": rewards,
+        "rewards_total": sum(get_reward_points(reward) for reward in rewards),
+        "risk_profile": get_risk_profile(profile, products),
+        "updated_at": int(item.get("updated_at", 0)),
+    }
+
+
+def format_snapshot_for_prompt(snapshot: dict) -> str:
+    """
+    Function to summarize the user profile snapshot in a few lines (to pre-seed
+    the prompts with the user context).
+    """
+    profile = snapshot["profile"]
+    products = ", ".join(
+        f"{product.get('product_name')} ({product.get('details')}, "
+        f"*{product.get('last_digits')}, {product.get('status')})"
+        for product in snapshot["products"]
+    )
+    name = " ".join(
+        str(profile[key]).title()
+        for key in ("first_name", "last_name")
+        if profile.get(key)
+    )
+    return (
+        f"User: {name or snapshot['user_id']}\n"
+        f"Products: {products or 'None'}\n"
+        f"Reward points: {snapshot['rewards_total']}\n"
+        f"Risk profile: {snapshot['risk_profile']}"
+    )
+
+
+class UserProfileSnapshot:
+    """
+    Accessor for the denormalized "USER#<n>/PROFILE" snapshot item, that
+    aggregates the profile, products and rewards of a user (so they are
+    obtained with a single GetItem). It is kept up to date from the
+    agents-data table stream (see <apply_change>).
+    """
+
+    def __init__(self, dynamodb_helper: DynamoDBHelper) -> None:
+        """
+        :param dynamodb_helper (DynamoDBHelper): Helper for the agents-data table.
+        """
+        self.dynamodb_helper = dynamodb_helper
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """
+        Method to obtain the snapshot of a user (None if it doesn't exist yet).
+
+        :param user_id (str): User ID (the phone number for now).
+        """
+        partition_key = f"USER#{user_id}"
+        item = self.dynamodb_helper.get_plain_item_by_pk_and_sk(
+            partition_key, SNAPSHOT_SORT_KEY
+        )
+        return build_snapshot(partition_key, item) if item else None
+
+    def get_or_rebuild(self, user_id: str) -> dict:
+        """
+        Method to obtain the snapshot of a user, building it when missing (e.g.
+        users created before the snapshots existed).
+
+        :param user_id (str): User ID (the phone number for now).
+        """
+        return self.get(user_id) or self.rebuild(user_id)
+
+    def rebuild(self, user_id: str) -> dict:
+        """
+        Method to build the snapshot of a user from all its source items.
+
+        :param user_id (str): User ID (the phone number for now).
+        """
+        partition_key = f"USER#{user_id}"
+        items = self.dynamodb_helper.query_by_pk(partition_key, consistent_read=True)
+        snapshot_item = {
+            "PK": partition_key,
+            "SK": SNAPSHOT_SORT_KEY,
+            "updated_at": int(time.time()),
+        }
+        for item in items:
+            if is_snapshot_source(item["SK"]):
+                snapshot_item[item["SK"]] = {
+                    key: value for key, value in item.items() if key not in ("PK", "SK")
+                }
+
+        self.dynamodb_helper.put_item(snapshot_item)
+        logger.info(f"User profile snapshot rebuilt for {partition_key}")
+        return build_snapshot(partition_key, snapshot_item)
+
+    def apply_change(
+        self, partition_key: str, sort_key: str, new_item: Optional[dict]
+    ) -> None:
+        """
+        Method to update the snapshot with a single changed source item. Only
+        the attribute of that item is written, so concurrent changes of other
+        items don't overwrite each other. When the snapshot doesn't exist yet,
+        it is built from all the source items instead.
+
+        :param partition_key (str): Partition key of the changed item ("USER#<n>").
+        :param sort_key (str): Sort key of the changed item.
+        :param new_item (Optional(dict)): New item (None when it was removed).
+        """
+        if not partition_key.startswith("USER#") or not is_snapshot_source(sort_key):
+            return
+
+        expression_attribute_names = {"#item": sort_key, "#updated_at": "updated_at"}
+        expression_attribute_values = {":updated_at": Decimal(int(time.time()))}
+        if new_item is None:
+            update_expression = "SET #updated_at = :updated_at REMOVE #item"
+        else:
+            update_expression = "SET #item = :item, #updated_at = :updated_at"
+            expression_attribute_values[":item"] = {
+                key: value for key, value in new_item.items() if key not in ("PK", "SK")
+            }
+
+        updated = self.dynamodb_helper.update_item(
+            partition_key=partition_key,
+            sort_key=SNAPSHOT_SORT_KEY,
+            update_expression=update_expression,
+            expression_attribute_names=expression_attribute_names,
+            expression_attribute_values=expression_attribute_values,
+            condition_expression="attribute_exists(PK)",
+        )
+        if not updated:
+            # A partial snapshot would look complete, so it's built from scratch
+            self.rebuild(partition_key.split("#", 1)[-1])
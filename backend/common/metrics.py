@@ -0,0 +1,36 @@
+# Built-in imports
+import os
+from typing import Optional
+
+# External imports
+from aws_lambda_powertools.metrics import MetricUnit, single_metric
+
+
+METRICS_NAMESPACE = os.environ.get("POWERTOOLS_METRICS_NAMESPACE", "RufusBank")
+
+
+def emit_metric(
+    name: str,
+    value: float,
+    unit: MetricUnit = MetricUnit.Count,
+    dimensions: Optional[dict] = None,
+    metadata: Optional[dict] = None,
+) -> None:
+    """
+    Function to emit a single CloudWatch metric (Embedded Metric Format via logs).
+
+    :param name (str): Name of the metric.
+    :param value (float): Value of the metric.
+    :param unit (MetricUnit): Unit of the metric.
+    :param dimensions (Optional(dict)): Dimensions of the metric (keep low cardinality).
+    :param metadata (Optional(dict)): Searchable metadata (e.g. correlation_id).
+    """
+    with single_metric(
+        name=name,
+        unit=unit,
+        value=value,
+        namespace=METRICS_NAMESPACE,
+        default_dimensions={"service": "wpp-chatbot", **(dimensions or {})},
+    ) as metric:
+        for key, metadata_value in (metadata or {}).items():
+            metric.add_metadata(key=key, value=metadata_value)
@@ -0,0 +1,226 @@
+# Built-in imports
+from functools import cached_property
+from typing import Annotated, Literal, Optional, Union
+
+# External imports
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+
+class WebhookModel(BaseModel):
+    """Base Model for the WhatsApp webhook payloads (unknown fields are ignored)."""
+
+    model_config = ConfigDict(extra="ignore", populate_by_name=True)
+
+
+# Contents of each type of message
+
+
+class TextContent(WebhookModel):
+    body: str
+
+
+class MediaContent(WebhookModel):
+    id: str
+    mime_type: Optional[str] = None
+    sha256: Optional[str] = None
+
+
+class ImageContent(MediaContent):
+    caption: Optional[str] = None
+
+
+class AudioContent(MediaContent):
+    voice: bool = False
+
+
+class VideoContent(MediaContent):
+    caption: Optional[str] = None
+
+
+class DocumentContent(MediaContent):
+    caption: Optional[str] = None
+    filename: Optional[str] = None
+
+
+class LocationContent(WebhookModel):
+    latitude: float
+    longitude: float
+    name: Optional[str] = None
+    address: Optional[str] = None
+
+
+class ReplyContent(WebhookModel):
+    id: str
+    title: str
+    description: Optional[str] = None
+
+
+class InteractiveContent(WebhookModel):
+    type: str
+    button_reply: Optional[ReplyContent] = None
+    list_reply: Optional[ReplyContent] = None
+
+
+# Messages (discriminated by their "type")
+
+
+class BaseWebhookMessage(WebhookModel):
+    """
+    Class that represents a message received in the WhatsApp webhook.
+
+    Attributes:
+        from_number: str: Phone number of the sender ("from" in the payload).
+        id: str: WhatsApp ID of the message.
+        timestamp: str: WhatsApp timestamp of the message.
+        type: str: Type of message (text, image, audio, etc).
+    """
+
+    from_number: str = Field(alias="from")
+    id: str
+    timestamp: str
+    type: str
+
+    @property
+    def message_type(self) -> str:
+        """Type of message for the State Machine (see <WhatsAppMessageTypes>)."""
+        return self.type
+
+
+class TextWebhookMessage(BaseWebhookMessage):
+    type: Literal["text"]
+    text: TextContent
+
+
+class ImageWebhookMessage(BaseWebhookMessage):
+    type: Literal["image"]
+    image: ImageContent
+
+
+class AudioWebhookMessage(BaseWebhookMessage):
+    type: Literal["audio"]
+    audio: AudioContent
+
+    @property
+    def message_type(self) -> str:
+        # Voice notes are sent as "audio" messages flagged as "voice"
+        return "voice" if self.audio.voice else self.type
+
+
+class VideoWebhookMessage(BaseWebhookMessage):
+    type: Literal["video"]
+    video: VideoContent
+
+
+class DocumentWebhookMessage(BaseWebhookMessage):
+    type: Literal["document"]
+    document: DocumentContent
+
+
+class LocationWebhookMessage(BaseWebhookMessage):
+    type: Literal["location"]
+    location: LocationContent
+
+
+class InteractiveWebhookMessage(BaseWebhookMessage):
+    type: Literal["interactive"]
+    interactive: InteractiveContent
+
+    @property
+    def reply(self) -> Optional[ReplyContent]:
+        return self.interactive.button_reply or self.interactive.list_reply
+
+
+WebhookMessage = Annotated[
+    Union[
+        TextWebhookMessage,
+        ImageWebhookMessage,
+        AudioWebhookMessage,
+        VideoWebhookMessage,
+        DocumentWebhookMessage,
+        LocationWebhookMessage,
+        InteractiveWebhookMessage,
+    ],
+    Field(discriminator="type"),
+]
+
+# Only the model of the given "type" is validated (discriminated union)
+_WEBHOOK_MESSAGE_ADAPTER = TypeAdapter(WebhookMessage)
+
+SUPPORTED_WEBHOOK_MESSAGE_TYPES = {
+    "text",
+    "image",
+    "audio",
+    "video",
+    "document",
+    "location",
+    "interactive",
+}
+
+
+class WebhookStatus(WebhookModel):
+    """
+    Class that represents a delivery status received in the WhatsApp webhook.
+
+    Attributes:
+        id: str: WhatsApp ID of the sent message.
+        status: str: "sent", "delivered", "read" or "failed".
+        timestamp: int: Unix timestamp of the status.
+        recipient_id: Optional(str): Phone number of the recipient.
+        errors: Optional(list): Error details (for "failed" statuses).
+    """
+
+    id: str
+    status: str
+    timestamp: int
+    recipient_id: Optional[str] = None
+    errors: Optional[list] = None
+
+
+def parse_webhook_message(raw_message: dict) -> Optional[BaseWebhookMessage]:
+    """
+    Function to parse a single webhook message into its typed model.
+
+    :param raw_message (dict): Message from the webhook ("messages" list item).
+    :returns: The typed message, or None for unsupported types (e.g. stickers).
+    """
+    if raw_message.get("type") not in SUPPORTED_WEBHOOK_MESSAGE_TYPES:
+        return None
+    return _WEBHOOK_MESSAGE_ADAPTER.validate_python(raw_message)
+
+
+class WebhookPayload:
+    """
+    Lazy wrapper for the body posted to the WhatsApp webhook. Nothing is parsed
+    until it's accessed, and only the messages/statuses that are used are
+    validated (e.g. the contacts and metadata are never decoded).
+    """
+
+    def __init__(self, body: dict) -> None:
+        """
+        :param body (dict): JSON body received in the webhook.
+        """
+        self.body = body
+
+    @cached_property
+    def value(self) -> dict:
+        # Intentionally break code if the payload is not a WhatsApp notification
+        return self.body["entry"][0]["changes"][0]["value"]
+
+    @property
+    def has_messages(self) -> bool:
+        return bool(self.value.get("messages"))
+
+    @cached_property
+    def statuses(self) -> list[WebhookStatus]:
+        return [
+            WebhookStatus.model_validate(status)
+            for status in self.value.get("statuses", [])
+        ]
+
+    def get_message(self, index: int = 0) -> Optional[BaseWebhookMessage]:
+        """
+        Method to obtain a single typed message (None for unsupported types).
+
+        :param index (int): Position of the message in the payload.
+        """
+        return parse_webhook_message(self.value["messages"][index])
@@ -7,6 +7,7 @@ from aws_lambda_powertools import Logger
 
 # Own imports
 from common.logger import custom_logger
+from common.helpers.claim_check import claim_check_store
 
 
 class BaseStepFunction:
@@ -51,3 +52,36 @@ class BaseStepFunction:
             correlation_id=self.correlation_id,
             message_type=self.message_type,
         )
+
+    @property
+    def new_image(self) -> dict:
+        """DynamoDB image of the message (its large attributes may be references)."""
+        return (
+            self.event.setdefault("input", {})
+            .setdefault("dynamodb", {})
+            .setdefault("NewImage", {})
+        )
+
+    def get_new_image_attribute(self, attribute_name: str) -> dict:
+        """
+        Method to obtain an attribute of the message, resolving (lazily) the
+        claim-check references of the offloaded attributes.
+
+        :param attribute_name (str): Name of the attribute (e.g. "text").
+        :returns: The DynamoDB attribute value (e.g. {"S": "..."}), or {}.
+        """
+        return claim_check_store.resolve_attribute(
+            self.new_image.get(attribute_name, {})
+        )
+
+    def set_new_image_attribute(self, attribute_name: str, attribute_value: dict):
+        """
+        Method to set an attribute of the message for the next steps (large
+        values are offloaded, so the payload stays small).
+
+        :param attribute_name (str): Name of the attribute (e.g. "text").
+        :param attribute_value (dict): DynamoDB attribute value (e.g. {"S": "..."}).
+        """
+        self.new_image[attribute_name] = claim_check_store.offload_attribute(
+            attribute_value, self.correlation_id, attribute_name
+        )
@@ -0,0 +1,145 @@
+# Built-in imports
+import io
+import os
+from functools import lru_cache
+from typing import BinaryIO, Optional
+
+# External imports
+import boto3
+
+
+# Engine used to understand the images ("bedrock" or "ocr_stub")
+IMAGE_ANALYSIS_ENGINE = os.environ.get("IMAGE_ANALYSIS_ENGINE", "ocr_stub")
+IMAGE_ANALYSIS_MODEL_ID = os.environ.get(
+    "IMAGE_ANALYSIS_MODEL_ID", "amazon.nova-lite-v1:0"
+)
+IMAGE_ANALYSIS_MAX_TOKENS = int(os.environ.get("IMAGE_ANALYSIS_MAX_TOKENS", "500"))
+
+# Images are resized (keeping the aspect ratio) before being sent to the model
+IMAGE_MAX_SIZE_PIXELS = int(os.environ.get("IMAGE_MAX_SIZE_PIXELS", "1024"))
+IMAGE_JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "80"))
+
+IMAGE_ANALYSIS_PROMPT = (
+    "Describe this image sent by a bank customer in a few sentences. If it "
+    "contains text (e.g. a receipt, an invoice or an ID card), transcribe the "
+    "relevant text. Answer in the language of the text in the image."
+)
+
+
+def resize_image(
+    image_file: BinaryIO,
+    max_size: int = IMAGE_MAX_SIZE_PIXELS,
+    quality: int = IMAGE_JPEG_QUALITY,
+) -> bytes:
+    """
+    Function to decode, resize and re-encode an image (as JPEG) in memory.
+
+    :param image_file (BinaryIO): In-memory image file (JPEG, PNG, WEBP, etc).
+    :param max_size (int): Maximum width/height in pixels.
+    :param quality (int): JPEG quality (1-95).
+    """
+    # Pillow is provided by a dedicated Lambda layer
+    from PIL import Image, ImageOps
+
+    with Image.open(image_file) as image:
+        # Only the needed resolution is decoded for JPEGs (much faster for photos)
+        image.draft("RGB", (max_size, max_size))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+        return output.getvalue()
+
+
+class ImageAnalysisEngine:
+    """
+    Base class for the image analysis engines. The images are always received
+    already resized and encoded as JPEG (see <resize_image>).
+    """
+
+    name: str = ""
+
+    def analyze(self, image_content: bytes, caption: Optional[str] = None) -> str:
+        """
+        Method to convert the image to a text description.
+
+        :param image_content (bytes): JPEG image.
+        :param caption (Optional(str)): Caption sent by the user with the image.
+        """
+        raise NotImplementedError
+
+
+class OcrStubImageAnalysisEngine(ImageAnalysisEngine):
+    """
+    Engine that returns a fixed description (for local tests).
+    """
+
+    name = "ocr_stub"
+
+    def analyze(self, image_content: bytes, caption: Optional[str] = None) -> str:
+        return f"Image received ({len(image_content)} bytes), no text detected."
+
+
+class BedrockImageAnalysisEngine(ImageAnalysisEngine):
+    """
+    Engine that describes the images with a multimodal model (Bedrock Converse).
+    """
+
+    name = "bedrock"
+
+    def __init__(
+        self,
+        model_id: str = IMAGE_ANALYSIS_MODEL_ID,
+        max_tokens: int = IMAGE_ANALYSIS_MAX_TOKENS,
+    ) -> None:
+        self.model_id = model_id
+        self.max_tokens = max_tokens
+        self.bedrock_runtime_client = boto3.client("bedrock-runtime")
+
+    def analyze(self, image_content: bytes, caption: Optional[str] = None) -> str:
+        prompt = IMAGE_ANALYSIS_PROMPT
+        if caption:
+            prompt += f"\nThe customer wrote with the image: {caption}"
+        response = self.bedrock_runtime_client.converse(
+            modelId=self.model_id,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "image": {
+                                "format": "jpeg",
+                                "source": {"bytes": image_content},
+                            }
+                        },
+                        {"text": prompt},
+                    ],
+                }
+            ],
+            inferenceConfig={"maxTokens": self.max_tokens, "temperature": 0},
+        )
+        return "".join(
+            block.get("text", "") for block in response["output"]["message"]["content"]
+        ).strip()
+
+
+_IMAGE_ANALYSIS_ENGINES = {
+    engine.name: engine
+    for engine in (OcrStubImageAnalysisEngine, BedrockImageAnalysisEngine)
+}
+
+
+@lru_cache(maxsize=None)
+def get_image_analysis_engine(name: str = IMAGE_ANALYSIS_ENGINE) -> ImageAnalysisEngine:
+    """
+    Function to obtain the image analysis engine (loaded once per container).
+
+    :param name (str): Name of the engine ("bedrock" or "ocr_stub").
+    """
+    if name not in _IMAGE_ANALYSIS_ENGINES:
+        raise ValueError(
+            f"Image analysis engine <{name}> not supported. "
+            f"Allowed ones are: {list(_IMAGE_ANALYSIS_ENGINES)}"
+        )
+    return _IMAGE_ANALYSIS_ENGINES[name]()
@@ -1,11 +1,11 @@
 # Built-in imports
 import os
 import json
-from typing import Optional
+import io
+from typing import Iterator, Optional
 
 # External imports
 from aws_lambda_powertools import Logger
-import requests
 
 
 # Own imports
@@ -15,6 +15,8 @@ from state_machine.integrations.meta.api_utils import (
     get_api_endpoint,
     get_api_headers,
 )
+from state_machine.integrations.meta.dispatcher import get_meta_dispatcher
+from state_machine.integrations.meta.media_cache import MetaMediaCache
 from state_machine.integrations.meta.schemas import (
     MetaPostTextMessageModel,
     MetaPostDocumentMessageModel,
@@ -23,7 +25,13 @@ from state_machine.integrations.meta.schemas import (
 
 SECRET_NAME = os.environ["SECRET_NAME"]
 secrets_helper = SecretsHelper(SECRET_NAME)
-auth_token = secrets_helper.get_secret_value("META_TOKEN")
+media_cache = MetaMediaCache()
+
+# Incoming media (e.g. voice notes) larger than this is rejected (WhatsApp allows 16 MB)
+META_MEDIA_MAX_BYTES = int(
+    os.environ.get("META_MEDIA_MAX_BYTES", str(16 * 1024 * 1024))
+)
+META_MEDIA_CHUNK_BYTES = 64 * 1024
 
 
 class MetaAPI:
@@ -31,22 +39,93 @@ class MetaAPI:
     Class that contains the base helpers for interacting with the Meta API.
     """
 
-    def __init__(self, logger: Optional[Logger] = None) -> None:
+    def __init__(
+        self,
+        logger: Optional[Logger] = None,
+        meta_secret_json: Optional[dict] = None,
+    ) -> None:
+        """
+        :param logger (Optional(Logger)): Logger object.
+        :param meta_secret_json (Optional(dict)): Meta configurations to use instead of
+            the ones from Secrets Manager (only for local tests).
+        """
         self.logger = logger or custom_logger()
-        self.load_meta_configurations()
+        self.load_meta_configurations(meta_secret_json)
 
-    def load_meta_configurations(self) -> None:
+    def load_meta_configurations(self, meta_secret_json: Optional[dict] = None) -> None:
         """
         Method to load Meta configurations from Secrets Manager and initialize endpoint and headers.
+        :param meta_secret_json (Optional(dict)): Meta configurations (skips Secrets Manager).
         """
         self.logger.debug("Loading Meta configurations from Secrets Manager...")
-        self.meta_secret_json = secrets_helper.get_secret_value()
+        self.meta_secret_json = meta_secret_json or secrets_helper.get_secret_value()
         _meta_token = self.meta_secret_json.get("META_TOKEN")
         _meta_from_phone_number_id = self.meta_secret_json.get(
             "META_FROM_PHONE_NUMBER_ID"
         )
-        self.api_headers = get_api_headers(bearer_token=auth_token)
+        self.meta_from_phone_number_id = _meta_from_phone_number_id
+        self.api_headers = get_api_headers(bearer_token=_meta_token)
         self.api_endpoint = get_api_endpoint(f"{_meta_from_phone_number_id}/messages")
+        self.api_media_endpoint = get_api_endpoint(
+            f"{_meta_from_phone_number_id}/media"
+        )
+
+    @staticmethod
+    def build_text_message_payload(
+        text_message: str,
+        to_phone_number: str,
+        original_message_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Method to build the JSON data of a text message for the Meta API.
+
+        :param text_message (str): Text of the message.
+        :param to_phone_number (str): Phone number to send the message to.
+        :param original_message_id (str): Original message ID to reply to.
+        """
+        message_data_model = MetaPostTextMessageModel(
+            to=to_phone_number,
+            text={"body": text_message},
+            context=(
+                {"message_id": original_message_id} if original_message_id else None
+            ),
+        )
+        # return message_data_model.model_dump()
+        return json.loads(message_data_model.json())  # TODO: update to model_dump()
+
+    @staticmethod
+    def build_document_message_payload(
+        document_url: Optional[str],
+        to_phone_number: str,
+        original_message_id: Optional[str] = None,
+        media_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Method to build the JSON data of a document message for the Meta API.
+
+        :param document_url (Optional(str)): URL of the document.
+        :param to_phone_number (str): Phone number to send the message to.
+        :param original_message_id (str): Original message ID to reply to.
+        :param media_id (Optional(str)): Uploaded media ID (used instead of the URL).
+        """
+        message_data_model = MetaPostDocumentMessageModel(
+            to=to_phone_number,
+            document={
+                "id": media_id,
+                "link": None if media_id else document_url,
+                "caption": "Rufus Certificate",
+                "filename": "Rufus_Bank_Certificate.pdf",
+            },
+            context=(
+                {"message_id": original_message_id} if original_message_id else None
+            ),
+        )
+        payload = json.loads(message_data_model.json())  # TODO: update to model_dump()
+        # Meta rejects documents with both (or a null) "id" and "link"
+        payload["document"] = {
+            key: value for key, value in payload["document"].items() if value
+        }
+        return payload
 
     def post_text_message(
         self,
@@ -66,23 +145,15 @@ class MetaAPI:
         self.logger.debug(f"Headers to send: {self.api_headers}")
         self.logger.debug(f"text_message to send: {text_message}")
 
-        # Create response model for the POST request (JSON data)
-        message_data_model = MetaPostTextMessageModel(
-            to=to_phone_number,
-            text={"body": text_message},
-            context=(
-                {"message_id": original_message_id} if original_message_id else None
-            ),
-        )
-
         try:
-            response = requests.post(
+            # Sent through the dispatcher (rate budget, retries and ordering)
+            response = get_meta_dispatcher().send(
                 self.api_endpoint,
                 headers=self.api_headers,
-                # json=message_data_model.model_dump(),
-                json=json.loads(
-                    message_data_model.json()
-                ),  # TODO: update to model_dump()
+                payload=self.build_text_message_payload(
+                    text_message, to_phone_number, original_message_id
+                ),
+                phone_number_id=self.meta_from_phone_number_id,
             )
         except Exception as e:
             self.logger.exception(
@@ -96,43 +167,33 @@ class MetaAPI:
 
     def post_document_message(
         self,
-        document_url: str,
+        document_url: Optional[str],
         to_phone_number: str,
         original_message_id: Optional[str] = None,
+        media_id: Optional[str] = None,
     ) -> dict:
         """
         Method to send a POST message request to the Meta API.
 
-        :param document_url (str): document_url to send in the POST request.
+        :param document_url (Optional(str)): document_url to send in the POST request.
         :param to_phone_number (str): Phone number to send the message to.
         :param original_message_id (str): Original message ID to reply to.
+        :param media_id (Optional(str)): Uploaded media ID (see <get_or_upload_media>).
         """
 
         self.logger.info(f"Starting POST request to Meta API: {self.api_endpoint}")
         self.logger.debug(f"Headers to send: {self.api_headers}")
-        self.logger.debug(f"document_url to send: {document_url}")
-
-        # Create response model for the POST request (JSON data)
-        message_data_model = MetaPostDocumentMessageModel(
-            to=to_phone_number,
-            document={
-                "link": document_url,
-                "caption": "Rufus Certificate",
-                "filename": "Rufus_Bank_Certificate.pdf",
-            },
-            context=(
-                {"message_id": original_message_id} if original_message_id else None
-            ),
-        )
+        self.logger.debug(f"document to send: {media_id or document_url}")
 
         try:
-            response = requests.post(
+            # Sent through the dispatcher (rate budget, retries and ordering)
+            response = get_meta_dispatcher().send(
                 self.api_endpoint,
                 headers=self.api_headers,
-                # json=message_data_model.model_dump(),
-                json=json.loads(
-                    message_data_model.json()
-                ),  # TODO: update to model_dump()
+                payload=self.build_document_message_payload(
+                    document_url, to_phone_number, original_message_id, media_id
+                ),
+                phone_number_id=self.meta_from_phone_number_id,
             )
         except Exception as e:
             self.logger.exception(
@@ -143,3 +204,138 @@ class MetaAPI:
         self.logger.info(f"Response has status_code: {response.status_code}")
         self.logger.info(f"Response data: {response.text}")
         return response.json()
+
+    def upload_media(self, content: bytes, mime_type: str, filename: str) -> str:
+        """
+        Method to upload a media file to the Meta API (returns the media ID).
+
+        :param content (bytes): Content of the file.
+        :param mime_type (str): MIME type of the file (e.g. "application/pdf").
+        :param filename (str): Name of the file.
+        """
+        self.logger.info(
+            f"Starting media upload to Meta API: {self.api_media_endpoint}"
+        )
+
+        # Multipart request (the JSON "Content-Type" header can't be used here)
+        headers = {
+            key: value
+            for key, value in self.api_headers.items()
+            if key.lower() != "content-type"
+        }
+        response = get_meta_dispatcher().request(
+            "POST",
+            self.api_media_endpoint,
+            phone_number_id=self.meta_from_phone_number_id,
+            headers=headers,
+            data={"messaging_product": "whatsapp", "type": mime_type},
+            files={"file": (filename, content, mime_type)},
+        )
+        self.logger.info(f"Response has status_code: {response.status_code}")
+        response_data = response.json()
+        if "id" not in response_data:
+            self.logger.error(response_data, message_details="Media upload failed")
+            raise Exception("Error in POST WhatsApp Media Meta API Response")
+        return response_data["id"]
+
+    def stream_media(
+        self, media_id: str, max_bytes: int = META_MEDIA_MAX_BYTES
+    ) -> tuple[Iterator[bytes], Optional[str]]:
+        """
+        Method to stream a received media file (e.g. voice note) from the Meta
+        API in chunks, without saving it to disk.
+
+        :param media_id (str): Media ID received in the webhook message.
+        :param max_bytes (int): Maximum size of the media file.
+        :returns: tuple of the chunks iterator and the MIME type of the media.
+        """
+        dispatcher = get_meta_dispatcher()
+        auth_headers = {"Authorization": self.api_headers["Authorization"]}
+
+        # The media ID is resolved to a short-lived download URL
+        response = dispatcher.request(
+            "GET",
+            get_api_endpoint(media_id),
+            phone_number_id=self.meta_from_phone_number_id,
+            headers=auth_headers,
+        )
+        media_data = response.json()
+        if "url" not in media_data:
+            self.logger.error(media_data, message_details="Media URL request failed")
+            raise Exception("Error in GET WhatsApp Media Meta API Response")
+        if int(media_data.get("file_size", 0)) > max_bytes:
+            raise ValueError(f"Media {media_id} exceeds the {max_bytes} bytes limit")
+
+        def iter_chunks() -> Iterator[bytes]:
+            downloaded = 0
+            with dispatcher.request(
+                "GET",
+                media_data["url"],
+                phone_number_id=self.meta_from_phone_number_id,
+                headers=auth_headers,
+                stream=True,
+            ) as media_response:
+                media_response.raise_for_status()
+                for chunk in media_response.iter_content(META_MEDIA_CHUNK_BYTES):
+                    downloaded += len(chunk)
+                    if downloaded > max_bytes:
+                        raise ValueError(
+                            f"Media {media_id} exceeds the {max_bytes} bytes limit"
+                        )
+                    yield chunk
+
+        return iter_chunks(), media_data.get("mime_type")
+
+    def download_media(
+        self, media_id: str, max_bytes: int = META_MEDIA_MAX_BYTES
+    ) -> tuple[io.BytesIO, Optional[str]]:
+        """
+        Method to download a received media file to an in-memory buffer.
+
+        :param media_id (str): Media ID received in the webhook message.
+        :param max_bytes (int): Maximum size of the media file.
+        :returns: tuple of the in-memory file and the MIME type of the media.
+        """
+        chunks, mime_type = self.stream_media(media_id, max_bytes)
+        buffer = io.BytesIO()
+        for chunk in chunks:
+            buffer.write(chunk)
+        buffer.seek(0)
+        self.logger.info(
+            f"Downloaded media {media_id} ({buffer.getbuffer().nbytes} bytes)"
+        )
+        return buffer, mime_type
+
+    def get_cached_media_id(self, content_hash: str) -> Optional[str]:
+        """
+        Method to obtain a previously uploaded media ID from its content hash.
+
+        :param content_hash (str): Hash used when the media was uploaded.
+        """
+        return media_cache.get(content_hash, self.meta_from_phone_number_id)
+
+    def get_or_upload_media(
+        self,
+        content: bytes,
+        mime_type: str,
+        filename: str,
+        content_hash: str,
+    ) -> str:
+        """
+        Method to obtain the media ID for a file, uploading it only when the same
+        content was not uploaded before. Same parameters as <upload_media>, plus:
+
+        :param content_hash (str): Stable key of the content, derived from its
+            inputs (e.g. <get_certificate_hash>). A hash of the rendered bytes is
+            not valid when they embed timestamps or random IDs (never repeats).
+        """
+        media_id = self.get_cached_media_id(content_hash)
+        if media_id:
+            self.logger.info(f"Reusing Meta media ID for content hash {content_hash}")
+            return media_id
+
+        media_id = self.upload_media(content, mime_type, filename)
+        media_cache.put(
+            content_hash, self.meta_from_phone_number_id, media_id, mime_type
+        )
+        return media_id
@@ -12,7 +12,8 @@ META_ENDPOINT = os.environ.get("META_ENDPOINT")
 
 
 def get_api_endpoint(path: str) -> str:
-    base = META_ENDPOINT + MetaAPIVersion.V_20.value
+    # Trailing slash is required, otherwise "urljoin" drops the API version
+    base = META_ENDPOINT + MetaAPIVersion.V_20.value + "/"
     return urljoin(base, path)
 
 
@@ -0,0 +1,250 @@
+# Built-in imports
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# External imports
+from aws_lambda_powertools import Logger
+import httpx
+
+# Own imports
+from state_machine.integrations.meta.api_requests import MetaAPI
+from state_machine.integrations.meta.dispatcher import (
+    META_MAX_SEND_ATTEMPTS,
+    META_REQUEST_TIMEOUT_SECONDS,
+    get_meta_dispatcher,
+    get_retry_delay,
+    is_retryable_response,
+)
+
+
+META_MAX_CONNECTIONS = int(os.environ.get("META_MAX_CONNECTIONS", "10"))
+META_HTTP2 = os.environ.get("META_HTTP2", "true").lower() == "true"
+
+# Persistent event loop and clients for <send_many_sync>, so the pooled
+# connections (and HTTP/2 sessions) are reused across Lambda invocations
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_clients: dict = {}
+_event_loop_lock = threading.Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    global _event_loop
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = asyncio.new_event_loop()
+        _async_clients.clear()
+    return _event_loop
+
+
+def _get_async_client(max_connections: int, http2: bool) -> httpx.AsyncClient:
+    # httpx clients are bound to the loop they are used in (see <_get_event_loop>)
+    client = _async_clients.get((max_connections, http2))
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        client = httpx.AsyncClient(
+            http2=http2, limits=limits, timeout=META_REQUEST_TIMEOUT_SECONDS
+        )
+        _async_clients[(max_connections, http2)] = client
+    return client
+
+
+@dataclass
+class MetaSendResult:
+    """
+    Result of a single message sent with <AsyncMetaAPI.send_many>.
+
+    Attributes:
+        index: int: Position of the message in the <send_many> input.
+        to: str: Recipient phone number.
+        ok: bool: True when Meta accepted the message.
+        status_code: Optional(int): HTTP status code of the last attempt.
+        message_id: Optional(str): WhatsApp message ID ("wamid...") when accepted.
+        response: Optional(dict): JSON body of the last response.
+        error: Optional(str): Error details when the message was not accepted.
+        latency_ms: float: Total time for the message (including retries).
+    """
+
+    index: int
+    to: str
+    ok: bool
+    status_code: Optional[int] = None
+    message_id: Optional[str] = None
+    response: Optional[dict] = None
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+
+
+class AsyncMetaAPI(MetaAPI):
+    """
+    Asyncio variant of the <MetaAPI> class, that sends several messages
+    concurrently over a pooled (HTTP/2 when enabled) connection. Messages for
+    the same recipient are always sent in order.
+    """
+
+    def __init__(
+        self,
+        logger: Optional[Logger] = None,
+        meta_secret_json: Optional[dict] = None,
+        max_connections: int = META_MAX_CONNECTIONS,
+        http2: bool = META_HTTP2,
+        max_attempts: int = META_MAX_SEND_ATTEMPTS,
+    ) -> None:
+        """
+        :param logger (Optional(Logger)): Logger object.
+        :param meta_secret_json (Optional(dict)): Meta configurations to use instead of
+            the ones from Secrets Manager (only for local tests).
+        :param max_connections (int): Maximum amount of pooled connections.
+        :param http2 (bool): Multiplex the requests over HTTP/2 (when supported).
+        :param max_attempts (int): Maximum attempts for each message.
+        """
+        super().__init__(logger=logger, meta_secret_json=meta_secret_json)
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.max_attempts = max_attempts
+
+    async def _post(
+        self, client: httpx.AsyncClient, index: int, payload: dict
+    ) -> MetaSendResult:
+        started_at = time.monotonic()
+        result = MetaSendResult(index=index, to=payload.get("to"), ok=False)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            # Same budget as the sync dispatcher (shared per sending phone ID)
+            await asyncio.to_thread(
+                get_meta_dispatcher().wait_for_budget, self.meta_from_phone_number_id
+            )
+            try:
+                response = await client.post(
+                    self.api_endpoint, headers=self.api_headers, json=payload
+                )
+            except httpx.TransportError as error:
+                result.error = f"{type(error).__name__}: {error}"
+                if attempt >= self.max_attempts:
+                    break
+                await asyncio.sleep(get_retry_delay({}, attempt))
+                continue
+
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            result.status_code = response.status_code
+            result.response = body
+            if attempt < self.max_attempts and is_retryable_response(
+                response.status_code, body
+            ):
+                delay = get_retry_delay(response.headers, attempt)
+                self.logger.warning(
+                    f"Meta API returned {response.status_code} "
+                    f"(attempt {attempt}/{self.max_attempts}), retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            messages = (body or {}).get("messages") or [{}]
+            result.message_id = messages[0].get("id")
+            result.ok = response.is_success and "error" not in (body or {})
+            result.error = None if result.ok else str((body or {}).get("error"))
+            break
+
+        result.latency_ms = (time.monotonic() - started_at) * 1000
+        return result
+
+    async def _send_in_order(
+        self, client: httpx.AsyncClient, indexed_payloads: list, stop_on_error: bool
+    ) -> list:
+        results = []
+        failed = False
+        for index, payload in indexed_payloads:
+            if failed and stop_on_error:
+                # Sending the rest would break the order of the conversation
+                results.append(
+                    MetaSendResult(
+                        index=index,
+                        to=payload.get("to"),
+                        ok=False,
+                        error="Skipped after a previous failed message",
+                    )
+                )
+                continue
+            result = await self._post(client, index, payload)
+            failed = failed or not result.ok
+            results.append(result)
+        return results
+
+    async def send_many(
+        self,
+        messages: list,
+        stop_on_error: bool = False,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> list:
+        """
+        Method to send several messages to the Meta API concurrently. Messages
+        are grouped by recipient: each group is sent sequentially (keeping the
+        order), and the different groups are sent concurrently.
+
+        :param messages (list): JSON data of the messages (see the
+            <MetaAPI.build_*_message_payload> methods). Each one must contain "to".
+        :param stop_on_error (bool): Skip the next messages of a recipient after
+            one of its messages fails (for messages that only make sense in order).
+        :param client (Optional(httpx.AsyncClient)): Client to reuse (bound to the
+            running loop). When not given, a client is created for this call only.
+        :returns: list of <MetaSendResult> in the same order as <messages>.
+        """
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            )
+            async with httpx.AsyncClient(
+                http2=self.http2, limits=limits, timeout=META_REQUEST_TIMEOUT_SECONDS
+            ) as client:
+                return await self.send_many(messages, stop_on_error, client)
+
+        self.logger.info(
+            f"Starting {len(messages)} POST requests to Meta API: {self.api_endpoint}"
+        )
+
+        groups = {}
+        for index, payload in enumerate(messages):
+            groups.setdefault(payload.get("to"), []).append((index, payload))
+
+        grouped_results = await asyncio.gather(
+            *(
+                self._send_in_order(client, group, stop_on_error)
+                for group in groups.values()
+            )
+        )
+
+        results = sorted(
+            (result for group in grouped_results for result in group),
+            key=lambda result: result.index,
+        )
+        for result in results:
+            if not result.ok:
+                self.logger.error(
+                    f"Meta API message {result.index} to {result.to} failed: "
+                    f"{result.error}"
+                )
+        return results
+
+    def send_many_sync(self, messages: list, stop_on_error: bool = False) -> list:
+        """
+        Method to call <send_many> from synchronous code (e.g. Lambda handlers).
+        The event loop and the client are kept for the next invocations, so the
+        connections to Meta are reused. Same parameters as <send_many>.
+        """
+        with _event_loop_lock:
+            event_loop = _get_event_loop()
+            client = _get_async_client(self.max_connections, self.http2)
+            return event_loop.run_until_complete(
+                self.send_many(messages, stop_on_error=stop_on_error, client=client)
+            )
@@ -0,0 +1,289 @@
+# Built-in imports
+import json
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+# External imports
+from aws_lambda_powertools import Logger
+import requests
+
+# Own imports
+from common.helpers.rate_limiter import DistributedTokenBucket, LocalTokenBucket
+from common.logger import custom_logger
+
+
+LOGGER = custom_logger()
+
+# When available, the budget is shared across containers (otherwise it is per container)
+TABLE_NAME_RATE_LIMITS = os.environ.get("TABLE_NAME_RATE_LIMITS")
+
+META_MAX_MESSAGES_PER_SECOND = float(
+    os.environ.get("META_MAX_MESSAGES_PER_SECOND", "20")
+)
+META_MAX_SEND_ATTEMPTS = int(os.environ.get("META_MAX_SEND_ATTEMPTS", "5"))
+META_MAX_BACKOFF_SECONDS = float(os.environ.get("META_MAX_BACKOFF_SECONDS", "8"))
+META_REQUEST_TIMEOUT_SECONDS = float(
+    os.environ.get("META_REQUEST_TIMEOUT_SECONDS", "10")
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Meta error codes for throttling (some of them are returned with a 400 status code)
+# https://developers.facebook.com/docs/whatsapp/cloud-api/support/error-codes
+# Note: 131048 (spam rate limit) is NOT retried, as retrying makes it worse
+RATE_LIMIT_ERROR_CODES = {4, 80007, 130429, 131056}
+
+
+def is_retryable_response(status_code: int, body: Optional[dict]) -> bool:
+    """
+    Function to check if a Meta API response should be retried (throttling or 5xx).
+
+    :param status_code (int): HTTP status code of the response.
+    :param body (Optional(dict)): JSON body of the response.
+    """
+    if status_code in RETRYABLE_STATUS_CODES:
+        return True
+    error_code = ((body or {}).get("error") or {}).get("code")
+    return error_code in RATE_LIMIT_ERROR_CODES
+
+
+def get_retry_delay(
+    headers: dict, attempt: int, max_backoff: float = META_MAX_BACKOFF_SECONDS
+) -> float:
+    """
+    Function to obtain the delay before retrying a Meta API request. It honours
+    the "Retry-After" and "X-Business-Use-Case-Usage" headers, and otherwise
+    uses exponential backoff with full jitter.
+
+    :param headers (dict): HTTP headers of the response.
+    :param attempt (int): Attempt number that failed (starting at 1).
+    :param max_backoff (float): Maximum delay in seconds.
+    """
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(max_backoff, float(retry_after))
+        except ValueError:
+            pass
+
+    business_usage = headers.get("X-Business-Use-Case-Usage")
+    if business_usage:
+        try:
+            for usages in json.loads(business_usage).values():
+                for usage in usages:
+                    minutes = float(usage.get("estimated_time_to_regain_access", 0))
+                    if minutes > 0:
+                        return min(max_backoff, minutes * 60)
+        except (ValueError, AttributeError, TypeError):
+            pass
+
+    return random.uniform(0, min(max_backoff, 0.25 * 2**attempt))
+
+
+class MetaOutboundDispatcher:
+    """
+    Outbound dispatcher for the Meta API messages. It enforces a messages per
+    second budget for each sending phone ID, retries throttled/5xx responses with
+    backoff and keeps the order of the messages for each recipient.
+    """
+
+    def __init__(
+        self,
+        max_messages_per_second: float = META_MAX_MESSAGES_PER_SECOND,
+        max_attempts: int = META_MAX_SEND_ATTEMPTS,
+        max_workers: int = 8,
+        logger: Optional[Logger] = None,
+    ) -> None:
+        """
+        :param max_messages_per_second (float): Budget for each sending phone ID.
+        :param max_attempts (int): Maximum attempts for each message.
+        :param max_workers (int): Maximum amount of concurrent requests.
+        :param logger (Optional(Logger)): Logger object.
+        """
+        if max_messages_per_second <= 0:
+            raise ValueError(
+                f"max_messages_per_second must be greater than 0 "
+                f"(got {max_messages_per_second})"
+            )
+        self.max_messages_per_second = max_messages_per_second
+        self.max_attempts = max_attempts
+        self.logger = logger or LOGGER
+
+        # Single pooled session to reuse connections across messages
+        self.session = requests.Session()
+        self.session.mount(
+            "https://", requests.adapters.HTTPAdapter(pool_maxsize=max_workers)
+        )
+        self.session.mount(
+            "http://", requests.adapters.HTTPAdapter(pool_maxsize=max_workers)
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="meta-dispatcher"
+        )
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._recipient_tails = {}
+
+    def wait_for_budget(self, phone_number_id: str) -> None:
+        """
+        Method to block until the sending phone ID has budget for one more message.
+
+        :param phone_number_id (str): Sending phone number ID.
+        """
+        with self._lock:
+            bucket = self._buckets.get(phone_number_id)
+            if bucket is None:
+                if TABLE_NAME_RATE_LIMITS:
+                    bucket = DistributedTokenBucket(
+                        table_name=TABLE_NAME_RATE_LIMITS,
+                        bucket_name=f"meta-{phone_number_id}",
+                        # Per-second windows (a fractional budget rounds up)
+                        max_tps=math.ceil(self.max_messages_per_second),
+                        max_tpm=0,
+                    )
+                else:
+                    bucket = LocalTokenBucket(
+                        rate_per_second=self.max_messages_per_second,
+                        # At least one message, so fractional budgets can send
+                        capacity=max(1.0, self.max_messages_per_second),
+                    )
+                self._buckets[phone_number_id] = bucket
+
+        if isinstance(bucket, DistributedTokenBucket):
+            # Over budget for too long: send anyway and rely on the 429 backoff
+            bucket.acquire(max_wait_seconds=META_MAX_BACKOFF_SECONDS)
+            return
+        while not bucket.try_consume():
+            time.sleep(1 / self.max_messages_per_second)
+
+    def _post(
+        self,
+        previous: Optional[Future],
+        endpoint: str,
+        headers: dict,
+        payload: dict,
+        phone_number_id: str,
+    ) -> requests.Response:
+        # Keep per-recipient ordering (previous message must finish first)
+        if previous is not None:
+            previous.exception()
+
+        return self.request(
+            "POST", endpoint, phone_number_id, headers=headers, json=payload
+        )
+
+    def request(
+        self, method: str, endpoint: str, phone_number_id: str, **request_kwargs
+    ) -> requests.Response:
+        """
+        Method to send a request to the Meta API in the calling thread, with the
+        same rate budget and retries as the messages (e.g. for media uploads and
+        downloads).
+
+        :param method (str): HTTP method (e.g. "GET" or "POST").
+        :param endpoint (str): Meta API endpoint.
+        :param phone_number_id (str): Sending phone number ID (for the rate budget).
+        :param request_kwargs: Additional arguments for <requests.Session.request>.
+        """
+        request_kwargs.setdefault("timeout", META_REQUEST_TIMEOUT_SECONDS)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.wait_for_budget(phone_number_id)
+            try:
+                response = self.session.request(method, endpoint, **request_kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt >= self.max_attempts:
+                    raise error
+                delay = get_retry_delay({}, attempt)
+                self.logger.warning(
+                    f"Meta API request failed ({error}), retrying in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                continue
+
+            # Successful bodies are not read here (they may be streamed)
+            body = None
+            if not response.ok:
+                try:
+                    body = response.json()
+                except ValueError:
+                    pass
+            if attempt >= self.max_attempts or not is_retryable_response(
+                response.status_code, body
+            ):
+                return response
+
+            response.close()
+            delay = get_retry_delay(response.headers, attempt)
+            self.logger.warning(
+                f"Meta API returned {response.status_code} "
+                f"(attempt {attempt}/{self.max_attempts}), retrying in {delay:.2f}s"
+            )
+            time.sleep(delay)
+
+    def submit(
+        self,
+        endpoint: str,
+        headers: dict,
+        payload: dict,
+        phone_number_id: str,
+    ) -> Future:
+        """
+        Method to enqueue a message to the Meta API (returns a Future with the response).
+
+        :param endpoint (str): Meta API endpoint for the message.
+        :param headers (dict): Headers for the request.
+        :param payload (dict): JSON body of the message (must contain "to").
+        :param phone_number_id (str): Sending phone number ID (for the rate budget).
+        """
+        recipient = payload.get("to")
+        with self._lock:
+            previous = self._recipient_tails.get(recipient)
+            future = self.executor.submit(
+                self._post, previous, endpoint, headers, payload, phone_number_id
+            )
+            self._recipient_tails[recipient] = future
+
+        def _release(done_future: Future) -> None:
+            with self._lock:
+                if self._recipient_tails.get(recipient) is done_future:
+                    del self._recipient_tails[recipient]
+
+        future.add_done_callback(_release)
+        return future
+
+    def send(
+        self,
+        endpoint: str,
+        headers: dict,
+        payload: dict,
+        phone_number_id: str,
+    ) -> requests.Response:
+        """
+        Method to send a message to the Meta API and wait for the final response.
+        Same parameters as <submit>.
+        """
+        return self.submit(endpoint, headers, payload, phone_number_id).result()
+
+
+_dispatcher: Optional[MetaOutboundDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_meta_dispatcher() -> MetaOutboundDispatcher:
+    """
+    Function to obtain the process-wide dispatcher (shared across invocations).
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = MetaOutboundDispatcher()
+        return _dispatcher
@@ -0,0 +1,116 @@
+# Built-in imports
+import os
+import threading
+import time
+from typing import Optional
+
+# Own imports
+from common.helpers.dynamodb_helper import DynamoDBHelper
+from common.logger import custom_logger
+
+
+LOGGER = custom_logger()
+
+# When available, the media IDs are shared across containers (otherwise per container)
+TABLE_NAME_MEDIA_CACHE = os.environ.get("TABLE_NAME_MEDIA_CACHE")
+
+# Meta keeps uploaded media for 30 days, so the IDs expire a bit earlier
+META_MEDIA_TTL_SECONDS = int(
+    os.environ.get("META_MEDIA_TTL_SECONDS", str(29 * 24 * 60 * 60))
+)
+
+
+class MetaMediaCache:
+    """
+    Cache of Meta media IDs by content key (stable hash) and sending phone ID, so that
+    identical documents are uploaded only once. It keeps an in-memory copy and,
+    when a table is configured, a shared copy in DynamoDB with a "ttl" attribute.
+    """
+
+    def __init__(
+        self,
+        table_name: Optional[str] = TABLE_NAME_MEDIA_CACHE,
+        ttl_seconds: int = META_MEDIA_TTL_SECONDS,
+        endpoint_url: Optional[str] = None,
+    ) -> None:
+        """
+        :param table_name (Optional(str)): DynamoDB table for the shared cache.
+        :param ttl_seconds (int): Time in seconds that each media ID is valid.
+        :param endpoint_url (Optional(str)): Endpoint for DynamoDB (only for local tests).
+        """
+        self.ttl_seconds = ttl_seconds
+        self.dynamodb_helper = (
+            DynamoDBHelper(table_name=table_name, endpoint_url=endpoint_url)
+            if table_name
+            else None
+        )
+        self._lock = threading.Lock()
+        self._memory = {}
+
+    @staticmethod
+    def _keys(content_hash: str, phone_number_id: str) -> tuple:
+        return f"MEDIA#{content_hash}", f"PHONE#{phone_number_id}"
+
+    def get(self, content_hash: str, phone_number_id: str) -> Optional[str]:
+        """
+        Method to obtain a cached media ID (None when missing or expired).
+
+        :param content_hash (str): Stable key of the media content.
+        :param phone_number_id (str): Sending phone number ID that owns the media.
+        """
+        now = time.time()
+        with self._lock:
+            media_id, expires_at = self._memory.get(
+                (content_hash, phone_number_id), (None, 0)
+            )
+        if media_id and expires_at > now:
+            return media_id
+
+        if self.dynamodb_helper is None:
+            return None
+        try:
+            item = self.dynamodb_helper.get_item_by_pk_and_sk(
+                *self._keys(content_hash, phone_number_id)
+            )
+        except Exception as error:
+            LOGGER.warning(f"Media cache lookup failed, ignoring it: {error}")
+            return None
+
+        expires_at = int(item.get("ttl", {}).get("N", 0))
+        if not item or expires_at <= now:
+            return None
+        media_id = item["media_id"]["S"]
+        with self._lock:
+            self._memory[(content_hash, phone_number_id)] = (media_id, expires_at)
+        return media_id
+
+    def put(
+        self, content_hash: str, phone_number_id: str, media_id: str, mime_type: str
+    ) -> None:
+        """
+        Method to store a media ID in the cache.
+
+        :param content_hash (str): Stable key of the media content.
+        :param phone_number_id (str): Sending phone number ID that owns the media.
+        :param media_id (str): Media ID returned by the Meta API.
+        :param mime_type (str): MIME type of the media.
+        """
+        expires_at = int(time.time()) + self.ttl_seconds
+        with self._lock:
+            self._memory[(content_hash, phone_number_id)] = (media_id, expires_at)
+
+        if self.dynamodb_helper is None:
+            return
+        partition_key, sort_key = self._keys(content_hash, phone_number_id)
+        try:
+            self.dynamodb_helper.put_item(
+                {
+                    "PK": partition_key,
+                    "SK": sort_key,
+                    "media_id": media_id,
+                    "mime_type": mime_type,
+                    "ttl": expires_at,
+                }
+            )
+        except Exception as error:
+            LOGGER.warning(f"Media cache update failed, ignoring it: {error}")
@@ -34,7 +34,9 @@ class MetaPostTextMessageModel(BaseModel):
 
 
 class DocumentModel(BaseModel):
-    link: str
+    # Either a public "link" or the "id" of a media uploaded to Meta
+    id: Optional[str] = None
+    link: Optional[str] = None
     caption: Optional[str] = None
     filename: Optional[str] = None
 
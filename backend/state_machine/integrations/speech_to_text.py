@@ -0,0 +1,254 @@
+# Built-in imports
+import asyncio
+import io
+import os
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+
+# Engine used to transcribe the voice notes ("transcribe", "faster_whisper" or
+# "stub"). Only "transcribe" (Amazon Transcribe streaming) is deployed, as its SDK
+# is shipped in the common layer. The stub is only meant for local tests
+SPEECH_TO_TEXT_ENGINE = os.environ.get("SPEECH_TO_TEXT_ENGINE", "transcribe")
+SPEECH_TO_TEXT_MODEL = os.environ.get("SPEECH_TO_TEXT_MODEL", "tiny")
+SPEECH_TO_TEXT_LANGUAGE = os.environ.get("SPEECH_TO_TEXT_LANGUAGE", "es")
+SPEECH_TO_TEXT_LANGUAGE_CODE = os.environ.get("SPEECH_TO_TEXT_LANGUAGE_CODE", "es-US")
+# Only "/tmp" is writable in Lambda (the model is downloaded once per container)
+SPEECH_TO_TEXT_MODEL_DIR = os.environ.get("SPEECH_TO_TEXT_MODEL_DIR", "/tmp/stt-models")
+SPEECH_TO_TEXT_STUB_TEXT = os.environ.get(
+    "SPEECH_TO_TEXT_STUB_TEXT",
+    "NOT IMPLEMENTED. PLEASE ANSWER: <I am not able to process voice messages yet>.",
+)
+
+# Size of each audio event sent to Amazon Transcribe
+TRANSCRIBE_EVENT_BYTES = 8 * 1024
+# Used when the Opus header doesn't tell the original sample rate
+OPUS_DEFAULT_SAMPLE_RATE_HZ = 48000
+
+
+class ChunkedStream(io.RawIOBase):
+    """
+    Read-only (and non-seekable) file-like object over an iterator of chunks, so
+    the decoders can consume the audio while it's still being downloaded.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        """
+        :param chunks (Iterable(bytes)): Chunks of the file (e.g. from Meta).
+        """
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def get_opus_sample_rate(first_chunk: bytes) -> int:
+    """
+    Function to obtain the original sample rate of an OGG/Opus file from its
+    "OpusHead" packet (always in the first page of the file).
+
+    :param first_chunk (bytes): First bytes of the OGG/Opus file.
+    """
+    index = first_chunk.find(b"OpusHead")
+    if index < 0 or len(first_chunk) < index + 16:
+        return OPUS_DEFAULT_SAMPLE_RATE_HZ
+    # "OpusHead" (8), version (1), channels (1), pre-skip (2), sample rate (4, LE)
+    sample_rate = int.from_bytes(first_chunk[index + 12 : index + 16], "little")
+    return sample_rate if 8000 <= sample_rate <= 48000 else OPUS_DEFAULT_SAMPLE_RATE_HZ
+
+
+class SpeechToTextEngine:
+    """
+    Base class for the speech-to-text engines. The audio is always received as
+    an iterator of chunks (e.g. the OGG/Opus voice notes streamed from WhatsApp),
+    so it's never staged as a whole file before being transcribed.
+    """
+
+    name: str = ""
+    # When False, the audio is not downloaded (<transcribe> receives None)
+    requires_audio: bool = True
+
+    def transcribe(
+        self, audio_chunks: Optional[Iterator[bytes]], mime_type: Optional[str] = None
+    ) -> str:
+        """
+        Method to convert the audio to text.
+
+        :param audio_chunks (Optional(Iterator(bytes))): Chunks of the audio file
+            (None when the engine doesn't require the audio).
+        :param mime_type (Optional(str)): MIME type of the audio.
+        """
+        raise NotImplementedError
+
+
+class StubSpeechToTextEngine(SpeechToTextEngine):
+    """
+    Engine that returns a fixed transcript (only for local tests).
+    """
+
+    name = "stub"
+    requires_audio = False
+
+    def __init__(self, transcript: str = SPEECH_TO_TEXT_STUB_TEXT) -> None:
+        self.transcript = transcript
+
+    def transcribe(
+        self, audio_chunks: Optional[Iterator[bytes]], mime_type: Optional[str] = None
+    ) -> str:
+        return self.transcript
+
+
+class TranscribeSpeechToTextEngine(SpeechToTextEngine):
+    """
+    Managed engine based on Amazon Transcribe streaming. The OGG/Opus chunks are
+    forwarded as they are downloaded (no decoding needed), and the transcript is
+    built while the audio is still being sent.
+    """
+
+    name = "transcribe"
+
+    def __init__(
+        self,
+        language_code: str = SPEECH_TO_TEXT_LANGUAGE_CODE,
+        region: Optional[str] = None,
+    ) -> None:
+        """
+        :param language_code (str): Language of the audio (e.g. "es-US").
+        :param region (Optional(str)): AWS region (defaults to the Lambda one).
+        """
+        self.language_code = language_code
+        self.region = region or os.environ.get("AWS_REGION", "us-east-1")
+
+    def transcribe(
+        self, audio_chunks: Optional[Iterator[bytes]], mime_type: Optional[str] = None
+    ) -> str:
+        return asyncio.run(self._transcribe(iter(audio_chunks)))
+
+    async def _transcribe(self, audio_chunks: Iterator[bytes]) -> str:
+        # Optional dependency (common layer), the client is bound to the event loop
+        from amazon_transcribe.client import TranscribeStreamingClient
+        from amazon_transcribe.model import TranscriptEvent
+
+        loop = asyncio.get_running_loop()
+
+        async def next_chunk() -> Optional[bytes]:
+            # The download is blocking, so it runs outside of the event loop
+            return await loop.run_in_executor(None, next, audio_chunks, None)
+
+        first_chunk = await next_chunk()
+        if not first_chunk:
+            return ""
+
+        stream = await TranscribeStreamingClient(
+            region=self.region
+        ).start_stream_transcription(
+            language_code=self.language_code,
+            media_sample_rate_hz=get_opus_sample_rate(first_chunk),
+            media_encoding="ogg-opus",
+        )
+
+        async def send_audio() -> None:
+            chunk = first_chunk
+            while chunk:
+                for start in range(0, len(chunk), TRANSCRIBE_EVENT_BYTES):
+                    await stream.input_stream.send_audio_event(
+                        audio_chunk=chunk[start : start + TRANSCRIBE_EVENT_BYTES]
+                    )
+                chunk = await next_chunk()
+            await stream.input_stream.end_stream()
+
+        async def read_transcript() -> list:
+            segments = []
+            async for event in stream.output_stream:
+                if not isinstance(event, TranscriptEvent):
+                    continue
+                for result in event.transcript.results:
+                    if not result.is_partial and result.alternatives:
+                        segments.append(result.alternatives[0].transcript.strip())
+            return segments
+
+        _, segments = await asyncio.gather(send_audio(), read_transcript())
+        return " ".join(segments).strip()
+
+
+class FasterWhisperSpeechToTextEngine(SpeechToTextEngine):
+    """
+    Local CPU engine based on "faster-whisper" (CTranslate2 with int8 weights).
+    The audio is decoded in memory while it's read, so nothing is written to
+    disk. Not shipped in any Lambda layer (only for local runs for now).
+    """
+
+    name = "faster_whisper"
+
+    def __init__(
+        self,
+        model_size: str = SPEECH_TO_TEXT_MODEL,
+        language: Optional[str] = SPEECH_TO_TEXT_LANGUAGE,
+        download_root: str = SPEECH_TO_TEXT_MODEL_DIR,
+    ) -> None:
+        """
+        :param model_size (str): Whisper model (e.g. "tiny", "base", "small").
+        :param language (Optional(str)): Language of the audio (None to detect it).
+        :param download_root (str): Folder to download/cache the model.
+        """
+        # Optional dependency, only needed when this engine is enabled
+        from faster_whisper import WhisperModel
+
+        self.language = language
+        self.model = WhisperModel(
+            model_size,
+            device="cpu",
+            compute_type="int8",
+            download_root=download_root,
+        )
+
+    def transcribe(
+        self, audio_chunks: Optional[Iterator[bytes]], mime_type: Optional[str] = None
+    ) -> str:
+        # The OGG container is demuxed sequentially (no seeks on the stream)
+        audio_file = io.BufferedReader(ChunkedStream(audio_chunks))
+        # Greedy decoding and VAD keep the latency low for short voice notes
+        segments, _ = self.model.transcribe(
+            audio_file,
+            language=self.language,
+            beam_size=1,
+            vad_filter=True,
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+_SPEECH_TO_TEXT_ENGINES = {
+    engine.name: engine
+    for engine in (
+        StubSpeechToTextEngine,
+        TranscribeSpeechToTextEngine,
+        FasterWhisperSpeechToTextEngine,
+    )
+}
+
+
+@lru_cache(maxsize=None)
+def get_speech_to_text_engine(name: str = SPEECH_TO_TEXT_ENGINE) -> SpeechToTextEngine:
+    """
+    Function to obtain the speech-to-text engine (loaded once per container).
+
+    :param name (str): Name of the engine ("transcribe", "faster_whisper" or "stub").
+    """
+    if name not in _SPEECH_TO_TEXT_ENGINES:
+        raise ValueError(
+            f"Speech-to-text engine <{name}> not supported. "
+            f"Allowed ones are: {list(_SPEECH_TO_TEXT_ENGINES)}"
+        )
+    return _SPEECH_TO_TEXT_ENGINES[name]()
@@ -1,19 +1,32 @@
 # Built-in imports
 import os
+import random
 import boto3
 import uuid
+from typing import Optional
 
 # Own imports
 from common.logger import custom_logger
+from state_machine.processing.bedrock_agent_trace import BedrockAgentTraceAccumulator
 
 
 ENVIRONMENT = os.environ.get("ENVIRONMENT")
+BEDROCK_TRACE_SAMPLE_RATE = float(os.environ.get("BEDROCK_TRACE_SAMPLE_RATE", "0"))
+BEDROCK_AGENT_RUNTIME_MODE = os.environ.get("BEDROCK_AGENT_RUNTIME_MODE", "aws")
 
 logger = custom_logger()
 
-# Create a bedrock runtime client
-bedrock_agent_runtime_client = boto3.client("bedrock-agent-runtime")
-ssm_client = boto3.client("ssm")
+# Create a bedrock runtime client (or its local stand-in for offline load-tests)
+if BEDROCK_AGENT_RUNTIME_MODE == "local":
+    from state_machine.processing.local_bedrock_agent_runtime import (
+        LocalBedrockAgentRuntimeClient,
+    )
+
+    bedrock_agent_runtime_client = LocalBedrockAgentRuntimeClient.from_environment()
+    ssm_client = None
+else:
+    bedrock_agent_runtime_client = boto3.client("bedrock-agent-runtime")
+    ssm_client = boto3.client("ssm")
 
 
 def get_ssm_parameter(parameter_name):
@@ -25,23 +38,43 @@ def get_ssm_parameter(parameter_name):
 
 
 def call_bedrock_agent(
-    input_text: str, unique_session_id: str = "TmpBedrockSession"
+    input_text: str,
+    unique_session_id: str = "TmpBedrockSession",
+    correlation_id: Optional[str] = None,
+    enable_trace: Optional[bool] = None,
 ) -> str:
-    # TODO: Update to use PowerTools SSM Params for optimization
-    AGENT_ALIAS_ID = get_ssm_parameter(
-        f"/{ENVIRONMENT}/rufus-bank/bedrock-agent-alias-id-full-string"
-    )
-    AGENT_ALIAS_ID = AGENT_ALIAS_ID.split("|")[-1]
-    AGENT_ID = get_ssm_parameter(f"/{ENVIRONMENT}/rufus-bank/bedrock-agent-id")
+    """
+    Invokes the Bedrock Supervisor Agent and returns the full text response.
+
+    :param input_text (str): Input text for the agent.
+    :param unique_session_id (str): Session ID for the agent (currently ignored).
+    :param correlation_id (Optional(str)): Correlation ID to tag the trace metrics with.
+    :param enable_trace (Optional(bool)): Force the trace mode on/off (default is sampled
+        with the <BEDROCK_TRACE_SAMPLE_RATE> env var).
+    """
+    if BEDROCK_AGENT_RUNTIME_MODE == "local":
+        AGENT_ALIAS_ID, AGENT_ID = "LOCAL_AGENT_ALIAS_ID", "LOCAL_AGENT_ID"
+    else:
+        # TODO: Update to use PowerTools SSM Params for optimization
+        AGENT_ALIAS_ID = get_ssm_parameter(
+            f"/{ENVIRONMENT}/rufus-bank/bedrock-agent-alias-id-full-string"
+        )
+        AGENT_ALIAS_ID = AGENT_ALIAS_ID.split("|")[-1]
+        AGENT_ID = get_ssm_parameter(f"/{ENVIRONMENT}/rufus-bank/bedrock-agent-id")
 
     # Always generate a new UUID (temp validations)
     unique_session_id = str(uuid.uuid4())
     logger.debug(f"Generated new UUID for session: {unique_session_id}")
 
+    # Sampled trace mode to obtain per-hop latencies and token usage
+    if enable_trace is None:
+        enable_trace = random.random() < BEDROCK_TRACE_SAMPLE_RATE
+    trace_accumulator = BedrockAgentTraceAccumulator() if enable_trace else None
+
     response = bedrock_agent_runtime_client.invoke_agent(
         agentAliasId=AGENT_ALIAS_ID,
         agentId=AGENT_ID,
-        enableTrace=False,
+        enableTrace=enable_trace,
         inputText=input_text,
         # TODO: Validate best approach/performance...
         # sessionId=unique_session_id,  # Session id to cross-reference history
@@ -53,11 +86,22 @@ def call_bedrock_agent(
     text_response = ""
     if stream:
         for event in stream:
+            if "trace" in event:
+                if trace_accumulator:
+                    trace_accumulator.add_trace_event(event["trace"])
+                continue
             chunk = event.get("chunk")
+            if chunk is None:
+                continue
             logger.info("-----")
+            if trace_accumulator:
+                trace_accumulator.add_chunk()
             text_response += chunk.get("bytes").decode()
     logger.info(text_response)
 
+    if trace_accumulator:
+        trace_accumulator.emit_metrics(correlation_id=correlation_id)
+
     # TODO: Add better error handling and validations/checks
 
     return text_response
@@ -0,0 +1,208 @@
+# Built-in imports
+import time
+from collections import defaultdict
+from typing import Optional
+
+# External imports
+from aws_lambda_powertools.metrics import MetricUnit
+
+# Own imports
+from common.logger import custom_logger
+from common.metrics import emit_metric
+
+
+logger = custom_logger()
+
+# Orchestration "invocationInput/observation" types mapped to the hop names
+INVOCATION_TYPES_TO_HOPS = {
+    "ACTION_GROUP": "action_group",
+    "KNOWLEDGE_BASE": "knowledge_base",
+    "AGENT_COLLABORATOR": "agent_collaborator",
+}
+
+# Non-orchestration trace types mapped to the hop names
+TRACE_TYPES_TO_HOPS = {
+    "preProcessingTrace": "pre_processing",
+    "postProcessingTrace": "post_processing",
+    "routingClassifierTrace": "routing_classifier",
+    "guardrailTrace": "guardrail",
+}
+
+
+class BedrockAgentTraceAccumulator:
+    """
+    Class that parses the Bedrock Agent trace events from the <invoke_agent>
+    stream and accumulates per-hop latencies, token usage and tool calls.
+
+    Hops are named as "<agent>:<hop>", where <agent> is "supervisor" or the
+    collaborator name, and <hop> is "model", "action_group", "knowledge_base",
+    "agent_collaborator", "pre_processing", etc.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.first_chunk_ms: Optional[float] = None
+        self.hop_durations_ms = defaultdict(float)
+        self.hop_counts = defaultdict(int)
+        self.input_tokens = defaultdict(int)
+        self.output_tokens = defaultdict(int)
+        self.action_group_calls = defaultdict(int)
+        self.failures = 0
+
+        # Spans that are still open, by (agent, trace_id, hop)
+        self._open_spans = {}
+
+    def _elapsed_ms(self, started_at: float) -> float:
+        return (time.monotonic() - started_at) * 1000
+
+    def _open_span(self, agent: str, trace_id: str, hop: str) -> None:
+        self._open_spans[(agent, trace_id, hop)] = time.monotonic()
+
+    def _close_span(
+        self, agent: str, trace_id: str, hop: str, metadata: Optional[dict] = None
+    ) -> None:
+        started_at = self._open_spans.pop((agent, trace_id, hop), None)
+
+        # Prefer the service-side duration when the trace metadata includes it
+        duration_ms = (metadata or {}).get("totalTimeMs")
+        if duration_ms is None and started_at is not None:
+            duration_ms = self._elapsed_ms(started_at)
+        if duration_ms is None:
+            return
+
+        self.hop_durations_ms[f"{agent}:{hop}"] += float(duration_ms)
+        self.hop_counts[f"{agent}:{hop}"] += 1
+
+    def _add_usage(self, agent: str, metadata: Optional[dict]) -> None:
+        usage = (metadata or {}).get("usage", {})
+        self.input_tokens[agent] += int(usage.get("inputTokens", 0))
+        self.output_tokens[agent] += int(usage.get("outputTokens", 0))
+
+    def add_chunk(self) -> None:
+        """
+        Method to register the arrival of a completion chunk.
+        """
+        if self.first_chunk_ms is None:
+            self.first_chunk_ms = self._elapsed_ms(self.started_at)
+
+    def add_trace_event(self, trace_event: dict) -> None:
+        """
+        Method to parse a single "trace" event from the <invoke_agent> stream.
+        :param trace_event (dict): Value of the "trace" key of the stream event.
+        """
+        agent = trace_event.get("collaboratorName") or "supervisor"
+        trace = trace_event.get("trace", {})
+
+        for trace_type, trace_data in trace.items():
+            if trace_type == "orchestrationTrace":
+                self._add_orchestration_trace(agent, trace_data)
+            elif trace_type == "failureTrace":
+                self.failures += 1
+            elif trace_type in TRACE_TYPES_TO_HOPS:
+                hop = TRACE_TYPES_TO_HOPS[trace_type]
+                model_input = trace_data.get("modelInvocationInput")
+                model_output = trace_data.get("modelInvocationOutput")
+                if model_input:
+                    self._open_span(agent, model_input.get("traceId"), hop)
+                if model_output:
+                    metadata = model_output.get("metadata")
+                    self._close_span(agent, model_output.get("traceId"), hop, metadata)
+                    self._add_usage(agent, metadata)
+
+    def _add_orchestration_trace(self, agent: str, trace_data: dict) -> None:
+        if "modelInvocationInput" in trace_data:
+            model_input = trace_data["modelInvocationInput"]
+            self._open_span(agent, model_input.get("traceId"), "model")
+
+        if "modelInvocationOutput" in trace_data:
+            model_output = trace_data["modelInvocationOutput"]
+            metadata = model_output.get("metadata")
+            self._close_span(agent, model_output.get("traceId"), "model", metadata)
+            self._add_usage(agent, metadata)
+
+        if "invocationInput" in trace_data:
+            invocation_input = trace_data["invocationInput"]
+            hop = INVOCATION_TYPES_TO_HOPS.get(invocation_input.get("invocationType"))
+            if hop:
+                self._open_span(agent, invocation_input.get("traceId"), hop)
+            if hop == "action_group":
+                action_group = invocation_input.get("actionGroupInvocationInput", {})
+                name = action_group.get("actionGroupName", "UNKNOWN")
+                self.action_group_calls[name] += 1
+
+        if "observation" in trace_data:
+            observation = trace_data["observation"]
+            hop = INVOCATION_TYPES_TO_HOPS.get(observation.get("type"))
+            if hop:
+                self._close_span(agent, observation.get("traceId"), hop)
+
+    def summary(self) -> dict:
+        """
+        Method to obtain the accumulated results as a dictionary.
+        """
+        return {
+            "total_ms": self._elapsed_ms(self.started_at),
+            "first_chunk_ms": self.first_chunk_ms,
+            "hop_durations_ms": dict(self.hop_durations_ms),
+            "hop_counts": dict(self.hop_counts),
+            "input_tokens": dict(self.input_tokens),
+            "output_tokens": dict(self.output_tokens),
+            "action_group_calls": dict(self.action_group_calls),
+            "failures": self.failures,
+        }
+
+    def emit_metrics(self, correlation_id: Optional[str] = None) -> None:
+        """
+        Method to emit the accumulated results as CloudWatch metrics.
+        :param correlation_id (Optional(str)): Correlation ID to tag the metrics with.
+        """
+        summary = self.summary()
+        logger.info(summary, message_details="Bedrock Agent trace summary")
+        metadata = {"correlation_id": correlation_id}
+
+        emit_metric(
+            "BedrockAgentTotalDuration",
+            summary["total_ms"],
+            unit=MetricUnit.Milliseconds,
+            metadata=metadata,
+        )
+        if summary["first_chunk_ms"] is not None:
+            emit_metric(
+                "BedrockAgentFirstChunkLatency",
+                summary["first_chunk_ms"],
+                unit=MetricUnit.Milliseconds,
+                metadata=metadata,
+            )
+        for hop, duration_ms in summary["hop_durations_ms"].items():
+            emit_metric(
+                "BedrockAgentHopDuration",
+                duration_ms,
+                unit=MetricUnit.Milliseconds,
+                dimensions={"hop": hop},
+                metadata=metadata,
+            )
+        for agent, tokens in summary["input_tokens"].items():
+            emit_metric(
+                "BedrockAgentInputTokens",
+                tokens,
+                dimensions={"agent": agent},
+                metadata=metadata,
+            )
+        for agent, tokens in summary["output_tokens"].items():
+            emit_metric(
+                "BedrockAgentOutputTokens",
+                tokens,
+                dimensions={"agent": agent},
+                metadata=metadata,
+            )
+        for action_group, calls in summary["action_group_calls"].items():
+            emit_metric(
+                "BedrockAgentActionGroupCalls",
+                calls,
+                dimensions={"action_group": action_group},
+                metadata=metadata,
+            )
+        if summary["failures"]:
+            emit_metric(
+                "BedrockAgentTraceFailures", summary["failures"], metadata=metadata
+            )
@@ -0,0 +1,218 @@
+################################################################################
+# Deterministic local stand-in for the "bedrock-agent-runtime" boto3 client.
+# Only intended for local tests/load-tests without network access.
+################################################################################
+
+# Built-in imports
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+# External imports
+from botocore.exceptions import ClientError
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Log-normal latency distribution defined by its median and p99 (milliseconds).
+    A p99 equal to the median gives a fixed latency.
+    """
+
+    median_ms: float
+    p99_ms: float
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = max(0.0, math.log(self.p99_ms / self.median_ms) / 2.326)
+        return rng.lognormvariate(math.log(self.median_ms), sigma)
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Class that represents the behaviour of the local Bedrock Agent runtime.
+
+    Attributes:
+        first_chunk: LatencyDistribution: Time until the first completion chunk.
+        inter_chunk: LatencyDistribution: Time between consecutive chunks.
+        min_chunks: int: Minimum amount of chunks per completion.
+        max_chunks: int: Maximum amount of chunks per completion.
+        empty_response_rate: float: Probability of a completion without chunks.
+        throttling_rate: float: Probability of a ThrottlingException on invoke_agent.
+        stream_throttling_rate: float: Probability of a throttling error mid-stream.
+        response_text: str: Text that is split across the completion chunks.
+    """
+
+    first_chunk: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution(1500, 6000)
+    )
+    inter_chunk: LatencyDistribution = field(
+        default_factory=lambda: LatencyDistribution(30, 200)
+    )
+    min_chunks: int = 1
+    max_chunks: int = 5
+    empty_response_rate: float = 0.05
+    throttling_rate: float = 0.0
+    stream_throttling_rate: float = 0.0
+    response_text: str = (
+        "Hola, soy Ruffy, tu asistente de Rufus Bank. ¿Cómo puedo ayudarte hoy?"
+    )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyProfile":
+        data = dict(data)
+        for key in ("first_chunk", "inter_chunk"):
+            if key in data:
+                data[key] = LatencyDistribution(**data[key])
+        return cls(**data)
+
+
+# Predefined profiles (can be selected with the <LOCAL_BEDROCK_PROFILE> env var)
+LATENCY_PROFILES = {
+    "instant": LatencyProfile(
+        first_chunk=LatencyDistribution(0, 0),
+        inter_chunk=LatencyDistribution(0, 0),
+        empty_response_rate=0.0,
+    ),
+    "typical": LatencyProfile(),
+    "slow": LatencyProfile(
+        first_chunk=LatencyDistribution(5000, 20000),
+        inter_chunk=LatencyDistribution(100, 800),
+        empty_response_rate=0.1,
+    ),
+    "throttled": LatencyProfile(
+        throttling_rate=0.3,
+        stream_throttling_rate=0.05,
+    ),
+}
+
+
+class LocalBedrockAgentRuntimeClient:
+    """
+    Drop-in replacement for the boto3 "bedrock-agent-runtime" client (only the
+    <invoke_agent> operation), that produces chunked "completion" streams with
+    configurable latencies and failures.
+
+    Every invocation uses its own random generator derived from the seed and the
+    invocation number, so the same sequence of calls is always reproducible.
+    """
+
+    def __init__(
+        self,
+        profile: Optional[LatencyProfile] = None,
+        seed: int = 0,
+        time_scale: float = 1.0,
+    ) -> None:
+        """
+        :param profile (Optional(LatencyProfile)): Behaviour of the fake runtime.
+        :param seed (int): Seed for the deterministic random generators.
+        :param time_scale (float): Multiplier for all latencies (0 to disable sleeps).
+        """
+        self.profile = profile or LatencyProfile()
+        self.seed = seed
+        self.time_scale = time_scale
+        self.invocations = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> "LocalBedrockAgentRuntimeClient":
+        """
+        Method to create the client from the <LOCAL_BEDROCK_*> environment variables.
+        The profile can be a predefined profile name or a JSON object.
+        """
+        profile_value = os.environ.get("LOCAL_BEDROCK_PROFILE", "typical")
+        if profile_value.strip().startswith("{"):
+            profile = LatencyProfile.from_dict(json.loads(profile_value))
+        else:
+            profile = LATENCY_PROFILES[profile_value]
+        return cls(
+            profile=profile,
+            seed=int(os.environ.get("LOCAL_BEDROCK_SEED", "0")),
+            time_scale=float(os.environ.get("LOCAL_BEDROCK_TIME_SCALE", "1")),
+        )
+
+    def _sleep(self, milliseconds: float) -> None:
+        if self.time_scale > 0 and milliseconds > 0:
+            time.sleep(milliseconds * self.time_scale / 1000)
+
+    def _throttling_error(self) -> ClientError:
+        return ClientError(
+            {
+                "Error": {
+                    "Code": "ThrottlingException",
+                    "Message": "Rate exceeded (local Bedrock Agent runtime)",
+                },
+                "ResponseMetadata": {"HTTPStatusCode": 429},
+            },
+            "InvokeAgent",
+        )
+
+    def _completion(self, rng: random.Random, enable_trace: bool) -> Iterator[dict]:
+        profile = self.profile
+        self._sleep(profile.first_chunk.sample(rng))
+
+        if enable_trace:
+            yield {
+                "trace": {
+                    "trace": {
+                        "orchestrationTrace": {
+                            "modelInvocationInput": {"traceId": "local-trace"}
+                        }
+                    }
+                }
+            }
+            yield {
+                "trace": {
+                    "trace": {
+                        "orchestrationTrace": {
+                            "modelInvocationOutput": {
+                                "traceId": "local-trace",
+                                "metadata": {
+                                    "usage": {"inputTokens": 0, "outputTokens": 0}
+                                },
+                            }
+                        }
+                    }
+                }
+            }
+
+        if rng.random() < profile.empty_response_rate:
+            return
+
+        text = profile.response_text.encode()
+        total_chunks = max(1, rng.randint(profile.min_chunks, profile.max_chunks))
+        chunk_size = max(1, math.ceil(len(text) / total_chunks))
+        for index, start in enumerate(range(0, len(text), chunk_size)):
+            if index > 0:
+                self._sleep(profile.inter_chunk.sample(rng))
+                if rng.random() < profile.stream_throttling_rate:
+                    raise self._throttling_error()
+            yield {"chunk": {"bytes": text[start : start + chunk_size]}}
+
+    def invoke_agent(self, **kwargs) -> dict:
+        """
+        Method that mimics <bedrock-agent-runtime.invoke_agent>.
+        """
+        with self._lock:
+            invocation_number = self.invocations
+            self.invocations += 1
+        rng = random.Random(f"{self.seed}-{invocation_number}")
+
+        if rng.random() < self.profile.throttling_rate:
+            raise self._throttling_error()
+
+        session_id = kwargs.get("sessionId") or str(uuid.uuid4())
+        return {
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+            "contentType": "application/json",
+            "sessionId": session_id,
+            "completion": self._completion(rng, bool(kwargs.get("enableTrace"))),
+        }
@@ -0,0 +1,69 @@
+# Built-in imports
+import re
+
+
+# WhatsApp Cloud API limit for the "text.body" of a message
+# https://developers.facebook.com/docs/whatsapp/cloud-api/reference/messages#text-object
+META_MAX_TEXT_LENGTH = 4096
+
+# Boundaries in order of preference (paragraphs, lines, sentences and words)
+_SPLIT_PATTERNS = [
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?;:])\s+"),
+    re.compile(r"\s+"),
+]
+
+
+def _split_at_boundary(text: str, max_length: int, level: int = 0) -> list:
+    if len(text) <= max_length:
+        return [text]
+    if level >= len(_SPLIT_PATTERNS):
+        # No boundary available (e.g. a very long URL), so it is a hard split
+        return [text[i : i + max_length] for i in range(0, len(text), max_length)]
+
+    segments = []
+    current = ""
+    position = 0
+    pieces = []
+    for match in _SPLIT_PATTERNS[level].finditer(text):
+        pieces.append((text[position : match.start()], match.group()))
+        position = match.end()
+    pieces.append((text[position:], ""))
+
+    for piece, separator in pieces:
+        if len(piece) > max_length:
+            if current.strip():
+                segments.append(current)
+            segments.extend(_split_at_boundary(piece, max_length, level + 1))
+            current = ""
+        elif len(current) + len(piece) > max_length:
+            if current.strip():
+                segments.append(current)
+            current = piece
+        else:
+            current += piece
+        # Keep the separator only if it still fits (it is dropped at the edges)
+        if current and len(current) + len(separator) <= max_length:
+            current += separator
+
+    if current.strip():
+        segments.append(current)
+    return segments
+
+
+def split_message(text: str, max_length: int = META_MAX_TEXT_LENGTH) -> list:
+    """
+    Function to split a long message in segments that fit in a WhatsApp text
+    message. It splits at paragraph boundaries first, then lines, sentences and
+    words, and only splits inside a word when there is no other option.
+
+    :param text (str): Message to split.
+    :param max_length (int): Maximum length of each segment.
+    :returns: list of non-empty segments (in order).
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    segments = [segment.strip() for segment in _split_at_boundary(text, max_length)]
+    return [segment for segment in segments if segment]
@@ -0,0 +1,59 @@
+# Built-in imports
+import time
+
+# Own imports
+from state_machine.base_step_function import BaseStepFunction
+from state_machine.integrations.meta.api_requests import MetaAPI
+from state_machine.integrations.image_analysis import (
+    get_image_analysis_engine,
+    resize_image,
+)
+from common.logger import custom_logger
+
+
+logger = custom_logger()
+
+
+class ProcessImage(BaseStepFunction):
+    """
+    This class contains methods that serve as the "image processing" for the State Machine.
+    """
+
+    def __init__(self, event):
+        super().__init__(event, logger=logger)
+
+    def process_image(self):
+        """
+        Method to process the image input message and convert it to text (its
+        description and the caption). The text is then processed as a regular
+        text message.
+        """
+
+        self.logger.info("Starting process_image for the chatbot")
+
+        media_id = self.new_image["media_id"]["S"]  # Intentionally fail if not found!
+        caption = self.get_new_image_attribute("caption").get("S")
+
+        # The image is streamed from Meta and resized in memory (never saved to disk)
+        started_at = time.perf_counter()
+        image_file, mime_type = MetaAPI(logger=self.logger).download_media(media_id)
+        original_size = image_file.getbuffer().nbytes
+        image_content = resize_image(image_file)
+        resized_at = time.perf_counter()
+
+        description = get_image_analysis_engine().analyze(image_content, caption)
+        self.logger.info(
+            f"Image analyzed ({mime_type}, {original_size} -> {len(image_content)} "
+            f"bytes, download+resize: {resized_at - started_at:.3f}s, "
+            f"analysis: {time.perf_counter() - resized_at:.3f}s)"
+        )
+
+        self.text = f"[Image sent by the user: {description}]"
+        if caption:
+            self.text = f"{caption}\n{self.text}"
+        self.logger.info(f"Generated image text: {self.text}")
+
+        # Continue as a text message (the next steps read the "text" attribute)
+        self.set_new_image_attribute("text", {"S": self.text})
+
+        return self.event
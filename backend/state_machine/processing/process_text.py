@@ -1,9 +1,17 @@
 # Built-in imports
+import os
 from datetime import datetime
+from typing import Optional
 
 # Own imports
 from state_machine.base_step_function import BaseStepFunction
 from common.enums import WhatsAppMessageTypes
+from common.helpers.dynamodb_helper import DynamoDBHelper
+from common.helpers.rate_limiter import DistributedTokenBucket, estimate_tokens
+from common.helpers.user_profile_snapshot import (
+    UserProfileSnapshot,
+    format_snapshot_for_prompt,
+)
 from common.logger import custom_logger
 
 # TODO: Add bedrock_agent helper
@@ -13,6 +21,32 @@ from state_machine.processing.bedrock_agent import call_bedrock_agent
 logger = custom_logger()
 ALLOWED_MESSAGE_TYPES = WhatsAppMessageTypes.__members__
 
+# Admission control for Bedrock (disabled if no rate limits table is configured)
+TABLE_NAME_RATE_LIMITS = os.environ.get("TABLE_NAME_RATE_LIMITS")
+BEDROCK_MAX_TPS = int(os.environ.get("BEDROCK_MAX_TPS", "0"))
+BEDROCK_MAX_TPM = int(os.environ.get("BEDROCK_MAX_TPM", "0"))
+BEDROCK_MAX_QUEUE_SECONDS = float(os.environ.get("BEDROCK_MAX_QUEUE_SECONDS", "5"))
+BUSY_RESPONSE_MESSAGE = "Ruffy está atendiendo muchas solicitudes en este momento. Por favor intenta de nuevo en unos segundos..."
+
+bedrock_rate_limiter = (
+    DistributedTokenBucket(
+        table_name=TABLE_NAME_RATE_LIMITS,
+        bucket_name="bedrock-agent",
+        max_tps=BEDROCK_MAX_TPS,
+        max_tpm=BEDROCK_MAX_TPM,
+    )
+    if TABLE_NAME_RATE_LIMITS
+    else None
+)
+
+# Agents-data table, to pre-seed the prompt with the user context (profile snapshot)
+TABLE_NAME_AGENTS_DATA = os.environ.get("TABLE_NAME_AGENTS_DATA")
+user_profile_snapshot = (
+    UserProfileSnapshot(DynamoDBHelper(TABLE_NAME_AGENTS_DATA))
+    if TABLE_NAME_AGENTS_DATA
+    else None
+)
+
 
 class ProcessText(BaseStepFunction):
     """
@@ -30,13 +64,7 @@ class ProcessText(BaseStepFunction):
         self.logger.info("Starting process_text for the chatbot")
 
         # TODO: Add more robust "text processing" logic here (actual response)
-        self.text = (
-            self.event.get("input", {})
-            .get("dynamodb", {})
-            .get("NewImage", {})
-            .get("text", {})
-            .get("S", "DEFAULT_RESPONSE")
-        )
+        self.text = self.get_new_image_attribute("text").get("S", "DEFAULT_RESPONSE")
 
         phone_number = (
             self.event.get("input", {})
@@ -53,10 +81,13 @@ class ProcessText(BaseStepFunction):
         # )
 
         # Add extra params to the text input
+        user_context = self.get_user_context(phone_number)
+        user_context = f"user_context:\n{user_context}\n" if user_context else ""
         self.text = (
             f"<REQUEST>"
             f"input: {self.text}\n"
             f"from_number: {phone_number}\n"
+            f"{user_context}"
             f"Answer in same language as input. Use UTF-8 format."
             f"</REQUEST>"
         )
@@ -67,7 +98,20 @@ class ProcessText(BaseStepFunction):
         retries = 0
 
         while retries < total_retries:
-            self.response_message = call_bedrock_agent(str(self.text), phone_number)
+            # Queue (or shed) the request before hitting Bedrock when over budget
+            if bedrock_rate_limiter and not bedrock_rate_limiter.acquire(
+                cost=estimate_tokens(self.text),
+                max_wait_seconds=BEDROCK_MAX_QUEUE_SECONDS,
+            ):
+                self.logger.warning("Bedrock budget exceeded, shedding request")
+                self.response_message = BUSY_RESPONSE_MESSAGE
+                break
+
+            self.response_message = call_bedrock_agent(
+                str(self.text),
+                phone_number,
+                correlation_id=self.correlation_id,
+            )
             if self.response_message:  # Check if response is not empty
                 break
             retries += 1
@@ -83,3 +127,21 @@ class ProcessText(BaseStepFunction):
         self.event["response_message"] = self.response_message
 
         return self.event
+
+    def get_user_context(self, phone_number: str) -> Optional[str]:
+        """
+        Method to obtain the summary of the user profile snapshot (kept up to
+        date from the agents-data stream and warmed up on authentication), so
+        the agent has the user context without calling the action groups.
+        Errors are only logged (best-effort).
+
+        :param phone_number (str): Phone number of the user (the user ID for now).
+        """
+        if not user_profile_snapshot or not phone_number:
+            return None
+        try:
+            snapshot = user_profile_snapshot.get(phone_number)
+        except Exception as error:
+            self.logger.warning(f"Could not load the user context: {error}")
+            return None
+        return format_snapshot_for_prompt(snapshot) if snapshot else None
@@ -1,17 +1,21 @@
 # Built-in imports
-from datetime import datetime
+import time
 
 # Own imports
 from state_machine.base_step_function import BaseStepFunction
+from state_machine.integrations.meta.api_requests import MetaAPI
+from state_machine.integrations.speech_to_text import get_speech_to_text_engine
 from common.enums import WhatsAppMessageTypes
 from common.logger import custom_logger
 
-# from state_machine.processing.bedrock_agent import call_bedrock_agent
-
 
 logger = custom_logger()
 ALLOWED_MESSAGE_TYPES = WhatsAppMessageTypes.__members__
 
+EMPTY_TRANSCRIPT_TEXT = (
+    "PLEASE ANSWER: <I could not understand the voice message, please repeat it>."
+)
+
 
 class ProcessVoice(BaseStepFunction):
     """
@@ -23,17 +27,33 @@ class ProcessVoice(BaseStepFunction):
 
     def process_voice(self):
         """
-        Method to process the voice input message and convert it to text.
+        Method to process the voice input message and convert it to text. The
+        transcript is then processed as a regular text message.
         """
 
         self.logger.info("Starting process_voice for the chatbot")
 
-        # TODO: Add real voice to text conversion here...
-
-        self.text = "NOT IMPLEMENTED. PLEASE ANSWER: <I am not able to process voice messages yet>."
-
-        self.logger.info(f"Generated response message: {self.text}")
-
-        self.event["input"]["dynamodb"]["NewImage"]["S"] = self.text
+        media_id = self.new_image["media_id"]["S"]  # Intentionally fail if not found!
+
+        # The voice note chunks are transcribed while they are streamed from Meta
+        # (never staged as a whole file), and only when the engine uses them
+        speech_to_text_engine = get_speech_to_text_engine()
+        started_at = time.perf_counter()
+        audio_chunks, mime_type = None, None
+        if speech_to_text_engine.requires_audio:
+            audio_chunks, mime_type = MetaAPI(logger=self.logger).stream_media(media_id)
+
+        self.text = (
+            speech_to_text_engine.transcribe(audio_chunks, mime_type)
+            or EMPTY_TRANSCRIPT_TEXT
+        )
+        self.logger.info(
+            f"Voice note transcribed with <{speech_to_text_engine.name}> "
+            f"(download+transcription: {time.perf_counter() - started_at:.3f}s)"
+        )
+        self.logger.info(f"Generated transcript: {self.text}")
+
+        # Continue as a text message (the next steps read the "text" attribute)
+        self.set_new_image_attribute("text", {"S": self.text})
 
         return self.event
@@ -1,11 +1,36 @@
+# Built-in imports
+import os
+
 # Own imports
 from state_machine.base_step_function import BaseStepFunction
-from state_machine.integrations.meta.api_requests import MetaAPI
+from state_machine.integrations.meta.async_api_requests import AsyncMetaAPI
+from state_machine.processing.message_segmenter import split_message
 from common.logger import custom_logger
+from common.helpers.dynamodb_helper import DynamoDBHelper
+from common.helpers.conversation_history import ConversationHistory
+from common.helpers.outbound_messages import outbound_messages
 
 
 logger = custom_logger()
 
+# Messages table, where the bounded conversation history of each user is kept
+DYNAMODB_TABLE = os.environ.get("DYNAMODB_TABLE")
+conversation_history = (
+    ConversationHistory(DynamoDBHelper(table_name=DYNAMODB_TABLE))
+    if DYNAMODB_TABLE
+    else None
+)
+
+# Rounds to resume the delivery of the pending segments (before failing the step)
+META_SEGMENT_SEND_ROUNDS = int(os.environ.get("META_SEGMENT_SEND_ROUNDS", "3"))
+
+
+class PartialDeliveryError(Exception):
+    """
+    Raised when only some of the segments were delivered. The State Machine does
+    not retry it (the step would send again the segments the user already has).
+    """
+
 
 class SendMessage(BaseStepFunction):
     """
@@ -44,25 +69,86 @@ class SendMessage(BaseStepFunction):
         if "(2)" in text_message and "(3)" in text_message:
             text_message = "Basado en tu perfil de riesgo moderado, te recomiendo invertir en RUFUS-CDT o RUFUS-FIC."
 
+        # Long answers are split in segments that fit in a WhatsApp message
+        segments = split_message(text_message)
+        self.logger.info(f"Sending response message in {len(segments)} segment(s)")
+
         # Initialize the Meta API
-        meta_api = MetaAPI(logger=self.logger)
-        response = meta_api.post_text_message(
-            text_message=text_message,
-            to_phone_number=phone_number,
-            original_message_id=original_message_id,
-        )
+        meta_api = AsyncMetaAPI(logger=self.logger)
+        sent_message_ids = []
+        for send_round in range(1, META_SEGMENT_SEND_ROUNDS + 1):
+            # Resume from the first segment that was not delivered (keeps the order)
+            pending_segments = segments[len(sent_message_ids) :]
+            results = meta_api.send_many_sync(
+                [
+                    meta_api.build_text_message_payload(
+                        text_message=segment,
+                        to_phone_number=phone_number,
+                        # Only the first segment is threaded to the original message
+                        original_message_id=(
+                            original_message_id
+                            if len(sent_message_ids) + position == 0
+                            else None
+                        ),
+                    )
+                    for position, segment in enumerate(pending_segments)
+                ],
+                stop_on_error=True,
+            )
 
-        self.logger.debug(
-            response,
-            message_details="POST WhatsApp Message Meta API Response",
-        )
+            self.logger.debug(
+                [result.response for result in results],
+                message_details="POST WhatsApp Message Meta API Response",
+            )
 
-        if "error" in response:
+            for result in results:
+                # Recorded in memory, saved at the end of the invocation (write-behind)
+                outbound_messages.record(
+                    phone_number=phone_number,
+                    text=pending_segments[result.index],
+                    message_id=result.message_id,
+                    latency_ms=result.latency_ms,
+                    correlation_id=self.correlation_id,
+                    status="SENT" if result.ok else "FAILED",
+                )
+            for result in results:
+                if not result.ok:
+                    break
+                sent_message_ids.append(result.message_id)
+            if len(sent_message_ids) == len(segments):
+                break
+
+            self.logger.warning(
+                f"Delivered {len(sent_message_ids)}/{len(segments)} segments "
+                f"(round {send_round}/{META_SEGMENT_SEND_ROUNDS})"
+            )
+
+        if len(sent_message_ids) < len(segments):
             self.logger.error(
-                response,
+                [result.response for result in results if not result.ok],
                 message_details="Error in POST WhatsApp Message Meta API Response",
             )
+            if sent_message_ids:
+                raise PartialDeliveryError(
+                    f"Only {len(sent_message_ids)}/{len(segments)} segments were "
+                    f"delivered: {sent_message_ids}"
+                )
             raise Exception("Error in POST WhatsApp Message Meta API Response")
 
+        if conversation_history:
+            try:
+                conversation_history.append(
+                    phone_number=phone_number,
+                    role="assistant",
+                    text=text_message,
+                    message_id=sent_message_ids[0] if sent_message_ids else None,
+                    correlation_id=self.correlation_id,
+                )
+            except Exception as error:
+                self.logger.warning(
+                    f"Could not update the conversation history: {error}"
+                )
+
+        self.event["sent_message_ids"] = sent_message_ids
         self.event["send_message_response_status_code"] = 200
         return self.event
@@ -4,6 +4,7 @@ from aws_lambda_powertools.utilities.typing import LambdaContext
 
 # Own imports
 from state_machine.__init__ import *  # noqa NOSONAR
+from common.helpers.outbound_messages import outbound_messages
 
 
 logger = Logger(
@@ -44,3 +45,9 @@ def lambda_handler(event: dict, context: LambdaContext):
         logger.exception(f"Lambda Initial Event was: {event}")
         logger.exception(f"Lambda Main Event was: {main_event}")
         raise e
+    finally:
+        # Write-behind of the outbound messages (after the step finished)
+        try:
+            outbound_messages.flush()
+        except Exception as e:
+            logger.exception(f"Error while saving the outbound messages: {e}")
@@ -1,5 +1,7 @@
 # Built-in imports
+import json
 import os
+import time
 
 
 # Local Imports
@@ -18,6 +20,9 @@ logger = custom_logger()
 ALLOWED_MESSAGE_TYPES = [member.value for member in WhatsAppMessageTypes]
 AUTH_ENABLED = os.environ.get("AUTH_ENABLED", "false")
 
+# Unauthenticated messages are replayed if the user authenticates within this time
+PENDING_MESSAGE_TTL_SECONDS = int(os.environ.get("PENDING_MESSAGE_TTL_SECONDS", "900"))
+
 
 class ValidateMessage(BaseStepFunction):
     """
@@ -55,19 +60,19 @@ class ValidateMessage(BaseStepFunction):
                 f"Message type <{self.message_type}> is not allowed. Allowed ones are: {ALLOWED_MESSAGE_TYPES}"
             )
 
+        # Obtain from_number from the DynamoDB Stream event
+        phone_number = (
+            self.event.get("input", {})
+            .get("dynamodb", {})
+            .get("NewImage", {})
+            .get("from_number", {})
+            .get("S")
+        )
+
         # ADDITIONAL CHECKS FOR AUTH IF ENABLED
         if AUTH_ENABLED == "true":
             logger.debug("Auth enabled, proceeding to check session status...")
 
-            # Obtain from_number from the DynamoDB Stream event
-            phone_number = (
-                self.event.get("input", {})
-                .get("dynamodb", {})
-                .get("NewImage", {})
-                .get("from_number", {})
-                .get("S")
-            )
-
             # Check if active session in DynamoDB
             result = self.dynamodb_helper.get_item_by_pk_and_sk(
                 partition_key=f"USER#{phone_number}",
@@ -84,6 +89,7 @@ class ValidateMessage(BaseStepFunction):
                 self.event["response_message"] = (
                     "Buenos días! Gracias por comunicarte con Rufus Bank.\n Para proceder, debes autenticarte: - https://rufus-auth.san99tiago.com"  # Enforce user auth if ENV VAR ENABLED
                 )
+                self.park_pending_message(phone_number)
 
         self.logger.info("Validation finished successfully")
 
@@ -112,3 +118,20 @@ class ValidateMessage(BaseStepFunction):
         self.event["message_type"] = self.message_type
 
         return self.event
+
+    def park_pending_message(self, phone_number: str) -> None:
+        """
+        Method to save the unauthenticated message of the user, so it can be
+        processed as soon as the user authenticates (without asking again).
+        Only the latest message is kept.
+        """
+        self.dynamodb_helper.put_item(
+            {
+                "PK": f"USER#{phone_number}",
+                "SK": "PENDING",
+                "input": json.dumps(self.event.get("input", {})),
+                "correlation_id": self.correlation_id,
+                "ttl": int(time.time()) + PENDING_MESSAGE_TTL_SECONDS,
+            }
+        )
+        self.logger.info(f"Pending message saved for user {phone_number}")
@@ -12,11 +12,64 @@ from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import
 
 # Own imports
 from common.logger import custom_logger
+from common.helpers.claim_check import claim_check_store
+from common.helpers.dynamodb_helper import DynamoDBHelper
 
 LOGGER = custom_logger()
 
 step_function_client = boto3.client("stepfunctions")
 
+# Auth sessions table, where the messages of unauthenticated users are parked
+TABLE_NAME_AUTH_SESSIONS = os.environ.get("TABLE_NAME_AUTH_SESSIONS")
+
+# A claimed pending message is not replayed again meanwhile (e.g. stream retries)
+PENDING_MESSAGE_CLAIM_SECONDS = 60
+
+
+def start_state_machine(
+    dynamodb_record: dict, logger: Logger = None, execution_suffix: str = ""
+) -> str:
+    """
+    Function to start the State Machine's execution for a message.
+
+    Args:
+        dynamodb_record (dict): Raw DynamoDB Stream Record of the message.
+        logger (Logger, optional): Logger object. Defaults to None.
+        execution_suffix (str, optional): Suffix for the execution name. Defaults to "".
+
+    Returns:
+        str: The execution ARN.
+    """
+    logger = logger or LOGGER
+    state_machine_arn = os.environ.get("STATE_MACHINE_ARN", "")
+
+    # Extract the necessary information from the DynamoDB Stream Record for Execution Name
+    new_image = dynamodb_record.get("dynamodb", {}).get("NewImage", {})
+    from_message = new_image.get("from_number", {}).get("S", "NOT_FOUND")
+    correlation_id = new_image.get("correlation_id", {}).get("S", "NOT_FOUND")
+    exec_name = f"{time.strftime('%Y%m%dT%H%M%S')}_{from_message}_{correlation_id}"
+    exec_name = f"{exec_name}{execution_suffix}"[:80]
+
+    # Large attributes are moved to the claim-check storage (only references are
+    # passed), so the executions stay below the payload limits and log less data
+    offloaded_attributes = claim_check_store.offload_attributes(
+        new_image, key_prefix=correlation_id
+    )
+    if offloaded_attributes:
+        logger.info(f"Attributes offloaded to claim-check: {offloaded_attributes}")
+
+    # Generate state machine input event with the same DynamoDBRecord dict
+    state_machine_input = {"input": dynamodb_record}
+
+    logger.debug(state_machine_input, message_details="State Machine Input")
+
+    response = step_function_client.start_execution(
+        stateMachineArn=state_machine_arn,
+        input=json.dumps(state_machine_input),
+        name=exec_name,
+    )
+    return response.get("executionArn")
+
 
 def trigger_sm(record: DynamoDBRecord, logger: Logger = None) -> str:
     """
@@ -39,26 +92,95 @@ def trigger_sm(record: DynamoDBRecord, logger: Logger = None) -> str:
         log_message["MESSAGE"] = f"triggering state machine {state_machine_arn}"
         log_message["RECORD"] = record.raw_event
 
-        # Extract the necessary information from the DynamoDB Stream Record for Execution Name
-        from_message = record.dynamodb.new_image.get("from_number", "NOT_FOUND")
         correlation_id = record.dynamodb.new_image.get("correlation_id", "NOT_FOUND")
-        exec_name = f"{time.strftime('%Y%m%dT%H%M%S')}_{from_message}_{correlation_id}"
-
         logger.append_keys(correlation_id=correlation_id)
         logger.debug(log_message)
 
-        # Generate state machine input event with the same DynamoDBRecord dict
-        state_machine_input = {"input": record.raw_event}
-
-        logger.debug(state_machine_input, message_details="State Machine Input")
-
-        response = step_function_client.start_execution(
-            stateMachineArn=state_machine_arn,
-            input=json.dumps(state_machine_input),
-            name=exec_name,
-        )
-        return response.get("executionArn")
+        return start_state_machine(record.raw_event, logger)
     except Exception as err:
         log_message["EXCEPTION"] = str(err)
         logger.error(str(log_message))
         raise
+
+
+def replay_pending_message(partition_key: str, logger: Logger = None) -> str:
+    """
+    Function to process the message that the user sent before authenticating
+    (parked by the ValidateMessage step). The pending item is claimed first,
+    and only deleted after the execution started: when starting it fails, the
+    claim is released, so the retry of the stream record replays it.
+
+    Args:
+        partition_key (str): Partition key of the user ("USER#<number>").
+        logger (Logger, optional): Logger object. Defaults to None.
+
+    Returns:
+        str: The execution ARN (None if there was no pending message).
+    """
+    logger = logger or LOGGER
+    if not TABLE_NAME_AUTH_SESSIONS:
+        logger.debug("TABLE_NAME_AUTH_SESSIONS not configured, skipping replay")
+        return None
+
+    dynamodb_helper = DynamoDBHelper(TABLE_NAME_AUTH_SESSIONS)
+    now = int(time.time())
+    pending_message = dynamodb_helper.get_plain_item_by_pk_and_sk(
+        partition_key, "PENDING", consistent_read=True
+    )
+    if not pending_message or pending_message.get("ttl", 0) < now:
+        logger.info("No pending message to replay")
+        return None
+
+    # Conditions on the correlation ID, so a newer parked message is not touched
+    expression_attribute_names = {
+        "#claimed_at": "claimed_at",
+        "#correlation_id": "correlation_id",
+    }
+    correlation_id = pending_message.get("correlation_id")
+    claimed = dynamodb_helper.update_item(
+        partition_key=partition_key,
+        sort_key="PENDING",
+        update_expression="SET #claimed_at = :now",
+        expression_attribute_names=expression_attribute_names,
+        expression_attribute_values={
+            ":now": now,
+            ":stale": now - PENDING_MESSAGE_CLAIM_SECONDS,
+            ":correlation_id": correlation_id,
+        },
+        condition_expression=(
+            "#correlation_id = :correlation_id AND "
+            "(attribute_not_exists(#claimed_at) OR #claimed_at < :stale)"
+        ),
+    )
+    if not claimed:
+        logger.info("Pending message already being replayed, skipping it")
+        return None
+
+    try:
+        execution_arn = start_state_machine(
+            json.loads(pending_message["input"]), logger, execution_suffix="_replay"
+        )
+    except Exception:
+        dynamodb_helper.update_item(
+            partition_key=partition_key,
+            sort_key="PENDING",
+            update_expression="REMOVE #claimed_at",
+            expression_attribute_names=expression_attribute_names,
+            expression_attribute_values={":correlation_id": correlation_id},
+            condition_expression="#correlation_id = :correlation_id",
+        )
+        raise
+    logger.info(f"Pending message replayed with execution: {execution_arn}")
+
+    try:
+        dynamodb_helper.delete_item(
+            partition_key=partition_key,
+            sort_key="PENDING",
+            condition_expression="#correlation_id = :correlation_id",
+            expression_attribute_names={"#correlation_id": "correlation_id"},
+            expression_attribute_values={":correlation_id": correlation_id},
+        )
+    except Exception as err:
+        # Still claimed (and expires with its "ttl"), so it's not replayed again
+        logger.warning(f"Could not delete the replayed pending message: {err}")
+    return execution_arn
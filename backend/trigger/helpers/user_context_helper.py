@@ -0,0 +1,52 @@
+# Built-in imports
+import os
+
+# External imports
+from aws_lambda_powertools import Logger
+
+# Own imports
+from common.logger import custom_logger
+from common.helpers.dynamodb_helper import DynamoDBHelper
+from common.helpers.user_profile_snapshot import UserProfileSnapshot
+
+
+LOGGER = custom_logger()
+
+# Agents-data table (from the Generative AI stack), where the user snapshots live
+TABLE_NAME_AGENTS_DATA = os.environ.get("TABLE_NAME_AGENTS_DATA")
+
+user_profile_snapshot = (
+    UserProfileSnapshot(DynamoDBHelper(TABLE_NAME_AGENTS_DATA))
+    if TABLE_NAME_AGENTS_DATA
+    else None
+)
+
+
+def warm_user_context(user_id: str, logger: Logger = None) -> bool:
+    """
+    Function to prepare the profile snapshot of a user (profile, products and
+    rewards in a single item), so the first question after the authentication
+    doesn't pay for the cold reads. Errors are only logged (best-effort).
+
+    Args:
+        user_id (str): User ID (the phone number for now).
+        logger (Logger, optional): Logger object. Defaults to None.
+
+    Returns:
+        bool: True if the snapshot is ready for the user.
+    """
+    logger = logger or LOGGER
+    if not user_profile_snapshot:
+        logger.debug("TABLE_NAME_AGENTS_DATA not configured, skipping user context")
+        return False
+
+    try:
+        snapshot = user_profile_snapshot.get_or_rebuild(user_id)
+        logger.info(
+            f"User context ready with {len(snapshot['products'])} products and "
+            f"{len(snapshot['rewards'])} rewards"
+        )
+        return True
+    except Exception as err:
+        logger.warning(f"Could not warm the user context: {err}")
+        return False
@@ -1,4 +1,5 @@
 # Built-in imports
+import time
 import boto3
 
 # External imports
@@ -9,6 +10,7 @@ from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import
 
 # Own imports
 from common.logger import custom_logger
+from common.helpers.outbound_messages import outbound_messages
 from state_machine.integrations.meta.api_requests import MetaAPI
 
 
@@ -50,10 +52,22 @@ def trigger_response(record: DynamoDBRecord, logger: Logger = None) -> str:
 
         # Send message to client
         meta_api = MetaAPI(logger)
+        text_message = (
+            "Te autenticaste exitosamente con Ruffy. ¿Cómo puedo apoyarte hoy?"
+        )
+        started_at = time.perf_counter()
         response = meta_api.post_text_message(
-            text_message="Te autenticaste exitosamente con Ruffy. ¿Cómo puedo apoyarte hoy?",
+            text_message=text_message,
             to_phone_number=from_message,
         )
+        outbound_messages.record(
+            phone_number=from_message,
+            text=text_message,
+            message_id=(response.get("messages") or [{}])[0].get("id"),
+            latency_ms=(time.perf_counter() - started_at) * 1000,
+            correlation_id=correlation_id,
+            status="FAILED" if "error" in response else "SENT",
+        )
 
         logger.debug(
             response,
@@ -30,6 +30,10 @@ def lambda_handler(event: DynamoDBStreamEvent, context: LambdaContext):
     logger.info("Starting message processing from DynamoDB Stream")
     try:
         for record in event.records:
+            # Only the incoming messages (not the conversation history, etc)
+            if not record.dynamodb.keys.get("SK", "").startswith("MESSAGE#"):
+                logger.info("Skipping item, as it's not an incoming message.")
+                continue
             correlation_id = record.dynamodb.new_image.get("correlation_id")
             logger.append_keys(correlation_id=correlation_id)
             logger.debug(record.raw_event, message_details="DynamoDB Stream Record")
@@ -3,6 +3,10 @@
 # ... and resumes conversation with user by sending another message!
 ################################################################################
 
+# Built-in imports
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 # External imports
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from aws_lambda_powertools.utilities.data_classes import event_source
@@ -13,14 +17,57 @@ from aws_lambda_powertools.utilities.data_classes.dynamo_db_stream_event import
 
 # Own imports
 from common.logger import custom_logger
+from common.helpers.dynamodb_helper import DynamoDBHelper
+from common.helpers.outbound_messages import outbound_messages
 from trigger.helpers.whatsapp_helper import trigger_response  # noqa
+from trigger.helpers.user_context_helper import warm_user_context
+from trigger.helpers.step_functions_helper import (
+    TABLE_NAME_AUTH_SESSIONS,
+    replay_pending_message,
+)
 
 logger = custom_logger()
+executor = ThreadPoolExecutor(max_workers=2)
+
+# Markers of the sent greetings (so they are not sent again on stream retries)
+GREETING_MARKER_TTL_SECONDS = 24 * 60 * 60
+auth_sessions_helper = (
+    DynamoDBHelper(TABLE_NAME_AUTH_SESSIONS) if TABLE_NAME_AUTH_SESSIONS else None
+)
+
+
+def send_greeting_once(record: DynamoDBRecord, partition_key: str) -> None:
+    # Stream retries deliver the record again with the same "event_id"
+    greeting_sort_key = f"GREETING#{record.event_id}"
+    if auth_sessions_helper and auth_sessions_helper.get_plain_item_by_pk_and_sk(
+        partition_key, greeting_sort_key, consistent_read=True
+    ):
+        logger.info("Greeting already sent for this record, skipping it")
+        return
+
+    trigger_response(record)
+    if auth_sessions_helper:
+        auth_sessions_helper.put_item(
+            {
+                "PK": partition_key,
+                "SK": greeting_sort_key,
+                "ttl": int(time.time()) + GREETING_MARKER_TTL_SECONDS,
+            }
+        )
 
 
 def send_message_to_user(record: DynamoDBRecord) -> None:
     logger.append_keys(event_id=record.event_id)
-    trigger_response(record)
+
+    # The user context is loaded while the greeting is being sent
+    partition_key = record.dynamodb.new_image["PK"]
+    user_id = partition_key.split("#")[1].replace("+", "")
+    warm_future = executor.submit(warm_user_context, user_id, logger)
+    send_greeting_once(record, partition_key)
+    warm_future.result()
+
+    # The message sent before authenticating is answered without asking again
+    replay_pending_message(partition_key, logger)
 
 
 @logger.inject_lambda_context(log_event=True)
@@ -29,7 +76,9 @@ def lambda_handler(event: DynamoDBStreamEvent, context: LambdaContext):
     logger.info("Starting message processing from DynamoDB Stream")
     try:
         for record in event.records:
-            if record.event_name.name != "REMOVE":  # Only process new items
+            if record.dynamodb.keys.get("SK") != "AUTH":
+                logger.info("Skipping non-auth item (e.g. pending messages).")
+            elif record.event_name.name != "REMOVE":  # Only process new items
                 correlation_id = record.dynamodb.new_image.get("correlation_id")
                 logger.append_keys(correlation_id=correlation_id)
                 logger.debug(record.raw_event, message_details="DynamoDB Stream Record")
@@ -43,3 +92,9 @@ def lambda_handler(event: DynamoDBStreamEvent, context: LambdaContext):
             f"Wrong input event, does not match DynamoDBRecord schema: {e}"
         )
         raise e
+    finally:
+        # Write-behind of the outbound messages (after the greetings were sent)
+        try:
+            outbound_messages.flush()
+        except Exception as e:
+            logger.exception(f"Error while saving the outbound messages: {e}")
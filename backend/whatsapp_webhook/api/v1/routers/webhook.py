@@ -8,9 +8,20 @@ from uuid import uuid4
 from fastapi import APIRouter, Query, Request, Response, status
 
 # Own imports
+from common.models.image_message_model import ImageMessageModel
 from common.models.text_message_model import TextMessageModel
+from common.models.voice_message_model import VoiceMessageModel
+from common.models.webhook_models import (
+    AudioWebhookMessage,
+    ImageWebhookMessage,
+    InteractiveWebhookMessage,
+    TextWebhookMessage,
+    WebhookPayload,
+)
 from common.logger import custom_logger
 from common.helpers.dynamodb_helper import DynamoDBHelper
+from common.helpers.conversation_history import ConversationHistory
+from common.helpers.delivery_status_metrics import DeliveryStatusAggregator
 from common.helpers.secrets_helper import SecretsHelper
 
 # Initialize Secrets Manager Helper
@@ -21,6 +32,8 @@ secrets_helper = SecretsHelper(SECRET_NAME)
 DYNAMODB_TABLE = os.environ["DYNAMODB_TABLE"]
 ENDPOINT_URL = os.environ.get("ENDPOINT_URL")  # Used for local testing
 dynamodb_helper = DynamoDBHelper(table_name=DYNAMODB_TABLE, endpoint_url=ENDPOINT_URL)
+conversation_history = ConversationHistory(dynamodb_helper)
+delivery_status_aggregator = DeliveryStatusAggregator(dynamodb_helper)
 
 
 router = APIRouter()
@@ -64,6 +77,24 @@ async def post_chatbot_webhook(
     input_body: dict,
 ):
     try:
+        # Lazy payload: only the parts that are used are parsed
+        payload = WebhookPayload(input_body)
+
+        # Fast path for the delivery statuses (sent, delivered, read, failed)
+        if not payload.has_messages:
+            for wpp_status in payload.statuses:
+                delivery_status_aggregator.add_status(
+                    message_id=wpp_status.id,
+                    status=wpp_status.status,
+                    timestamp=wpp_status.timestamp,
+                )
+            # Saved before returning, as the container can be frozen afterwards
+            delivery_status_aggregator.flush_closed_minutes()
+            return {
+                "message": "ok",
+                "details": f"Received {len(payload.statuses)} statuses",
+            }
+
         correlation_id = str(uuid4())
         logger.append_keys(correlation_id=correlation_id)
         logger.info(
@@ -78,26 +109,36 @@ async def post_chatbot_webhook(
         logger.debug(f"PATH_PARAMS: {request.path_params}")
         logger.debug(f"INPUT_BODY: {input_body}")
 
-        # Intentionally break code if parsing fails
-        message = input_body["entry"][0]["changes"][0]["value"]["messages"][0]
-        wpp_from_phone_number = message["from"]
-        wpp_id = message["id"]
-        wpp_timestamp = message["timestamp"]
-        wpp_type = message["type"]
+        # Intentionally break code if parsing fails (typed by the message "type")
+        message = payload.get_message(0)
+        if message is None:
+            logger.info("Unsupported message type received, skipping it")
+            return {"message": "ok", "details": "Unsupported message type"}
+
+        wpp_from_phone_number = message.from_number
+        wpp_id = message.id
+        wpp_timestamp = message.timestamp
         created_at = datetime.now(timezone.utc).isoformat()
 
+        # Text of the message (the replies to buttons/lists are handled as text)
+        text = None
+        if isinstance(message, TextWebhookMessage):
+            text = message.text.body
+        elif isinstance(message, InteractiveWebhookMessage) and message.reply:
+            text = message.reply.title
+
         # Initialize the Message Model based on the type of message
         message_item = None
-        if wpp_type == "text":
+        if text is not None:
             message_item = TextMessageModel(
                 PK=f"NUMBER#{wpp_from_phone_number}",
                 SK=f"MESSAGE#{created_at}",
                 from_number=wpp_from_phone_number,
                 created_at=created_at,
-                type=wpp_type,
+                type="text",
                 whatsapp_id=wpp_id,
                 whatsapp_timestamp=wpp_timestamp,
-                text=message["text"]["body"],
+                text=text,
                 correlation_id=correlation_id,
             )
             logger.info(
@@ -105,7 +146,38 @@ async def post_chatbot_webhook(
                 message_item.json(),  # When stabilizing Pydantic versions, change to model_dump
                 message_details="Successfully created TextMessageModel instance",
             )
-        # TODO: Add other types of messages (image, voice, video, etc)
+        elif isinstance(message, AudioWebhookMessage):
+            # Voice notes (and audios) are transcribed in the State Machine
+            message_item = VoiceMessageModel(
+                PK=f"NUMBER#{wpp_from_phone_number}",
+                SK=f"MESSAGE#{created_at}",
+                from_number=wpp_from_phone_number,
+                created_at=created_at,
+                type="voice",
+                whatsapp_id=wpp_id,
+                whatsapp_timestamp=wpp_timestamp,
+                media_id=message.audio.id,
+                mime_type=message.audio.mime_type,
+                correlation_id=correlation_id,
+            )
+        elif isinstance(message, ImageWebhookMessage):
+            # Images are resized and described in the State Machine
+            message_item = ImageMessageModel(
+                PK=f"NUMBER#{wpp_from_phone_number}",
+                SK=f"MESSAGE#{created_at}",
+                from_number=wpp_from_phone_number,
+                created_at=created_at,
+                type="image",
+                whatsapp_id=wpp_id,
+                whatsapp_timestamp=wpp_timestamp,
+                media_id=message.image.id,
+                mime_type=message.image.mime_type,
+                caption=message.image.caption,
+                correlation_id=correlation_id,
+            )
+        else:
+            # TODO: Add other types of messages (video, documents, etc)
+            logger.info(f"Message type <{message.message_type}> not processed yet")
 
         # Save the message to DynamoDB
         if message_item:
@@ -115,6 +187,20 @@ async def post_chatbot_webhook(
             )  # TODO: update to model_dump()
             logger.debug(result, message_details="DynamoDB put_item() result")
 
+            # Bounded history of the conversation (best-effort, never blocks the message)
+            try:
+                conversation_history.append(
+                    phone_number=wpp_from_phone_number,
+                    role="user",
+                    text=getattr(message_item, "text", None)
+                    or getattr(message_item, "caption", None)
+                    or f"<{message_item.type}>",
+                    message_id=wpp_id,
+                    correlation_id=correlation_id,
+                )
+            except Exception as error:
+                logger.warning(f"Could not update the conversation history: {error}")
+
         result = {"message": "ok", "details": "Received message"}
         return result
 
@@ -9,6 +9,7 @@ from aws_cdk import (
     aws_lambda,
     aws_lambda_event_sources,
     aws_logs,
+    aws_s3,
     aws_secretsmanager,
     aws_stepfunctions as aws_sfn,
     aws_stepfunctions_tasks as aws_sfn_tasks,
@@ -55,6 +56,7 @@ class ChatbotAPIStack(Stack):
         # Main methods for the deployment
         self.import_secrets()
         self.create_dynamodb_table()
+        self.create_s3_buckets()
         self.create_lambda_layers()
         self.create_lambda_functions()
         self.create_dynamodb_streams()
@@ -116,6 +118,47 @@ class ChatbotAPIStack(Stack):
             "Name", self.app_config["table_name_auth_sessions"]
         )
 
+        # Table for the distributed rate limiting counters (short-lived items)
+        self.dynamodb_table_rate_limits = aws_dynamodb.Table(
+            self,
+            "DynamoDB-Table-RateLimits",
+            table_name=self.app_config["table_name_rate_limits"],
+            partition_key=aws_dynamodb.Attribute(
+                name="PK", type=aws_dynamodb.AttributeType.STRING
+            ),
+            sort_key=aws_dynamodb.Attribute(
+                name="SK", type=aws_dynamodb.AttributeType.STRING
+            ),
+            billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY,
+            time_to_live_attribute="ttl",
+        )
+        Tags.of(self.dynamodb_table_rate_limits).add(
+            "Name", self.app_config["table_name_rate_limits"]
+        )
+
+    def create_s3_buckets(self) -> None:
+        """
+        Create the S3 bucket for the claim-check storage (large fields of the
+        State Machine payloads are saved here and only referenced).
+        """
+        self.bucket_claim_check = aws_s3.Bucket(
+            self,
+            "S3-Bucket-ClaimCheck",
+            bucket_name=f"{self.main_resources_name}-claim-check-{self.account}",
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+            enforce_ssl=True,
+            block_public_access=aws_s3.BlockPublicAccess.BLOCK_ALL,
+            lifecycle_rules=[
+                # Only needed while the message is processed (or parked for auth)
+                aws_s3.LifecycleRule(expiration=Duration.days(1)),
+            ],
+        )
+        Tags.of(self.bucket_claim_check).add(
+            "Name", f"{self.main_resources_name}-claim-check"
+        )
+
     def create_lambda_layers(self) -> None:
         """
         Create the Lambda layers that are necessary for the additional runtime
@@ -143,6 +186,13 @@ class ChatbotAPIStack(Stack):
             compatible_architectures=[aws_lambda.Architecture.X86_64],
         )
 
+        # Layer for "Pillow" (to decode and resize the images in memory)
+        self.lambda_layer_pillow = aws_lambda.LayerVersion.from_layer_version_arn(
+            self,
+            "Layer-Pillow",
+            layer_version_arn=f"arn:aws:lambda:{self.region}:770693421928:layer:Klayers-p311-Pillow:7",
+        )
+
     def create_lambda_functions(self) -> None:
         """
         Create the Lambda Functions for the solution.
@@ -215,6 +265,10 @@ class ChatbotAPIStack(Stack):
                 "LOG_LEVEL": self.app_config["log_level"],
                 "SECRET_NAME": self.app_config["secret_name"],
                 "META_ENDPOINT": self.app_config["meta_endpoint"],
+                "META_MAX_MESSAGES_PER_SECOND": str(
+                    self.app_config["meta_max_messages_per_second"]
+                ),
+                "TABLE_NAME_RATE_LIMITS": self.app_config["table_name_rate_limits"],
             },
             layers=[
                 self.lambda_layer_powertools,
@@ -222,6 +276,36 @@ class ChatbotAPIStack(Stack):
             ],
         )
         self.secret_chatbot.grant_read(self.lambda_trigger_auth_ok)
+        self.dynamodb_table_rate_limits.grant_read_write_data(
+            self.lambda_trigger_auth_ok
+        )
+
+        # The outbound messages (e.g. the greeting) are recorded in the messages table
+        self.lambda_trigger_auth_ok.add_environment(
+            "DYNAMODB_TABLE", self.dynamodb_table.table_name
+        )
+        self.dynamodb_table.grant_read_write_data(self.lambda_trigger_auth_ok)
+
+        # The pending message (sent before authenticating) is replayed afterwards
+        self.lambda_trigger_auth_ok.add_environment(
+            "TABLE_NAME_AUTH_SESSIONS", self.app_config["table_name_auth_sessions"]
+        )
+        self.dynamodb_table_auth_sessions.grant_read_write_data(
+            self.lambda_trigger_auth_ok
+        )
+
+        # The user context (profile snapshot) is warmed up as soon as authenticated
+        self.lambda_trigger_auth_ok.add_environment(
+            "TABLE_NAME_AGENTS_DATA", self.app_config["agents_data_table_name"]
+        )
+        self.dynamodb_table_agents_data = aws_dynamodb.Table.from_table_name(
+            self,
+            "DynamoDB-Table-AgentsData",
+            table_name=self.app_config["agents_data_table_name"],
+        )
+        self.dynamodb_table_agents_data.grant_read_write_data(
+            self.lambda_trigger_auth_ok
+        )
 
         # Lambda Function that will run the State Machine steps for processing the messages
         # TODO: In the future, can be migrated to MULTIPLE Lambda Functions for each step...
@@ -239,12 +323,39 @@ class ChatbotAPIStack(Stack):
                 "LOG_LEVEL": self.app_config["log_level"],
                 "SECRET_NAME": self.app_config["secret_name"],
                 "META_ENDPOINT": self.app_config["meta_endpoint"],
+                "DYNAMODB_TABLE": self.dynamodb_table.table_name,
                 "TABLE_NAME_AUTH_SESSIONS": self.app_config["table_name_auth_sessions"],
                 "AUTH_ENABLED": self.app_config["enable_auth"],
+                "TABLE_NAME_RATE_LIMITS": self.app_config["table_name_rate_limits"],
+                "BEDROCK_MAX_TPS": str(self.app_config["bedrock_max_tps"]),
+                "BEDROCK_MAX_TPM": str(self.app_config["bedrock_max_tpm"]),
+                "META_MAX_MESSAGES_PER_SECOND": str(
+                    self.app_config["meta_max_messages_per_second"]
+                ),
+                "BEDROCK_TRACE_SAMPLE_RATE": str(
+                    self.app_config["bedrock_trace_sample_rate"]
+                ),
+                # Voice notes are streamed to Amazon Transcribe (SDK in the common layer)
+                "SPEECH_TO_TEXT_ENGINE": self.app_config.get(
+                    "speech_to_text_engine", "transcribe"
+                ),
+                "SPEECH_TO_TEXT_LANGUAGE_CODE": self.app_config.get(
+                    "speech_to_text_language_code", "es-US"
+                ),
+                "IMAGE_ANALYSIS_ENGINE": self.app_config.get(
+                    "image_analysis_engine", "bedrock"
+                ),
+                "IMAGE_MAX_SIZE_PIXELS": str(
+                    self.app_config.get("image_max_size_pixels", 1024)
+                ),
+                "IMAGE_JPEG_QUALITY": str(
+                    self.app_config.get("image_jpeg_quality", 80)
+                ),
             },
             layers=[
                 self.lambda_layer_powertools,
                 self.lambda_layer_common,
+                self.lambda_layer_pillow,
             ],
         )
         self.secret_chatbot.grant_read(self.lambda_state_machine_process_message)
@@ -254,6 +365,17 @@ class ChatbotAPIStack(Stack):
         self.dynamodb_table_auth_sessions.grant_read_write_data(
             self.lambda_state_machine_process_message
         )
+        self.dynamodb_table_rate_limits.grant_read_write_data(
+            self.lambda_state_machine_process_message
+        )
+
+        # The user context (profile snapshot) pre-seeds the prompts
+        self.lambda_state_machine_process_message.add_environment(
+            "TABLE_NAME_AGENTS_DATA", self.app_config["agents_data_table_name"]
+        )
+        self.dynamodb_table_agents_data.grant_read_data(
+            self.lambda_state_machine_process_message
+        )
         self.lambda_state_machine_process_message.role.add_managed_policy(
             aws_iam.ManagedPolicy.from_aws_managed_policy_name(
                 "AmazonSSMReadOnlyAccess",
@@ -264,6 +386,12 @@ class ChatbotAPIStack(Stack):
                 "AmazonBedrockFullAccess",
             ),
         )
+        self.lambda_state_machine_process_message.add_to_role_policy(
+            aws_iam.PolicyStatement(
+                actions=["transcribe:StartStreamTranscription"],
+                resources=["*"],
+            )
+        )
 
         # Lambda Function for the Bedrock Agent Group (fetch recipes)
         bedrock_agent_lambda_role = aws_iam.Role(
@@ -315,6 +443,22 @@ class ChatbotAPIStack(Stack):
                 self.dynamodb_table,
                 starting_position=aws_lambda.StartingPosition.TRIM_HORIZON,
                 batch_size=1,
+                filters=[
+                    # Only the incoming messages (not the conversation history, etc)
+                    aws_lambda.FilterCriteria.filter(
+                        {
+                            "dynamodb": {
+                                "Keys": {
+                                    "SK": {
+                                        "S": aws_lambda.FilterRule.begins_with(
+                                            "MESSAGE#"
+                                        )
+                                    }
+                                }
+                            }
+                        }
+                    )
+                ],
             )
         )
 
@@ -325,6 +469,11 @@ class ChatbotAPIStack(Stack):
                 self.dynamodb_table_auth_sessions,
                 starting_position=aws_lambda.StartingPosition.TRIM_HORIZON,
                 batch_size=1,
+                filters=[
+                    aws_lambda.FilterCriteria.filter(
+                        {"dynamodb": {"Keys": {"SK": {"S": ["AUTH"]}}}}
+                    )
+                ],
             )
         )
 
@@ -474,6 +623,8 @@ class ChatbotAPIStack(Stack):
             max_attempts=5,  # Retry up to 5 times (Bedrock has as of now errors eventually)
             interval=Duration.seconds(1),  # Wait 1 seconds between retries
             backoff_rate=2.0,  # Exponential backoff multiplier
+            max_delay=Duration.seconds(10),  # Cap the backoff delay between retries
+            jitter_strategy=aws_sfn.JitterType.FULL,  # Avoid synchronized retries under bursts
         )
 
         self.task_process_voice = aws_sfn_tasks.LambdaInvoke(
@@ -493,6 +644,23 @@ class ChatbotAPIStack(Stack):
             output_path="$.Payload",
         )
 
+        self.task_process_image = aws_sfn_tasks.LambdaInvoke(
+            self,
+            "Task-ProcessImage",
+            state_name="Process Image",
+            lambda_function=self.lambda_state_machine_process_message,
+            payload=aws_sfn.TaskInput.from_object(
+                {
+                    "event.$": "$",
+                    "params": {
+                        "class_name": "ProcessImage",
+                        "method_name": "process_image",
+                    },
+                }
+            ),
+            output_path="$.Payload",
+        )
+
         self.task_send_message = aws_sfn_tasks.LambdaInvoke(
             self,
             "Task-SendMessage",
@@ -510,6 +678,11 @@ class ChatbotAPIStack(Stack):
             output_path="$.Payload",
         )
         # Add retry configuration (default behavior has all errors are retried)
+        # Retrying after some segments were delivered would duplicate them
+        self.task_send_message.add_retry(
+            errors=["PartialDeliveryError"],
+            max_attempts=0,
+        )
         self.task_send_message.add_retry(
             max_attempts=5,  # Retry up to 5 times (Bedrock has as of now errors eventually)
             interval=Duration.seconds(1),  # Wait 1 seconds between retries
@@ -600,7 +773,9 @@ class ChatbotAPIStack(Stack):
         self.task_pass_voice.next(
             self.task_process_voice.next(self.task_pass_text),
         )
-        self.task_pass_image.next(self.task_not_implemented)
+        self.task_pass_image.next(
+            self.task_process_image.next(self.task_pass_text),
+        )
         self.task_pass_video.next(self.task_not_implemented)
 
         self.task_not_implemented.next(self.task_send_message)
@@ -642,12 +817,28 @@ class ChatbotAPIStack(Stack):
         )
 
         self.state_machine.grant_start_execution(self.lambda_trigger_state_machine)
+        self.state_machine.grant_start_execution(self.lambda_trigger_auth_ok)
 
         # Add additional environment variables to the Lambda Functions
         self.lambda_trigger_state_machine.add_environment(
             "STATE_MACHINE_ARN",
             self.state_machine.state_machine_arn,
         )
+        self.lambda_trigger_auth_ok.add_environment(
+            "STATE_MACHINE_ARN",
+            self.state_machine.state_machine_arn,
+        )
+
+        # Large payload fields are offloaded by the triggers and resolved by the steps
+        for lambda_function in [
+            self.lambda_trigger_state_machine,
+            self.lambda_trigger_auth_ok,
+            self.lambda_state_machine_process_message,
+        ]:
+            lambda_function.add_environment(
+                "CLAIM_CHECK_BUCKET_NAME", self.bucket_claim_check.bucket_name
+            )
+            self.bucket_claim_check.grant_read_write(lambda_function)
 
     def generate_cloudformation_outputs(self) -> None:
         """
@@ -8,11 +8,13 @@ from aws_cdk import (
     aws_dynamodb,
     aws_iam,
     aws_lambda,
+    aws_lambda_event_sources,
     aws_opensearchserverless as oss,
     aws_ssm,
     aws_s3,
     aws_s3_deployment as s3d,
     aws_secretsmanager,
+    aws_sqs,
     custom_resources as cr,
     CfnOutput,
     RemovalPolicy,
@@ -197,6 +199,8 @@ class GenerativeAIStack(Stack):
                 name="SK", type=aws_dynamodb.AttributeType.STRING
             ),
             billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="ttl",
+            stream=aws_dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
             removal_policy=RemovalPolicy.DESTROY,
         )
         Tags.of(self.agents_data_dynamodb_table).add(
@@ -323,6 +327,10 @@ class GenerativeAIStack(Stack):
                 "BUCKET_NAME": self.bucket_additional_assets.bucket_name,
                 "SECRET_NAME": self.app_config["secret_name"],
                 "META_ENDPOINT": self.app_config["meta_endpoint"],
+                "TABLE_NAME_MEDIA_CACHE": self.app_config["agents_data_table_name"],
+                "META_MAX_MESSAGES_PER_SECOND": str(
+                    self.app_config.get("meta_max_messages_per_second", 20)
+                ),
             },
             layers=[
                 self.lambda_layer_common,
@@ -336,6 +344,72 @@ class GenerativeAIStack(Stack):
             self.lambda_action_group_generate_certificates
         )
 
+        # Certificates are generated asynchronously (the agent is not blocked)
+        certificate_jobs_max_receive_count = 3
+        self.queue_certificate_jobs_dlq = aws_sqs.Queue(
+            self,
+            "SQS-CertificateJobs-DLQ",
+            queue_name=f"{self.main_resources_name}-certificate-jobs-dlq",
+            retention_period=Duration.days(14),
+        )
+        self.queue_certificate_jobs = aws_sqs.Queue(
+            self,
+            "SQS-CertificateJobs",
+            queue_name=f"{self.main_resources_name}-certificate-jobs",
+            visibility_timeout=Duration.seconds(360),  # 6x the worker timeout
+            dead_letter_queue=aws_sqs.DeadLetterQueue(
+                max_receive_count=certificate_jobs_max_receive_count,
+                queue=self.queue_certificate_jobs_dlq,
+            ),
+        )
+        self.lambda_action_group_generate_certificates.add_environment(
+            "CERTIFICATE_JOBS_QUEUE_URL", self.queue_certificate_jobs.queue_url
+        )
+        self.queue_certificate_jobs.grant_send_messages(
+            self.lambda_action_group_generate_certificates
+        )
+
+        self.lambda_certificates_worker = aws_lambda.Function(
+            self,
+            "Lambda-CertificatesWorker",
+            runtime=aws_lambda.Runtime.PYTHON_3_11,
+            handler="agents/bank_certificates/worker.lambda_handler",
+            function_name=f"{self.main_resources_name}-certificates-worker",
+            code=aws_lambda.Code.from_asset(PATH_TO_LAMBDA_FUNCTION_FOLDER),
+            timeout=Duration.seconds(60),
+            memory_size=1024,
+            environment={
+                "ENVIRONMENT": self.app_config["deployment_environment"],
+                "LOG_LEVEL": self.app_config["log_level"],
+                "TABLE_NAME": self.app_config["agents_data_table_name"],
+                "BUCKET_NAME": self.bucket_additional_assets.bucket_name,
+                "SECRET_NAME": self.app_config["secret_name"],
+                "META_ENDPOINT": self.app_config["meta_endpoint"],
+                "TABLE_NAME_MEDIA_CACHE": self.app_config["agents_data_table_name"],
+                "META_MAX_MESSAGES_PER_SECOND": str(
+                    self.app_config.get("meta_max_messages_per_second", 20)
+                ),
+                "CERTIFICATE_JOB_MAX_RECEIVE_COUNT": str(
+                    certificate_jobs_max_receive_count
+                ),
+            },
+            layers=[
+                self.lambda_layer_common,
+                self.lambda_layer_powertools,
+                self.lambda_layer_pillow,
+            ],
+            role=bedrock_agent_lambda_role,
+        )
+        self.lambda_certificates_worker.add_event_source(
+            aws_lambda_event_sources.SqsEventSource(
+                self.queue_certificate_jobs,
+                batch_size=5,
+                report_batch_item_failures=True,
+            )
+        )
+        self.secret_chatbot.grant_read(self.lambda_certificates_worker)
+        self.bucket_additional_assets.grant_read_write(self.lambda_certificates_worker)
+
         self.lambda_action_group_get_bank_rewards = aws_lambda.Function(
             self,
             "Lambda-AG-GetBankRewards",
@@ -386,6 +460,54 @@ class GenerativeAIStack(Stack):
             role=bedrock_agent_lambda_role,
         )
 
+        # Lambda to keep the per-user profile snapshots up to date from the stream
+        self.lambda_user_profile_snapshot = aws_lambda.Function(
+            self,
+            "Lambda-UserProfileSnapshot",
+            runtime=aws_lambda.Runtime.PYTHON_3_11,
+            handler="agents/user_profile_snapshot/lambda_function.lambda_handler",
+            function_name=f"{self.main_resources_name}-user-profile-snapshot",
+            code=aws_lambda.Code.from_asset(PATH_TO_LAMBDA_FUNCTION_FOLDER),
+            timeout=Duration.seconds(60),
+            memory_size=256,
+            environment={
+                "ENVIRONMENT": self.app_config["deployment_environment"],
+                "LOG_LEVEL": self.app_config["log_level"],
+                "TABLE_NAME": self.app_config["agents_data_table_name"],
+            },
+            layers=[
+                self.lambda_layer_common,
+                self.lambda_layer_powertools,
+            ],
+            role=bedrock_agent_lambda_role,
+        )
+        # Only the source items (the snapshot item itself must not trigger updates)
+        self.lambda_user_profile_snapshot.add_event_source(
+            aws_lambda_event_sources.DynamoEventSource(
+                self.agents_data_dynamodb_table,
+                starting_position=aws_lambda.StartingPosition.TRIM_HORIZON,
+                batch_size=25,
+                retry_attempts=5,
+                filters=[
+                    aws_lambda.FilterCriteria.filter(
+                        {
+                            "dynamodb": {
+                                "Keys": {
+                                    "PK": {
+                                        "S": aws_lambda.FilterRule.begins_with("USER#")
+                                    },
+                                    "SK": {
+                                        "S": aws_lambda.FilterRule.begins_with(prefix)
+                                    },
+                                }
+                            }
+                        }
+                    )
+                    for prefix in ["PROFILE#", "PRODUCT#", "REWARDS#"]
+                ],
+            )
+        )
+
         # Add permissions to the Lambda functions resource policies.
         # The resource-based policy is to allow an AWS service to invoke your function.
         self.lambda_action_group_crud_user_products.add_permission(
@@ -413,6 +535,59 @@ class GenerativeAIStack(Stack):
             source_arn=f"arn:aws:bedrock:{self.region}:{self.account}:agent/*",
         )
 
+        # Executors for the action groups (one Lambda per action group by default)
+        self.action_group_executors = {
+            "FetchUserProducts": self.lambda_action_group_crud_user_products,
+            "GenerateCertificates": self.lambda_action_group_generate_certificates,
+            "GetBankRewards": self.lambda_action_group_get_bank_rewards,
+            "FetchMarketInsights": self.lambda_action_group_market_insights,
+        }
+
+        # Optional single Lambda for all the action groups (pools warm capacity/caches)
+        if self.app_config.get("agents_single_lambda", False):
+            self.lambda_action_groups = aws_lambda.Function(
+                self,
+                "Lambda-AG-All",
+                runtime=aws_lambda.Runtime.PYTHON_3_11,
+                handler="agents/lambda_function.lambda_handler",
+                function_name=f"{self.main_resources_name}-bedrock-action-groups",
+                code=aws_lambda.Code.from_asset(PATH_TO_LAMBDA_FUNCTION_FOLDER),
+                timeout=Duration.seconds(60),
+                memory_size=1024,
+                environment={
+                    "ENVIRONMENT": self.app_config["deployment_environment"],
+                    "LOG_LEVEL": self.app_config["log_level"],
+                    "TABLE_NAME": self.app_config["agents_data_table_name"],
+                    "BUCKET_NAME": self.bucket_additional_assets.bucket_name,
+                    "SECRET_NAME": self.app_config["secret_name"],
+                    "META_ENDPOINT": self.app_config["meta_endpoint"],
+                    "TABLE_NAME_MEDIA_CACHE": self.app_config["agents_data_table_name"],
+                    "META_MAX_MESSAGES_PER_SECOND": str(
+                        self.app_config.get("meta_max_messages_per_second", 20)
+                    ),
+                    "CERTIFICATE_JOBS_QUEUE_URL": self.queue_certificate_jobs.queue_url,
+                },
+                layers=[
+                    self.lambda_layer_common,
+                    self.lambda_layer_powertools,
+                    self.lambda_layer_pillow,
+                ],
+                role=bedrock_agent_lambda_role,
+            )
+            self.secret_chatbot.grant_read(self.lambda_action_groups)
+            self.bucket_additional_assets.grant_read_write(self.lambda_action_groups)
+            self.queue_certificate_jobs.grant_send_messages(self.lambda_action_groups)
+            self.lambda_action_groups.add_permission(
+                "AllowBedrockInvokeAll",
+                principal=aws_iam.ServicePrincipal("bedrock.amazonaws.com"),
+                action="lambda:InvokeFunction",
+                source_arn=f"arn:aws:bedrock:{self.region}:{self.account}:agent/*",
+            )
+            self.action_group_executors = {
+                action_group_name: self.lambda_action_groups
+                for action_group_name in self.action_group_executors
+            }
+
     def create_bedrock_roles(self) -> None:
         """
         Method to create the Bedrock Agent for the chatbot.
@@ -729,7 +904,9 @@ class GenerativeAIStack(Stack):
                     action_group_name="FetchUserProducts",
                     description="A function that is able to fetch the user products from the database from an input from_number and from_number.",
                     action_group_executor=aws_bedrock.CfnAgent.ActionGroupExecutorProperty(
-                        lambda_=self.lambda_action_group_crud_user_products.function_arn,
+                        lambda_=self.action_group_executors[
+                            "FetchUserProducts"
+                        ].function_arn,
                     ),
                     function_schema=aws_bedrock.CfnAgent.FunctionSchemaProperty(
                         functions=[
@@ -743,6 +920,11 @@ class GenerativeAIStack(Stack):
                                         description="from_number to fetch the user products",
                                         required=True,
                                     ),
+                                    "page": aws_bedrock.CfnAgent.ParameterDetailProperty(
+                                        type="integer",
+                                        description="Page of the results to fetch (only when the previous response says there are more)",
+                                        required=False,
+                                    ),
                                 },
                             )
                         ]
@@ -752,7 +934,9 @@ class GenerativeAIStack(Stack):
                     action_group_name="GenerateCertificates",
                     description="A function that is able to generate the user certificates from an input from_number.",
                     action_group_executor=aws_bedrock.CfnAgent.ActionGroupExecutorProperty(
-                        lambda_=self.lambda_action_group_generate_certificates.function_arn,
+                        lambda_=self.action_group_executors[
+                            "GenerateCertificates"
+                        ].function_arn,
                     ),
                     function_schema=aws_bedrock.CfnAgent.FunctionSchemaProperty(
                         functions=[
@@ -775,7 +959,9 @@ class GenerativeAIStack(Stack):
                     action_group_name="GetBankRewards",
                     description="A function that is able to get bank rewards from an input from_number.",
                     action_group_executor=aws_bedrock.CfnAgent.ActionGroupExecutorProperty(
-                        lambda_=self.lambda_action_group_get_bank_rewards.function_arn,
+                        lambda_=self.action_group_executors[
+                            "GetBankRewards"
+                        ].function_arn,
                     ),
                     function_schema=aws_bedrock.CfnAgent.FunctionSchemaProperty(
                         functions=[
@@ -812,7 +998,9 @@ class GenerativeAIStack(Stack):
                     action_group_name="FetchMarketInsights",
                     description="A function that is able to fetch the latest market insights knowing the <risk_level> for the user.",
                     action_group_executor=aws_bedrock.CfnAgent.ActionGroupExecutorProperty(
-                        lambda_=self.lambda_action_group_market_insights.function_arn,
+                        lambda_=self.action_group_executors[
+                            "FetchMarketInsights"
+                        ].function_arn,
                     ),
                     function_schema=aws_bedrock.CfnAgent.FunctionSchemaProperty(
                         functions=[
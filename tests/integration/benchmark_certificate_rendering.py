@@ -0,0 +1,81 @@
+# BENCHMARK FOR THE SERIAL VS PARALLEL (CHUNKED) CERTIFICATE RENDERING
+# Usage: python tests/integration/benchmark_certificate_rendering.py --product-counts 10,100,500 --chunk-size 25
+
+# Built-in imports
+import argparse
+import io
+import os
+import sys
+import time
+
+# External imports
+from pypdf import PdfReader
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark for certificate rendering")
+    parser.add_argument("--product-counts", default="10,50,200,500")
+    parser.add_argument("--chunk-size", type=int, default=25)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def best_time(function, repeat: int) -> tuple:
+    best, result = None, None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started_at
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main() -> None:
+    args = parse_args()
+
+    # Local configuration (must be set before importing the backend modules)
+    os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "ERROR")
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "backend"))
+    from agents.bank_certificates.generate_certificates import (
+        render_certificate_pdf,
+        render_certificate_pdf_parallel,
+    )
+
+    print(f"Workers: {args.workers or os.cpu_count()}, chunk size: {args.chunk_size}")
+    print(f"{'products':>9} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}")
+    for product_count in [int(count) for count in args.product_counts.split(",")]:
+        products = [
+            {
+                "PK": "USER#573000000000",
+                "SK": f"PRODUCT#{index:04d}",
+                "details": "Visa Card",
+                "last_digits": f"{index % 10000:04d}",
+                "product_name": "Debit Card",
+                "status": "ACTIVE",
+            }
+            for index in range(product_count)
+        ]
+        serial_time, _ = best_time(
+            lambda: render_certificate_pdf(products, certificate_hash="benchmark"),
+            args.repeat,
+        )
+        parallel_time, pdf_content = best_time(
+            lambda: render_certificate_pdf_parallel(
+                products,
+                certificate_hash="benchmark",
+                chunk_size=args.chunk_size,
+                max_workers=args.workers,
+            ),
+            args.repeat,
+        )
+        # The merged PDF must keep one page per product
+        assert len(PdfReader(io.BytesIO(pdf_content)).pages) == product_count
+        print(
+            f"{product_count:>9} {serial_time:>11.3f} {parallel_time:>13.3f} "
+            f"{serial_time / parallel_time:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
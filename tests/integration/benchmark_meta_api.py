@@ -0,0 +1,164 @@
+# BENCHMARK FOR THE META API CLIENT AGAINST THE LOCAL META GRAPH API SERVER
+# Usage: python tests/integration/benchmark_meta_api.py --messages 500 --concurrency 20 --rate-limit-mps 50
+
+# Built-in imports
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# External imports
+import requests
+
+sys.path.insert(0, os.path.dirname(__file__))
+from local_meta_api_server import LocalMetaAPIServer, ServerConfig  # noqa: E402
+
+
+PHONE_NUMBER_ID = "123456789012345"
+LOCAL_META_SECRET = {
+    "META_TOKEN": "LOCAL_TOKEN",
+    "META_FROM_PHONE_NUMBER_ID": PHONE_NUMBER_ID,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark for the Meta API client")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--recipients", type=int, default=20)
+    parser.add_argument("--latency-median-ms", type=float, default=20)
+    parser.add_argument("--latency-p99-ms", type=float, default=100)
+    parser.add_argument("--rate-limit-mps", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--modes",
+        default="meta-api,pooled-session,async",
+        help="Comma separated list of modes to benchmark",
+    )
+    return parser.parse_args()
+
+
+def percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_benchmark(name: str, send_function, args, server) -> None:
+    requests.post(f"{server.endpoint}_local/reset")
+
+    def timed_send(index: int) -> tuple:
+        started_at = time.monotonic()
+        result = send_function(index)
+        return (time.monotonic() - started_at) * 1000, result
+
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(timed_send, range(args.messages)))
+    elapsed = time.monotonic() - started_at
+
+    latencies = [latency for latency, _ in results]
+    failed = sum(1 for _, result in results if "error" in result)
+    stats = requests.get(f"{server.endpoint}_local/stats").json()
+    print(f"--> {name}")
+    print(f"    throughput: {len(results) / elapsed:.1f} msg/s ({elapsed:.2f}s)")
+    print(f"    p50: {statistics.median(latencies):.1f} ms")
+    print(f"    p99: {percentile(latencies, 99):.1f} ms")
+    print(f"    failed: {failed}")
+    print(f"    server requests: {stats['requests']} {stats['status_codes']}")
+    print(f"    server connections: {stats['connections']}")
+
+
+def run_async_benchmark(async_meta_api_class, recipient, args, server) -> None:
+    requests.post(f"{server.endpoint}_local/reset")
+    meta_api = async_meta_api_class(
+        meta_secret_json=LOCAL_META_SECRET,
+        max_connections=args.concurrency,
+        http2=False,  # The local server only speaks HTTP/1.1
+    )
+    messages = [
+        meta_api.build_text_message_payload(
+            f"Benchmark message {index}", recipient(index)
+        )
+        for index in range(args.messages)
+    ]
+
+    started_at = time.monotonic()
+    results = meta_api.send_many_sync(messages)
+    elapsed = time.monotonic() - started_at
+
+    latencies = [result.latency_ms for result in results]
+    stats = requests.get(f"{server.endpoint}_local/stats").json()
+    print("--> async")
+    print(f"    throughput: {len(results) / elapsed:.1f} msg/s ({elapsed:.2f}s)")
+    print(f"    p50: {statistics.median(latencies):.1f} ms")
+    print(f"    p99: {percentile(latencies, 99):.1f} ms")
+    print(f"    failed: {sum(1 for result in results if not result.ok)}")
+    print(f"    server requests: {stats['requests']} {stats['status_codes']}")
+    print(f"    server connections: {stats['connections']}")
+
+
+def main() -> None:
+    args = parse_args()
+    config = ServerConfig(
+        latency_median_ms=args.latency_median_ms,
+        latency_p99_ms=args.latency_p99_ms,
+        rate_limit_mps=args.rate_limit_mps,
+        error_rate=args.error_rate,
+    )
+
+    with LocalMetaAPIServer(config=config) as server:
+        # Local configuration (must be set before importing the backend modules)
+        os.environ["META_ENDPOINT"] = server.endpoint
+        os.environ.setdefault("SECRET_NAME", "local-secret")
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+        os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "ERROR")
+        sys.path.insert(
+            0, os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+        )
+        from state_machine.integrations.meta.api_requests import MetaAPI
+        from state_machine.integrations.meta.async_api_requests import AsyncMetaAPI
+
+        def recipient(index: int) -> str:
+            return f"57300000{index % args.recipients:04d}"
+
+        def send_with_meta_api(index: int) -> dict:
+            meta_api = MetaAPI(meta_secret_json=LOCAL_META_SECRET)
+            return meta_api.post_text_message(
+                text_message=f"Benchmark message {index}",
+                to_phone_number=recipient(index),
+            )
+
+        session = requests.Session()
+        session.mount(
+            "http://",
+            requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency),
+        )
+
+        def send_with_pooled_session(index: int) -> dict:
+            response = session.post(
+                f"{server.endpoint}v20.0/{PHONE_NUMBER_ID}/messages",
+                json={
+                    "messaging_product": "whatsapp",
+                    "to": recipient(index),
+                    "type": "text",
+                    "text": {"body": f"Benchmark message {index}"},
+                },
+            )
+            return response.json()
+
+        modes = {
+            "meta-api": send_with_meta_api,
+            "pooled-session": send_with_pooled_session,
+        }
+        for mode in args.modes.split(","):
+            if mode == "async":
+                run_async_benchmark(AsyncMetaAPI, recipient, args, server)
+                continue
+            run_benchmark(mode, modes[mode], args, server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# LOAD TEST FOR "ProcessText" WITH THE LOCAL BEDROCK AGENT RUNTIME (NO NETWORK)
+# Usage: python tests/integration/load_test_process_text.py --requests 200 --concurrency 20 --profile throttled
+
+# Built-in imports
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test for ProcessText")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--profile", default="typical")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-scale", type=float, default=0.1)
+    parser.add_argument(
+        "--sfn-max-attempts",
+        type=int,
+        default=5,
+        help="Emulates the State Machine retry policy for the Process Text task",
+    )
+    return parser.parse_args()
+
+
+def percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def main() -> None:
+    args = parse_args()
+
+    # Local configuration (must be set before importing the backend modules)
+    os.environ["BEDROCK_AGENT_RUNTIME_MODE"] = "local"
+    os.environ["LOCAL_BEDROCK_PROFILE"] = args.profile
+    os.environ["LOCAL_BEDROCK_SEED"] = str(args.seed)
+    os.environ["LOCAL_BEDROCK_TIME_SCALE"] = str(args.time_scale)
+    os.environ.setdefault("SECRET_NAME", "local-secret")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "ERROR")
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "backend"))
+
+    from state_machine.processing.process_text import ProcessText
+
+    def run_execution(index: int) -> dict:
+        event = {
+            "input": {
+                "dynamodb": {
+                    "NewImage": {
+                        "text": {"S": f"Hola, mensaje de prueba {index}"},
+                        "from_number": {"S": "573000000000"},
+                        "correlation_id": {"S": f"load-test-{index}"},
+                    }
+                }
+            }
+        }
+        started_at = time.monotonic()
+        attempts = 0
+        error = None
+        rng = random.Random(index)
+        while attempts < args.sfn_max_attempts:
+            attempts += 1
+            try:
+                ProcessText(event).process_text()
+                error = None
+                break
+            except Exception as e:
+                error = type(e).__name__
+                # Same as the State Machine retry (1s interval, 2.0 backoff, full jitter)
+                delay = min(10, 2 ** (attempts - 1)) * rng.random()
+                time.sleep(delay * args.time_scale)
+        return {
+            "latency_ms": (time.monotonic() - started_at) * 1000,
+            "attempts": attempts,
+            "error": error,
+        }
+
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(run_execution, range(args.requests)))
+    elapsed = time.monotonic() - started_at
+
+    # Latencies are reported in simulated time (independent of the time scale)
+    scale = args.time_scale or 1
+    latencies = [result["latency_ms"] / scale for result in results]
+    failures = [result for result in results if result["error"]]
+    print(f"Profile: {args.profile} (time scale {args.time_scale})")
+    print(
+        f"Executions: {len(results)} in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s)"
+    )
+    print(f"Failed executions: {len(failures)}")
+    print(f"Retried executions: {sum(1 for r in results if r['attempts'] > 1)}")
+    print(f"p50: {statistics.median(latencies):.1f} ms")
+    print(f"p95: {percentile(latencies, 95):.1f} ms")
+    print(f"p99: {percentile(latencies, 99):.1f} ms")
+    print(f"max: {max(latencies):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
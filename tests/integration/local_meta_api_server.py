@@ -0,0 +1,346 @@
+# LOCAL STAND-IN SERVER FOR THE META GRAPH API (WHATSAPP CLOUD API)
+# Implements the "messages" and "media" endpoints with configurable latency,
+# 429 rate limits and error injection, and records every received request.
+# Usage: python tests/integration/local_meta_api_server.py --port 8090 --rate-limit-mps 20
+
+# Built-in imports
+import argparse
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, get_args, get_type_hints
+
+
+MESSAGES_PATH = re.compile(r"^/v[\d.]+/(?P<phone_id>[^/]+)/messages$")
+MEDIA_UPLOAD_PATH = re.compile(r"^/v[\d.]+/(?P<phone_id>[^/]+)/media$")
+MEDIA_PATH = re.compile(r"^/v[\d.]+/(?P<media_id>[^/]+)$")
+MEDIA_DOWNLOAD_PATH = re.compile(r"^/media-download/(?P<media_id>[^/]+)$")
+
+
+@dataclass
+class ServerConfig:
+    """
+    Behaviour of the local Meta Graph API server.
+
+    Attributes:
+        latency_median_ms: float: Median latency of each response.
+        latency_p99_ms: float: p99 latency of each response (log-normal).
+        rate_limit_mps: float: Messages per second allowed per phone ID (0 to disable).
+        retry_after_seconds: Optional(int): "Retry-After" header for 429 responses.
+        error_rate: float: Probability of an injected 500 error.
+        seed: int: Seed for the random generator.
+    """
+
+    latency_median_ms: float = 50
+    latency_p99_ms: float = 250
+    rate_limit_mps: float = 0
+    retry_after_seconds: Optional[int] = 1
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class LocalMetaState:
+    """
+    Shared state of the server: recorded requests, media and rate limit windows.
+    """
+
+    def __init__(self, config: ServerConfig) -> None:
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.connections = set()
+        self.media = {}
+        self.windows = {}
+
+    def sample_latency(self) -> float:
+        median = self.config.latency_median_ms
+        if median <= 0:
+            return 0.0
+        sigma = max(0.0, math.log(self.config.latency_p99_ms / median) / 2.326)
+        with self.lock:
+            return self.rng.lognormvariate(math.log(median), sigma) / 1000
+
+    def inject_error(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.config.error_rate
+
+    def is_rate_limited(self, phone_id: str) -> bool:
+        if not self.config.rate_limit_mps:
+            return False
+        window = int(time.time())
+        with self.lock:
+            key = (phone_id, window)
+            self.windows[key] = self.windows.get(key, 0) + 1
+            return self.windows[key] > self.config.rate_limit_mps
+
+    def record(self, record: dict) -> None:
+        with self.lock:
+            self.requests.append(record)
+            self.connections.add(record["client"])
+
+    def stats(self) -> dict:
+        with self.lock:
+            status_codes = {}
+            for record in self.requests:
+                status = str(record["status"])
+                status_codes[status] = status_codes.get(status, 0) + 1
+            return {
+                "requests": len(self.requests),
+                "connections": len(self.connections),
+                "status_codes": status_codes,
+                "media": len(self.media),
+            }
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests.clear()
+            self.connections.clear()
+            self.windows.clear()
+
+
+class LocalMetaRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler with keep-alive (HTTP/1.1) to allow connection reuse.
+    """
+
+    protocol_version = "HTTP/1.1"
+    state: LocalMetaState = None
+
+    def setup(self) -> None:
+        super().setup()
+        # Avoid delayed-ACK stalls on keep-alive connections (as real servers do)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args) -> None:  # noqa: A002
+        return  # Avoid noisy logs on load-tests
+
+    def _send_json(self, status: int, body: dict, headers: dict = None) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_bytes(self, content: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _record(self, status: int, body: Optional[dict] = None) -> None:
+        self.state.record(
+            {
+                "method": self.command,
+                "path": self.path,
+                "status": status,
+                "body": body,
+                "client": f"{self.client_address[0]}:{self.client_address[1]}",
+                "timestamp": time.time(),
+            }
+        )
+
+    def _error_response(self, status: int, code: int, message: str) -> dict:
+        return {
+            "error": {
+                "message": message,
+                "type": "OAuthException",
+                "code": code,
+                "fbtrace_id": uuid.uuid4().hex,
+            }
+        }
+
+    def _maybe_fail(self, phone_id: Optional[str]) -> bool:
+        time.sleep(self.state.sample_latency())
+
+        if phone_id and self.state.is_rate_limited(phone_id):
+            headers = {
+                "X-Business-Use-Case-Usage": json.dumps(
+                    {
+                        phone_id: [
+                            {
+                                "type": "whatsapp",
+                                "call_count": 100,
+                                "estimated_time_to_regain_access": 0,
+                            }
+                        ]
+                    }
+                )
+            }
+            if self.state.config.retry_after_seconds is not None:
+                headers["Retry-After"] = str(self.state.config.retry_after_seconds)
+            self._record(429)
+            self._send_json(
+                429,
+                self._error_response(429, 130429, "(#130429) Rate limit hit"),
+                headers,
+            )
+            return True
+
+        if self.state.inject_error():
+            self._record(500)
+            self._send_json(
+                500, self._error_response(500, 1, "An unknown error occurred")
+            )
+            return True
+        return False
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/_local/requests":
+            with self.state.lock:
+                recorded_requests = list(self.state.requests)
+            return self._send_json(200, {"requests": recorded_requests})
+        if self.path == "/_local/stats":
+            return self._send_json(200, self.state.stats())
+
+        match = MEDIA_DOWNLOAD_PATH.match(self.path)
+        if match and match["media_id"] in self.state.media:
+            media = self.state.media[match["media_id"]]
+            self._record(200)
+            return self._send_bytes(media["content"], media["mime_type"])
+
+        match = MEDIA_PATH.match(self.path.split("?")[0])
+        if match and match["media_id"] in self.state.media:
+            if self._maybe_fail(None):
+                return
+            media = self.state.media[match["media_id"]]
+            host = self.headers.get("Host", "127.0.0.1")
+            body = {
+                "messaging_product": "whatsapp",
+                "id": match["media_id"],
+                "url": f"http://{host}/media-download/{match['media_id']}",
+                "mime_type": media["mime_type"],
+                "file_size": len(media["content"]),
+            }
+            self._record(200)
+            return self._send_json(200, body)
+
+        self._record(404)
+        self._send_json(404, self._error_response(404, 100, "Unknown path"))
+
+    def do_POST(self) -> None:  # noqa: N802
+        raw_body = self._read_body()
+
+        if self.path == "/_local/reset":
+            self.state.reset()
+            return self._send_json(200, {"reset": True})
+
+        match = MESSAGES_PATH.match(self.path)
+        if match:
+            if self._maybe_fail(match["phone_id"]):
+                return
+            body = json.loads(raw_body or b"{}")
+            response = {
+                "messaging_product": "whatsapp",
+                "contacts": [{"input": body.get("to"), "wa_id": body.get("to")}],
+                "messages": [{"id": f"wamid.LOCAL{uuid.uuid4().hex}"}],
+            }
+            self._record(200, body)
+            return self._send_json(200, response)
+
+        match = MEDIA_UPLOAD_PATH.match(self.path)
+        if match:
+            if self._maybe_fail(match["phone_id"]):
+                return
+            media_id = str(uuid.uuid4().int)[:16]
+            content_type = self.headers.get("Content-Type", "")
+            mime_type, content = "application/octet-stream", raw_body
+            # Extract the "file" part of the multipart body (good enough for tests)
+            file_part = re.search(
+                rb'name="file"[^\r\n]*\r\n(?:Content-Type: (?P<mime>[^\r\n]+)\r\n)?\r\n(?P<content>.*?)\r\n--',
+                raw_body,
+                re.DOTALL,
+            )
+            if "multipart/form-data" in content_type and file_part:
+                content = file_part["content"]
+                if file_part["mime"]:
+                    mime_type = file_part["mime"].decode()
+            self.state.media[media_id] = {"content": content, "mime_type": mime_type}
+            self._record(200, {"media_id": media_id, "size": len(content)})
+            return self._send_json(200, {"id": media_id})
+
+        self._record(404)
+        self._send_json(404, self._error_response(404, 100, "Unknown path"))
+
+
+class LocalMetaAPIServer:
+    """
+    Local Meta Graph API server running in a background thread.
+    """
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, config: ServerConfig = None
+    ) -> None:
+        self.state = LocalMetaState(config or ServerConfig())
+        handler = type(
+            "BoundLocalMetaRequestHandler",
+            (LocalMetaRequestHandler,),
+            {"state": self.state},
+        )
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        """
+        Base endpoint (same format as the <META_ENDPOINT> env var).
+        """
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "LocalMetaAPIServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "LocalMetaAPIServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Meta Graph API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    field_types = get_type_hints(ServerConfig)
+    for field in fields(ServerConfig):
+        # Use the annotated type (e.g. "50" is a valid default for a float knob)
+        field_type = field_types[field.name]
+        field_type = next(
+            (arg for arg in get_args(field_type) if arg is not type(None)), field_type
+        )
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=field_type,
+            default=field.default,
+        )
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    server = LocalMetaAPIServer(host, port, ServerConfig(**args))
+    print(f"Local Meta Graph API listening on {server.endpoint}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()